@@ -0,0 +1,171 @@
+import os
+import sys
+import json
+import time
+import argparse
+from itertools import islice
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "exporters"))
+
+from cve_extractor import extract_records, iter_cve_files, parse_cve_json, summarize_cve  # noqa: E402
+from synthetic_feeds import generate_cve_records  # noqa: E402
+
+
+def legacy_extract(cve_json):
+    """The nested-loop extraction process_cve used before cve_extractor, minus the write."""
+    meta = cve_json.get("cveMetadata", {})
+    data = {
+        "cveId": meta.get("cveId"),
+        "dateReserved": meta.get("dateReserved"),
+        "datePublished": meta.get("datePublished"),
+        "dateModified": meta.get("dateUpdated") or meta.get("dateModified"),
+        "description": None,
+        "vectorString": None,
+        "baseScore": None,
+        "baseSeverity": None,
+        "products": [],
+        "cweId": None,
+    }
+
+    containers = cve_json.get("containers", {})
+    for container in containers.values():
+        if isinstance(container, dict):
+            container_list = [container]
+        elif isinstance(container, list):
+            container_list = container
+        else:
+            continue
+        for item in container_list:
+            if not isinstance(item, dict):
+                continue
+            if data["cweId"] is None:
+                problems = item.get("problemTypes") or item.get("ProblemTypes")
+                if isinstance(problems, list):
+                    for pt in problems:
+                        if not isinstance(pt, dict):
+                            continue
+                        descs = pt.get("descriptions")
+                        if isinstance(descs, list):
+                            for desc in descs:
+                                if isinstance(desc, dict):
+                                    cwe = desc.get("cweId")
+                                    if cwe:
+                                        data["cweId"] = cwe
+                                        break
+                            if data["cweId"]:
+                                break
+                        if data["cweId"]:
+                            break
+            if data["description"] is None:
+                descs = item.get("descriptions")
+                if isinstance(descs, list) and descs:
+                    data["description"] = descs[0].get("value")
+            if data["vectorString"] is None:
+                metrics = item.get("metrics")
+                if isinstance(metrics, list) and metrics:
+                    first_metric = metrics[0]
+                    cvss = (
+                        first_metric.get("cvssV3_1")
+                        or first_metric.get("cvssV3_0")
+                        or first_metric
+                    )
+                    if isinstance(cvss, dict):
+                        data["vectorString"] = cvss.get("vectorString")
+                        data["baseScore"] = cvss.get("baseScore")
+                        data["baseSeverity"] = cvss.get("baseSeverity")
+            affected = item.get("affected")
+            if isinstance(affected, list):
+                for aff in affected:
+                    if not isinstance(aff, dict):
+                        continue
+                    vendor = aff.get("vendor") or ""
+                    product = aff.get("product") or ""
+                    versions = aff.get("versions", [])
+                    if not isinstance(versions, list):
+                        continue
+                    for v in versions:
+                        if isinstance(v, dict) and v.get("status") == "affected":
+                            data["products"].append(
+                                {"vendor": vendor, "product": product, "version": v.get("version") or ""}
+                            )
+            if data["description"] and data["vectorString"] and data["cweId"] is not None:
+                break
+        if data["description"] and data["vectorString"] and data["cweId"] is not None:
+            break
+    return data
+
+
+# Parsing and extraction are timed as separate stages: the legacy importer
+# used json.loads and the new one orjson, and crediting the parser's speed to
+# the extractor hid that summarizing records costs more than the old loops.
+PARSERS = {
+    "json": json.loads,
+    "orjson": parse_cve_json,
+}
+
+# "summary" is what the importer runs per file and is held to the legacy
+# loops' time; "full" also builds every reference and typed record.
+EXTRACTORS = {
+    "legacy": legacy_extract,
+    "summary": summarize_cve,
+    "full": extract_records,
+}
+
+
+def best_per_item(func, items, repeat):
+    """Return the best time over *repeat* runs of *func* on every item, in µs per item."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for item in items:
+            func(item)
+        best = min(best, time.perf_counter() - start)
+    return best / max(len(items), 1) * 1e6
+
+
+def time_parsers(texts, repeat=3):
+    """Return the best per-file parse time in microseconds for every parser."""
+    return {name: best_per_item(parse, texts, repeat) for name, parse in PARSERS.items()}
+
+
+def time_extractors(texts, repeat=3):
+    """Return the best per-file time in microseconds for every extractor.
+
+    Every extractor runs on the same pre-parsed records, so the timings
+    exclude parsing and reading from disk.
+    """
+    parsed = [json.loads(text) for text in texts]
+    return {name: best_per_item(extract, parsed, repeat) for name, extract in EXTRACTORS.items()}
+
+
+def load_files(directory, limit):
+    texts = []
+    for path in islice(iter_cve_files(directory), limit):
+        with open(path, "rb") as f:
+            texts.append(f.read())
+    return texts
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare per-file CVE extraction cost")
+    parser.add_argument("--cve-dir", default="../data/cve/cvelistV5-main/cves")
+    parser.add_argument("--limit", type=int, default=20000, help="Number of files to load")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument(
+        "--synthetic", type=int, metavar="N", help="Benchmark N generated records instead of --cve-dir"
+    )
+    args = parser.parse_args()
+
+    if args.synthetic:
+        cve_texts = [json.dumps(r, indent=2).encode("utf-8") for r in generate_cve_records(args.synthetic)]
+    else:
+        cve_texts = load_files(args.cve_dir, args.limit)
+    if not cve_texts:
+        sys.exit(f"❌ No CVE files loaded from {args.cve_dir}; pass --cve-dir or --synthetic N")
+    print(f"Loaded {len(cve_texts)} files")
+    print("Parse:")
+    for name, micros in time_parsers(cve_texts, repeat=args.repeat).items():
+        print(f"{name:>16}: {micros:8.2f} µs/file")
+    print("Extract:")
+    for name, micros in time_extractors(cve_texts, repeat=args.repeat).items():
+        print(f"{name:>16}: {micros:8.2f} µs/file")
@@ -0,0 +1,104 @@
+"""In-process stand-in for a Neo4j driver.
+
+``RecordingDriver`` accepts the same calls the exporters make
+(``session()``, ``run``, ``execute_write``/``write_transaction``) and records
+statements and UNWIND row counts instead of talking to a database. Reads
+return the canned rows registered with ``add_result``. This lets a benchmark
+time everything the pipeline does on the client side, up to the wire.
+"""
+import threading
+from collections import Counter
+
+
+class _Result(list):
+    """A list of records that also answers the Result methods the code uses."""
+
+    def single(self):
+        return self[0] if self else None
+
+    def consume(self):
+        return None
+
+    def data(self):
+        return [dict(r) for r in self]
+
+
+class _Record(dict):
+    def data(self):
+        return dict(self)
+
+
+class RecordingDriver:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._results = []
+        self.statements = Counter()
+        self.rows = Counter()
+        self.transactions = 0
+
+    def add_result(self, fragment, rows):
+        """Return *rows* for any query containing *fragment*."""
+        self._results.append((fragment, [_Record(r) for r in rows]))
+
+    def session(self, **_):
+        return _Session(self)
+
+    def close(self):
+        pass
+
+    def verify_connectivity(self):
+        pass
+
+    def _run(self, query, parameters=None, **kwargs):
+        params = dict(parameters or {}, **kwargs)
+        key = " ".join(query.split())[:80]
+        with self._lock:
+            self.statements[key] += 1
+            rows = params.get("rows")
+            self.rows[key] += len(rows) if isinstance(rows, list) else 1
+        for fragment, records in self._results:
+            if fragment in query:
+                return _Result(records)
+        return _Result()
+
+    def summary(self):
+        return {
+            "statements": sum(self.statements.values()),
+            "rows": sum(self.rows.values()),
+            "transactions": self.transactions,
+        }
+
+
+class _Session:
+    def __init__(self, driver):
+        self._driver = driver
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    def close(self):
+        pass
+
+    def run(self, query, parameters=None, **kwargs):
+        return self._driver._run(query, parameters, **kwargs)
+
+    def execute_write(self, fn, *args, **kwargs):
+        with self._driver._lock:
+            self._driver.transactions += 1
+        return fn(_Transaction(self._driver), *args, **kwargs)
+
+    execute_read = execute_write
+    write_transaction = execute_write
+    read_transaction = execute_write
+
+
+class _Transaction:
+    def __init__(self, driver):
+        self._driver = driver
+
+    def run(self, query, parameters=None, **kwargs):
+        return self._driver._run(query, parameters, **kwargs)
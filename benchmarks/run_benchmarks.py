@@ -0,0 +1,307 @@
+"""Time every pipeline stage on synthetic feeds and compare with stored baselines.
+
+Usage (from the benchmarks directory):
+
+    python run_benchmarks.py --scale small
+    python run_benchmarks.py --scale medium --save-baseline
+
+No network access or Neo4j instance is needed: feeds come from
+synthetic_feeds and writes go to graph_sink.RecordingDriver.
+
+Baselines store every stage as a multiple of a fixed calibration workload
+timed right before it, so a baseline saved on one machine still flags
+regressions on another that is uniformly faster or slower, and load that
+drifts during a run is factored out stage by stage.
+"""
+import os
+import sys
+import gc
+import csv
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import platform
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+for folder in ("exporters", "vectorizer", "data_parsers"):
+    sys.path.insert(0, os.path.join(ROOT, folder))
+
+from synthetic_feeds import (  # noqa: E402
+    write_capec_csv,
+    write_cpe_xml,
+    write_cvelist,
+    write_cwe_csv,
+    write_kev_json,
+    write_stix_bundle,
+)
+from graph_sink import RecordingDriver  # noqa: E402
+from cve_extractor import AffectedRecord, iter_cve_files, load_cve_file, summarize_cve  # noqa: E402
+from parallel_writer import ParallelWriter  # noqa: E402
+from cvss_vector import parse_vector  # noqa: E402
+from export_cve_to_neo4j import AFFECTS_QUERY, CVE_NODES_QUERY, affected_cve_key, cve_key, product_key  # noqa: E402
+from cve_versions import UNBOUNDED_VERSIONS  # noqa: E402
+from link_products_to_cpe import build_cpe_table, join_products_to_cpes, join_ranges_to_cpes  # noqa: E402
+from jsonify_cpe import convert_cpe_to_json  # noqa: E402
+from node_text import build_node_text  # noqa: E402
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines.json")
+
+SCALES = {
+    "small": {"cves": 2000, "cpes": 10000, "products": 500, "cwes": 400, "capecs": 600, "techniques": 600, "kev": 200},
+    "medium": {"cves": 20000, "cpes": 100000, "products": 5000, "cwes": 900, "capecs": 600, "techniques": 800, "kev": 1200},
+    "large": {"cves": 250000, "cpes": 1300000, "products": 50000, "cwes": 950, "capecs": 600, "techniques": 800, "kev": 1400},
+}
+
+
+def generate_feeds(directory, scale, seed):
+    """Write every synthetic feed under *directory* and return their paths."""
+    paths = {
+        "cves": os.path.join(directory, "cves"),
+        "cpe": os.path.join(directory, "cpe.xml"),
+        "cpe_json": os.path.join(directory, "cpe.json"),
+        "cwe": os.path.join(directory, "cwe.csv"),
+        "capec": os.path.join(directory, "capec.csv"),
+        "stix": os.path.join(directory, "enterprise-attack.json"),
+        "kev": os.path.join(directory, "kev.json"),
+    }
+    write_cvelist(paths["cves"], scale["cves"], scale["products"], seed)
+    write_cpe_xml(paths["cpe"], scale["cpes"], scale["products"], seed)
+    write_cwe_csv(paths["cwe"], scale["cwes"], seed)
+    write_capec_csv(paths["capec"], scale["capecs"], scale["cwes"], scale["techniques"], seed)
+    write_stix_bundle(paths["stix"], scale["techniques"], seed)
+    write_kev_json(paths["kev"], scale["kev"], scale["cves"], seed)
+    return paths
+
+
+# --- Stages ---
+# Each stage takes the shared state dict, may add to it, and returns the
+# number of items it processed.
+
+def stage_parse_cve(state):
+    state["cve_json"] = [r for path in iter_cve_files(state["paths"]["cves"]) for r in load_cve_file(path)]
+    return len(state["cve_json"])
+
+
+def stage_parse_cpe(state):
+    convert_cpe_to_json(state["paths"]["cpe"], state["paths"]["cpe_json"])
+    with open(state["paths"]["cpe_json"], "r", encoding="utf-8") as f:
+        state["cpes"] = json.load(f)
+    return len(state["cpes"])
+
+
+def stage_parse_csv(state):
+    rows = 0
+    for key in ("cwe", "capec"):
+        with open(state["paths"][key], mode="r", encoding="utf-8-sig") as f:
+            state[key] = list(csv.DictReader(f))
+        rows += len(state[key])
+    return rows
+
+
+def stage_parse_stix_kev(state):
+    with open(state["paths"]["stix"], "r", encoding="utf-8") as f:
+        objects = json.load(f)["objects"]
+    with open(state["paths"]["kev"], "r", encoding="utf-8") as f:
+        vulnerabilities = json.load(f)["vulnerabilities"]
+    return len(objects) + len(vulnerabilities)
+
+
+def stage_extract(state):
+    nodes, products = [], []
+    for cve_json in state["cve_json"]:
+        data = summarize_cve(cve_json)
+        products.extend(data.pop("products"))
+        data["cvss"] = parse_vector(data["vectorString"])
+        nodes.append(data)
+    state["nodes"], state["products"] = nodes, products
+    return len(nodes) + len(products)
+
+
+def stage_batch(state):
+    driver = RecordingDriver()
+    writer = ParallelWriter(driver, sessions=4)
+    writer.write(CVE_NODES_QUERY, state["nodes"], cve_key, desc="CVE rows")
+    writer.write(AFFECTS_QUERY, state["products"], affected_cve_key, product_key, desc="AFFECTS rows")
+    state["sink"] = driver.summary()
+    return len(state["nodes"]) + len(state["products"])
+
+
+def stage_embedding_prep(state):
+    texts = [build_node_text(node, ["description"]) for node in state["nodes"]]
+    cwe_fields = ["Name", "Description", "Extended Description", "Potential Mitigations"]
+    texts.extend(build_node_text(row, cwe_fields) for row in state["cwe"])
+    texts.extend(build_node_text(row, ["Name", "Description", "Prerequisites"]) for row in state["capec"])
+    return sum(1 for text in texts if text)
+
+
+def stage_link(state):
+    table = build_cpe_table((i, c["vendor"], c["product"], c["version"]) for i, c in enumerate(state["cpes"]))
+    products = {(p.vendor, p.product, p.version) for p in map(AffectedRecord._make, state["products"])}
+    ranges = [
+        (
+            p.cveId,
+            f"{p.lessThan or ''}|{p.lessThanOrEqual or ''}|{p.versionType or ''}",
+            p.vendor,
+            p.product,
+            p.version,
+            p.lessThan,
+            p.lessThanOrEqual,
+            p.versionType,
+        )
+        for p in map(AffectedRecord._make, state["products"])
+        if p.lessThan is not None or p.lessThanOrEqual is not None
+        or (p.version or "").strip().lower() in UNBOUNDED_VERSIONS
+    ]
+    links = join_products_to_cpes([(i,) + key for i, key in enumerate(products)], table)
+    state["links"] = len(links) + len(join_ranges_to_cpes(ranges, table))
+    return len(products) + len(ranges) + len(state["cpes"])
+
+
+STAGES = [
+    ("parse.cve", stage_parse_cve),
+    ("parse.cpe", stage_parse_cpe),
+    ("parse.csv", stage_parse_csv),
+    ("parse.stix_kev", stage_parse_stix_kev),
+    ("extract.cve", stage_extract),
+    ("batch.write", stage_batch),
+    ("embedding.prep", stage_embedding_prep),
+    ("link.cpe", stage_link),
+]
+
+
+def calibrate(repeat=1):
+    """Return the best time of a fixed parse/sort/format workload, in seconds.
+
+    It exercises the same interpreter paths as the stages (JSON, dicts,
+    string formatting) and does not depend on the feeds, so stage times
+    divided by it are comparable across machines.
+    """
+    records = [
+        {"cveId": f"CVE-2024-{i:05d}", "vendor": f"vendor{i % 97}", "version": f"{i % 13}.{i % 7}.{i % 5}"}
+        for i in range(10000)
+    ]
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        parsed = json.loads(json.dumps(records))
+        parsed.sort(key=lambda r: (r["vendor"], r["version"]))
+        keys = {f"{r['vendor']}:{r['version']}" for r in parsed}
+        best = min(best, time.perf_counter() - start)
+    assert keys
+    return best
+
+
+def run_stages(paths, repeat=3, only=None):
+    """Run every stage *repeat* times and return {stage: (items, best_seconds, calibration_seconds)}.
+
+    Each run is preceded by a calibration run; the best of both is kept.
+    Like timeit, runs are timed with the garbage collector paused, since its
+    pauses depend on everything allocated so far rather than on the stage.
+    """
+    state = {"paths": paths}
+    results = {}
+    for name, stage in STAGES:
+        if only and not any(name.startswith(prefix) for prefix in only):
+            # Later stages depend on the state earlier ones build
+            stage(state)
+            continue
+        best, calibration, items = float("inf"), float("inf"), 0
+        for _ in range(repeat):
+            gc.collect()
+            gc.disable()
+            try:
+                calibration = min(calibration, calibrate())
+                start = time.perf_counter()
+                items = stage(state)
+                best = min(best, time.perf_counter() - start)
+            finally:
+                gc.enable()
+        results[name] = (items, best, calibration)
+    return results
+
+
+def load_baselines(path=BASELINE_PATH):
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def report(results, baseline, tolerance, min_seconds=0.05):
+    """Print a stage table and return the names of regressed stages.
+
+    Stages are compared by their time relative to their calibration; the
+    baseline column shows the baseline rescaled to this machine's speed. A
+    stage only regresses when it is more than *tolerance* slower and that
+    is more than *min_seconds*: millisecond stages vary by 100% from
+    scheduling noise alone.
+    """
+    regressions = []
+    stages = baseline.get("stages", {})
+    if baseline and "calibration" not in baseline:
+        print("⚠️ Baseline predates calibration; re-save it with --save-baseline to compare")
+        stages = {}
+    print(f"\n{'stage':<16}{'items':>10}{'seconds':>10}{'items/s':>12}{'calib.':>8}{'baseline':>10}{'change':>9}")
+    for name, (items, seconds, calibration) in results.items():
+        rate = items / seconds if seconds else float("inf")
+        line = f"{name:<16}{items:>10}{seconds:>10.3f}{rate:>12.0f}{calibration:>8.3f}"
+        base = stages.get(name)
+        if base:
+            expected = base["relative"] * calibration
+            change = (seconds - expected) / expected
+            regressed = change > tolerance and seconds - expected > min_seconds
+            flag = " ⚠️" if regressed else ""
+            line += f"{expected:>10.3f}{change:>+8.0%}{flag}"
+            if regressed:
+                regressions.append(name)
+        print(line)
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark pipeline stages on synthetic feeds")
+    parser.add_argument("--scale", choices=sorted(SCALES), default="small")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per stage; the best one is kept")
+    parser.add_argument("--stage", action="append", help="Only time stages with this prefix (repeatable)")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed slowdown before flagging")
+    parser.add_argument(
+        "--min-seconds", type=float, default=0.05, help="Slowdowns shorter than this are never flagged"
+    )
+    parser.add_argument("--save-baseline", action="store_true", help="Store these timings as the baseline")
+    parser.add_argument("--keep", help="Generate feeds into this directory and keep them")
+    args = parser.parse_args()
+
+    work_dir = args.keep or tempfile.mkdtemp(prefix="bench-feeds-")
+    try:
+        print(f"🧪 Generating '{args.scale}' synthetic feeds in {work_dir}")
+        feed_paths = generate_feeds(work_dir, SCALES[args.scale], args.seed)
+        stage_results = run_stages(feed_paths, repeat=args.repeat, only=args.stage)
+    finally:
+        if not args.keep:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    baselines = load_baselines()
+    key = f"{args.scale}:seed={args.seed}"
+    regressed = report(stage_results, baselines.get(key, {}), args.tolerance, args.min_seconds)
+
+    if args.save_baseline:
+        baselines[key] = {
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "calibration": round(min(calibration for _, _, calibration in stage_results.values()), 4),
+            "stages": {
+                name: {"items": items, "seconds": round(seconds, 4), "relative": round(seconds / calibration, 4)}
+                for name, (items, seconds, calibration) in stage_results.items()
+            },
+        }
+        with open(BASELINE_PATH, "w", encoding="utf-8") as f:
+            json.dump(baselines, f, indent=2, sort_keys=True)
+        print(f"💾 Baseline saved for {key}")
+
+    if regressed and not args.save_baseline:
+        print(f"❌ Regressions: {', '.join(regressed)}")
+        sys.exit(1)
+    print("✅ No regressions against baseline.")
@@ -0,0 +1,284 @@
+"""Deterministic synthetic versions of every feed the pipeline consumes.
+
+Every generator takes a ``seed`` and produces the same output for the same
+arguments, so benchmark runs on different machines see identical inputs.
+Vendor/product and CWE choices are skewed so that a few hub nodes receive
+most of the edges, as in the real feeds.
+"""
+import os
+import csv
+import json
+import random
+from xml.sax.saxutils import escape
+
+WORDS = (
+    "buffer overflow remote attacker execute arbitrary code crafted request "
+    "authentication bypass injection memory corruption denial service privilege "
+    "escalation improper validation input sensitive information disclosure "
+    "cross site scripting path traversal deserialization untrusted data"
+).split()
+
+SEVERITIES = ((9.0, "CRITICAL"), (7.0, "HIGH"), (4.0, "MEDIUM"), (0.1, "LOW"))
+
+
+def _sentence(rng, words=24):
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize() + "."
+
+
+def _skewed(rng, count):
+    """Return an index in [0, count) where low indexes are much more likely."""
+    return min(int(rng.paretovariate(1.2)) - 1, count - 1)
+
+
+def vendor_products(count, seed=0):
+    """Return *count* (vendor, product) pairs shared by the CVE and CPE generators."""
+    rng = random.Random(seed)
+    pairs = []
+    for i in range(count):
+        vendor = f"{rng.choice(WORDS)}_{i % 97}"
+        pairs.append((vendor, f"{rng.choice(WORDS)}_{rng.choice(WORDS)}_{i}"))
+    return pairs
+
+
+def _version(rng):
+    return f"{rng.randint(0, 9)}.{rng.randint(0, 20)}.{rng.randint(0, 30)}"
+
+
+def _cvss(rng):
+    av, ac, pr, ui = rng.choice("NALP"), rng.choice("LH"), rng.choice("NLH"), rng.choice("NR")
+    score = round(rng.uniform(1.0, 10.0), 1)
+    severity = next(name for floor, name in SEVERITIES if score >= floor)
+    return {
+        "version": "3.1",
+        "vectorString": f"CVSS:3.1/AV:{av}/AC:{ac}/PR:{pr}/UI:{ui}/S:U/C:H/I:H/A:H",
+        "baseScore": score,
+        "baseSeverity": severity,
+    }
+
+
+def generate_cve_record(rng, index, products, cwe_count=400):
+    """Return one cvelistV5 record dict."""
+    year = 2015 + index % 10
+    cve_id = f"CVE-{year}-{10000 + index}"
+    affected = []
+    for _ in range(rng.randint(1, 3)):
+        vendor, product = products[_skewed(rng, len(products))]
+        versions = []
+        for _ in range(rng.randint(1, 4)):
+            low = _version(rng)
+            if rng.random() < 0.5:
+                versions.append({"version": low, "status": "affected"})
+            else:
+                versions.append(
+                    {"version": low, "lessThan": _version(rng), "status": "affected", "versionType": "semver"}
+                )
+        affected.append(
+            {"vendor": vendor, "product": product, "defaultStatus": "unaffected", "versions": versions}
+        )
+
+    metrics = [{"format": "CVSS", "cvssV3_1": _cvss(rng)}]
+    if rng.random() < 0.2:
+        metrics.append({"format": "CVSS", "cvssV4_0": dict(_cvss(rng), version="4.0")})
+
+    cna = {
+        "providerMetadata": {"orgId": f"org-{index % 50}", "shortName": f"cna{index % 50}"},
+        "descriptions": [{"lang": "en", "value": _sentence(rng, rng.randint(15, 80))}],
+        "problemTypes": [
+            {
+                "descriptions": [
+                    {
+                        "lang": "en",
+                        "type": "CWE",
+                        "cweId": f"CWE-{_skewed(rng, cwe_count) + 1}",
+                        "description": _sentence(rng, 4),
+                    }
+                ]
+            }
+        ],
+        "metrics": metrics,
+        "affected": affected,
+        "references": [{"url": f"https://example.com/{cve_id}/{i}"} for i in range(rng.randint(1, 8))],
+    }
+    containers = {"cna": cna}
+    if rng.random() < 0.3:
+        adp_cwe = f"CWE-{rng.randint(1, cwe_count)}"
+        containers["adp"] = [
+            {
+                "providerMetadata": {"orgId": "adp-org", "shortName": "CISA-ADP"},
+                "metrics": [{"other": {"type": "ssvc", "content": {"id": cve_id}}}],
+                "problemTypes": [
+                    {"descriptions": [{"lang": "en", "type": "CWE", "cweId": adp_cwe, "description": adp_cwe}]}
+                ],
+            }
+        ]
+
+    return {
+        "dataType": "CVE_RECORD",
+        "dataVersion": "5.1",
+        "cveMetadata": {
+            "cveId": cve_id,
+            "state": "PUBLISHED",
+            "assignerOrgId": cna["providerMetadata"]["orgId"],
+            "assignerShortName": cna["providerMetadata"]["shortName"],
+            "dateReserved": f"{year}-01-01T00:00:00.000Z",
+            "datePublished": f"{year}-{1 + index % 12:02d}-{1 + index % 28:02d}T00:00:00.000Z",
+            "dateUpdated": f"{year}-12-31T00:00:00.000Z",
+        },
+        "containers": containers,
+    }
+
+
+def generate_cve_records(count, product_count=2000, seed=0):
+    rng = random.Random(seed)
+    products = vendor_products(product_count, seed)
+    return [generate_cve_record(rng, i, products) for i in range(count)]
+
+
+def write_cvelist(directory, count, product_count=2000, seed=0):
+    """Write *count* records in the cvelistV5 ``cves/<year>/<nxxx>/CVE-*.json`` layout."""
+    paths = []
+    for record in generate_cve_records(count, product_count, seed):
+        cve_id = record["cveMetadata"]["cveId"]
+        _, year, number = cve_id.split("-")
+        folder = os.path.join(directory, year, f"{number[:-3]}xxx")
+        os.makedirs(folder, exist_ok=True)
+        path = os.path.join(folder, f"{cve_id}.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(record, f, indent=2)
+        paths.append(path)
+    return paths
+
+
+def write_cpe_xml(path, count, product_count=2000, seed=0):
+    """Write an official-cpe-dictionary_v2.3.xml style file with *count* items."""
+    rng = random.Random(seed + 1)
+    products = vendor_products(product_count, seed)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write('<?xml version="1.0" encoding="UTF-8"?>\n')
+        f.write(
+            '<cpe-list xmlns="http://cpe.mitre.org/dictionary/2.0" '
+            'xmlns:cpe-23="http://scap.nist.gov/schema/cpe-extension/2.3">\n'
+        )
+        for _ in range(count):
+            vendor, product = products[_skewed(rng, len(products))]
+            version = _version(rng)
+            name = f"cpe:/a:{vendor}:{product}:{version}"
+            f.write(f'  <cpe-item name="{escape(name)}">\n')
+            f.write(f'    <title xml:lang="en-US">{escape(f"{vendor} {product} {version}")}</title>\n')
+            f.write(
+                f'    <cpe-23:cpe23-item name="cpe:2.3:a:{escape(vendor)}:{escape(product)}:{version}:*:*:*:*:*:*:*"/>\n'
+            )
+            f.write("  </cpe-item>\n")
+        f.write("</cpe-list>\n")
+
+
+def write_cwe_csv(path, count, seed=0):
+    """Write a CWE view CSV with the columns export_cwe_to_neo4j reads."""
+    rng = random.Random(seed + 2)
+    fields = [
+        "CWE-ID", "Name", "Weakness Abstraction", "Status", "Description", "Extended Description",
+        "Related Weaknesses", "Alternate Terms", "Modes Of Introduction", "Common Consequences",
+        "Potential Mitigations", "Observed Examples", "Taxonomy Mappings", "Related Attack Patterns",
+    ]
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=fields)
+        writer.writeheader()
+        for i in range(1, count + 1):
+            related = "".join(f"::NATURE:ChildOf:CWE ID:{rng.randint(1, count)}:VIEW ID:1000" for _ in range(2))
+            writer.writerow(
+                {
+                    "CWE-ID": i,
+                    "Name": _sentence(rng, 5),
+                    "Weakness Abstraction": rng.choice(["Pillar", "Class", "Base", "Variant"]),
+                    "Status": "Stable",
+                    "Description": _sentence(rng, 30),
+                    "Extended Description": _sentence(rng, 60),
+                    "Related Weaknesses": related + "::",
+                    "Alternate Terms": "",
+                    "Modes Of Introduction": "::PHASE:Implementation::",
+                    "Common Consequences": "::SCOPE:Integrity:IMPACT:Modify Memory::",
+                    "Potential Mitigations": f"::PHASE:Implementation:DESCRIPTION:{_sentence(rng, 10)}::",
+                    "Observed Examples": "",
+                    "Taxonomy Mappings": "",
+                    "Related Attack Patterns": "::" + "::".join(str(rng.randint(1, 600)) for _ in range(3)) + "::",
+                }
+            )
+
+
+def write_capec_csv(path, count, cwe_count=400, technique_count=600, seed=0):
+    """Write a CAPEC view CSV (including the quirky ``'ID`` header)."""
+    rng = random.Random(seed + 3)
+    fields = [
+        "'ID", "Name", "Abstraction", "Status", "Description", "Likelihood Of Attack", "Typical Severity",
+        "Related Attack Patterns", "Execution Flow", "Prerequisites", "Resources Required", "Consequences",
+        "Related Weaknesses", "Taxonomy Mappings",
+    ]
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=fields)
+        writer.writeheader()
+        for i in range(1, count + 1):
+            writer.writerow(
+                {
+                    "'ID": i,
+                    "Name": _sentence(rng, 5),
+                    "Abstraction": rng.choice(["Meta", "Standard", "Detailed"]),
+                    "Status": "Stable",
+                    "Description": _sentence(rng, 40),
+                    "Likelihood Of Attack": rng.choice(["High", "Medium", "Low"]),
+                    "Typical Severity": rng.choice(["High", "Medium", "Low"]),
+                    "Related Attack Patterns": f"::NATURE:ChildOf:CAPEC ID:{rng.randint(1, count)}::",
+                    "Execution Flow": f"::STEP:1:PHASE:Explore:DESCRIPTION:{_sentence(rng, 10)}::",
+                    "Prerequisites": f"::{_sentence(rng, 8)}::",
+                    "Resources Required": "::None::",
+                    "Consequences": "::SCOPE:Confidentiality:TECHNIQUE:Read Data::",
+                    "Related Weaknesses": "::" + "::".join(
+                        str(_skewed(rng, cwe_count) + 1) for _ in range(rng.randint(1, 4))
+                    ) + "::",
+                    "Taxonomy Mappings": "".join(
+                        f"::TAXONOMY NAME:ATTACK:ENTRY ID:{1000 + rng.randint(0, technique_count - 1)}:ENTRY NAME:x"
+                        for _ in range(rng.randint(0, 2))
+                    ) + "::",
+                }
+            )
+
+
+def write_stix_bundle(path, count, seed=0):
+    """Write an enterprise-attack style STIX 2.1 bundle of attack-patterns."""
+    rng = random.Random(seed + 4)
+    objects = []
+    for i in range(count):
+        external_id = f"T{1000 + i}" if i % 4 else f"T{1000 + i // 4}.{i % 1000:03d}"
+        objects.append(
+            {
+                "type": "attack-pattern",
+                "id": f"attack-pattern--{rng.getrandbits(128):032x}",
+                "name": _sentence(rng, 4),
+                "description": _sentence(rng, 50),
+                "kill_chain_phases": [
+                    {"kill_chain_name": "mitre-attack", "phase_name": rng.choice(["execution", "persistence"])}
+                ],
+                "external_references": [
+                    {"source_name": "mitre-attack", "external_id": external_id, "url": f"https://attack.mitre.org/{i}"}
+                ],
+            }
+        )
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"type": "bundle", "id": "bundle--synthetic", "objects": objects}, f)
+
+
+def write_kev_json(path, count, cve_count, seed=0):
+    """Write a known_exploited_vulnerabilities.json listing *count* generated CVEs."""
+    rng = random.Random(seed + 5)
+    picks = rng.sample(range(cve_count), min(count, cve_count))
+    vulnerabilities = [
+        {
+            "cveID": f"CVE-{2015 + i % 10}-{10000 + i}",
+            "vendorProject": "vendor",
+            "product": "product",
+            "dateAdded": "2024-01-01",
+            "shortDescription": _sentence(rng, 20),
+        }
+        for i in picks
+    ]
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"title": "Synthetic KEV", "count": len(vulnerabilities), "vulnerabilities": vulnerabilities}, f)
@@ -0,0 +1,102 @@
+"""Single entry point for the pipeline scripts.
+
+    python cli.py --help
+    python cli.py export-cve 2023 2024 --sessions 4
+    python cli.py ask "What is the CWE linked with CVE-2024-50801?"
+    python cli.py ask --help
+
+Each command runs one of the existing scripts as if it had been started from
+its own directory (they find ../data relative to it), passing the remaining
+arguments through. Nothing beyond the standard library is imported until a
+command is chosen, so listing commands and rejecting bad ones is instant, and
+a command only loads the drivers, models and clients it uses.
+"""
+import os
+import sys
+import runpy
+import argparse
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+# (group, command, script relative to ROOT, whether the script parses options, help)
+COMMANDS = [
+    ("download", "download-cve", "clients/download_cve_github.py", False, "Download the cvelistV5 archive from GitHub"),
+    ("download", "download-nvd", "clients/download_cve.py", False, "Fetch CVEs from the NVD API"),
+    ("download", "download-cwe", "clients/download_cwe.py", False, "Download the CWE CSV views"),
+    ("download", "download-capec", "clients/download_capec.py", False, "Download the CAPEC CSV views"),
+    ("download", "download-attack", "clients/download_attack_enterprise.py", False, "Download MITRE ATT&CK Enterprise (STIX)"),
+    ("download", "download-kev", "clients/download_kev.py", False, "Download CISA's Known Exploited Vulnerabilities"),
+    ("convert", "convert-cwe", "data_parsers/cwe_csv_to_json.csv.py", False, "Merge the CWE CSVs into cwe_data.json"),
+    ("convert", "convert-capec", "data_parsers/capec_csv_to_json.py", False, "Merge the CAPEC CSVs into capec_data.json"),
+    ("convert", "convert-cpe", "data_parsers/jsonify_cpe.py", False, "Convert the CPE dictionary XML to JSON"),
+    ("import", "extract-cve", "exporters/cve_extractor.py", True, "Extract flat records from cvelistV5 files"),
+    ("import", "export-cve", "exporters/export_cve_to_neo4j.py", True, "Import CVEs, products and metrics"),
+    ("import", "export-cwe", "exporters/export_cwe_to_neo4j.py", True, "Import CWEs and link CVEs to them"),
+    ("import", "export-capec", "exporters/export_capec_to_neo4j.py", False, "Import CAPECs and link them to CWEs and TTPs"),
+    ("import", "export-attack", "exporters/export_attack_to_neo4j.py", False, "Import ATT&CK techniques"),
+    ("import", "export-kev", "exporters/export_kev_to_neo4j.py", False, "Flag CVEs in the KEV catalog"),
+    ("import", "export-cpe", "exporters/export_cpe_to_neo4j.py", False, "Import the CPE dictionary"),
+    ("import", "link-cpe", "exporters/link_products_to_cpe.py", True, "Link Product nodes to CPE nodes"),
+    ("import", "version-index", "exporters/cve_version_index.py", True, "Build or query the affected-version index"),
+    ("import", "attack-chains", "exporters/attack_chains.py", True, "Materialize CVE → CAPEC/TTP shortcut edges"),
+    ("import", "cvss-backfill", "exporters/cvss_vector.py", True, "Decompose CVSS vectors on existing CVE nodes"),
+    ("import", "risk-score", "exporters/risk_scoring.py", True, "Score and index CVE priority in one vectorized pass"),
+    ("import", "snapshot", "exporters/graph_snapshot.py", True, "Export, restore or diff a whole-graph snapshot"),
+    ("vectors", "vectorize", "vectorizer/vectorizer.py", True, "Embed node text and build vector indexes"),
+    ("vectors", "vector-search", "vectorizer/vector_search.py", True, "Top-k search on the Neo4j vector indexes"),
+    ("vectors", "ann", "vectorizer/ann_index.py", True, "Export embeddings and search them offline"),
+    ("llm", "ask", "llm/neo4j_query.py", True, "Answer a question about the graph"),
+    ("llm", "ask-batch", "llm/batch_qa.py", True, "Answer a file of questions concurrently"),
+    ("llm", "serve", "llm/query_service.py", True, "Serve questions over HTTP from warm state"),
+    ("benchmarks", "bench", "benchmarks/run_benchmarks.py", True, "Benchmark pipeline stages on synthetic feeds"),
+    ("benchmarks", "bench-extractor", "benchmarks/bench_cve_extractor.py", True, "Compare CVE extraction strategies"),
+]
+SCRIPTS = {command: script for _, command, script, _, _ in COMMANDS}
+TAKES_OPTIONS = {command: options for _, command, _, options, _ in COMMANDS}
+
+
+def command_list():
+    lines, group = [], None
+    for command_group, command, _, _, help_text in COMMANDS:
+        if command_group != group:
+            group = command_group
+            lines.append(f"\n{group}:")
+        lines.append(f"  {command:<16} {help_text}")
+    return "\n".join(lines)
+
+
+def run_script(script, argv):
+    """Run *script* as ``__main__`` from its own directory with *argv* as its arguments."""
+    path = os.path.join(ROOT, script)
+    directory = os.path.dirname(path)
+    os.chdir(directory)
+    sys.path.insert(0, directory)
+    sys.argv = [path] + list(argv)
+    runpy.run_path(path, run_name="__main__")
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    parser = argparse.ArgumentParser(
+        prog="cli.py",
+        description="Build and query the vulnerability knowledge graph.",
+        epilog="commands:" + command_list() + "\n\nRun 'cli.py <command> --help' for the options of a command.",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("command", choices=SCRIPTS, metavar="command", help="one of the commands below")
+    # Only the command is parsed here; everything after it belongs to the script
+    args = parser.parse_args(argv[:1])
+    script, rest = SCRIPTS[args.command], argv[1:]
+
+    # Scripts without an argument parser would ignore --help and start working
+    if rest and not TAKES_OPTIONS[args.command]:
+        help_text = next(text for _, command, _, _, text in COMMANDS if command == args.command)
+        if rest[0] in ("-h", "--help"):
+            print(f"usage: cli.py {args.command}\n\n{help_text} ({script}); takes no options.")
+            return
+        parser.error(f"{args.command} takes no options")
+    run_script(script, rest)
+
+
+if __name__ == "__main__":
+    main()
@@ -8,7 +8,6 @@ json_url = 'https://raw.githubusercontent.com/mitre-attack/attack-stix-data/mast
 
 # Directory where the JSON file will be saved
 save_dir = '../data/enterprise-attack'
-os.makedirs(save_dir, exist_ok=True)
 
 # Path to save the JSON file
 save_path = os.path.join(save_dir, 'enterprise-attack.json')
@@ -25,7 +24,14 @@ def download_json(url, path):
             file.write(data)
     progress_bar.close()
 
-# Download the JSON file
-download_json(json_url, save_path)
+def main():
+    os.makedirs(save_dir, exist_ok=True)
 
-print(f'Download complete. JSON saved to {save_path}')
+    # Download the JSON file
+    download_json(json_url, save_path)
+
+    print(f'Download complete. JSON saved to {save_path}')
+
+
+if __name__ == '__main__':
+    main()
@@ -14,9 +14,6 @@ zip_urls = [
 # Directory where the ZIP files will be extracted
 extract_dir = '../data/capec'
 
-# Create the directory if it doesn't exist
-os.makedirs(extract_dir, exist_ok=True)
-
 # Function to download a ZIP file with a progress bar
 def download_zip(url):
     response = requests.get(url, stream=True)
@@ -42,9 +39,17 @@ def extract_zip(buffer, extract_to):
             progress_bar.update(1)
         progress_bar.close()
 
-# Download and extract each ZIP file
-for url in zip_urls:
-    zip_buffer, zip_filename = download_zip(url)
-    extract_zip(zip_buffer, extract_dir)
+def main():
+    # Create the directory if it doesn't exist
+    os.makedirs(extract_dir, exist_ok=True)
+
+    # Download and extract each ZIP file
+    for url in zip_urls:
+        zip_buffer, zip_filename = download_zip(url)
+        extract_zip(zip_buffer, extract_dir)
+
+    print('All downloads and extractions are complete.')
+
 
-print('All downloads and extractions are complete.')
+if __name__ == '__main__':
+    main()
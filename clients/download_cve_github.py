@@ -11,9 +11,6 @@ zip_url = 'https://github.com/CVEProject/cvelistV5/archive/refs/heads/main.zip'
 # Directory where the ZIP file will be extracted
 extract_dir = '../data/cve'
 
-# Create the directory if it doesn't exist
-os.makedirs(extract_dir, exist_ok=True)
-
 # Function to download the ZIP file with a progress bar
 def download_zip(url):
     response = requests.get(url, stream=True)
@@ -38,8 +35,16 @@ def extract_zip(buffer, extract_to):
             progress_bar.update(1)
         progress_bar.close()
 
-# Download and extract the ZIP file
-zip_buffer = download_zip(zip_url)
-extract_zip(zip_buffer, extract_dir)
+def main():
+    # Create the directory if it doesn't exist
+    os.makedirs(extract_dir, exist_ok=True)
+
+    # Download and extract the ZIP file
+    zip_buffer = download_zip(zip_url)
+    extract_zip(zip_buffer, extract_dir)
+
+    print('Download and extraction complete.')
+
 
-print('Download and extraction complete.')
+if __name__ == '__main__':
+    main()
@@ -10,9 +10,6 @@ save_dir = "../data/kev"
 json_filename = "known_exploited_vulnerabilities.json"
 save_path = os.path.join(save_dir, json_filename)
 
-# Ensure the directory exists
-os.makedirs(save_dir, exist_ok=True)
-
 # Function to download the JSON file with a progress bar
 def download_json(url, save_path):
     response = requests.get(url, stream=True)
@@ -28,7 +25,15 @@ def download_json(url, save_path):
     progress_bar.close()
 
 
-# Download the JSON file
-download_json(json_url, save_path)
+def main():
+    # Ensure the directory exists
+    os.makedirs(save_dir, exist_ok=True)
+
+    # Download the JSON file
+    download_json(json_url, save_path)
+
+    print(f"Download complete. JSON saved to {save_path}")
+
 
-print(f"Download complete. JSON saved to {save_path}")
+if __name__ == "__main__":
+    main()
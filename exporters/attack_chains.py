@@ -0,0 +1,199 @@
+"""Materialize CVE → CWE → CAPEC → ATT&CK chains as direct shortcut edges.
+
+"Which techniques can exploit this CVE" walks
+CVE-[:HAS_CWE]->CWE<-[:RELATED_TO]-CAPEC-[:USES_TTP]->TTP, which fans out
+badly for common CWEs. This post-import stage precomputes the walk as
+
+    (:CVE)-[:CHAIN_CAPEC {viaCwes}]->(:CAPEC)
+    (:CVE)-[:CHAIN_TTP {viaCwes, viaCapecs}]->(:TTP)
+
+where the properties record the path each shortcut stands for.
+
+Each CVE stores a ``chainSignature``: a hash of its CWE ids together with the
+CAPEC/technique chains of those CWEs. A run recomputes every signature (one
+cheap read), and rewrites the shortcuts only of CVEs whose signature moved,
+i.e. whose CWE links changed or whose CWEs gained or lost CAPECs or
+techniques. Signatures are written last, so an interrupted run is simply
+redone.
+
+Run after the CVE, CWE, CAPEC and ATT&CK exporters:
+
+    python attack_chains.py [--full] [--sessions 4]
+"""
+import os
+import json
+import hashlib
+import argparse
+from collections import defaultdict
+from tqdm import tqdm
+from neo4j import GraphDatabase
+from dotenv import load_dotenv
+
+from parallel_writer import ParallelWriter
+from graph_stamp import mark_graph_changed
+
+# Load environment variables
+load_dotenv()
+NEO4J_USERNAME = os.getenv("NEO4J_USERNAME")
+NEO4J_PASSWORD = os.getenv("NEO4J_PASSWORD")
+
+# Neo4j connection, opened on first use so importing this module has no side effects
+driver = None
+
+
+def get_driver():
+    global driver
+    if driver is None:
+        driver = GraphDatabase.driver("bolt://localhost:7687", auth=(NEO4J_USERNAME, NEO4J_PASSWORD))
+    return driver
+
+
+def fetch_cwe_chains(driver):
+    """Return {cwe id: [(capec id, [technique ids])]}, sorted so it hashes stably."""
+    chains = defaultdict(list)
+    with driver.session() as session:
+        result = session.run(
+            """
+            MATCH (w:CWE)<-[:RELATED_TO]-(p:CAPEC)
+            OPTIONAL MATCH (p)-[:USES_TTP|RELATED_TO]-(t:TTP)
+            RETURN w.id AS cwe, p.id AS capec, collect(DISTINCT t.ttp_id) AS ttps
+            """
+        )
+        for record in result:
+            chains[record["cwe"]].append((record["capec"], sorted(record["ttps"])))
+    return {cwe: sorted(links) for cwe, links in chains.items()}
+
+
+def fetch_cve_cwes(driver):
+    """Yield (cveId, [cwe ids], stored chainSignature) for every CVE."""
+    with driver.session() as session:
+        result = session.run(
+            """
+            MATCH (c:CVE)
+            RETURN c.cveId AS cveId, [(c)-[:HAS_CWE]->(w:CWE) | w.id] AS cwes, c.chainSignature AS signature
+            """
+        )
+        for record in result:
+            yield record["cveId"], record["cwes"], record["signature"]
+
+
+def chain_signature(cwes, chains):
+    """Hash the CWEs of a CVE together with everything they chain to."""
+    payload = [(cwe, chains.get(cwe, [])) for cwe in sorted(set(cwes))]
+    return hashlib.sha1(json.dumps(payload).encode("utf-8")).hexdigest()[:16]
+
+
+def chain_rows(cve_id, cwes, chains):
+    """Return the CHAIN_CAPEC and CHAIN_TTP rows for one CVE, with provenance."""
+    capec_via = defaultdict(set)
+    ttp_via = defaultdict(lambda: (set(), set()))
+    for cwe in set(cwes):
+        for capec, ttps in chains.get(cwe, []):
+            capec_via[capec].add(cwe)
+            for ttp in ttps:
+                ttp_via[ttp][0].add(cwe)
+                ttp_via[ttp][1].add(capec)
+
+    capec_rows = [{"cveId": cve_id, "capec": capec, "cwes": sorted(via)} for capec, via in capec_via.items()]
+    ttp_rows = [
+        {"cveId": cve_id, "ttp": ttp, "cwes": sorted(via_cwes), "capecs": sorted(via_capecs)}
+        for ttp, (via_cwes, via_capecs) in ttp_via.items()
+    ]
+    return capec_rows, ttp_rows
+
+
+def write_batches(driver, query, rows, batch_size=1000, desc="Writing"):
+    with driver.session() as session:
+        for start in tqdm(range(0, len(rows), batch_size), desc=desc, unit="batch"):
+            batch = rows[start:start + batch_size]
+            session.execute_write(lambda tx: tx.run(query, rows=batch).consume())
+
+
+def refresh_attack_chains(driver, full=False, sessions=4, batch_size=1000):
+    """Rewrite the shortcuts of CVEs whose chain signature changed; returns how many."""
+    chains = fetch_cwe_chains(driver)
+    print(f"🔗 {len(chains)} CWEs chain to CAPECs")
+
+    changed, capec_rows, ttp_rows = [], [], []
+    total = 0
+    for cve_id, cwes, stored in tqdm(fetch_cve_cwes(driver), desc="Checking CVEs", unit="cve"):
+        total += 1
+        signature = chain_signature(cwes, chains)
+        if full or signature != stored:
+            changed.append({"cveId": cve_id, "signature": signature})
+            capecs, ttps = chain_rows(cve_id, cwes, chains)
+            capec_rows.extend(capecs)
+            ttp_rows.extend(ttps)
+    print(f"♻️ {len(changed)} of {total} CVEs need new shortcuts")
+    if not changed:
+        return 0
+
+    write_batches(
+        driver,
+        """
+        UNWIND $rows AS row
+        MATCH (c:CVE {cveId: row.cveId})-[old:CHAIN_CAPEC|CHAIN_TTP]->()
+        DELETE old
+        """,
+        changed,
+        batch_size,
+        desc="Removing stale shortcuts",
+    )
+
+    # CAPECs and techniques are hubs, so these go through the lock-aware writer
+    writer = ParallelWriter(driver, sessions=sessions, batch_size=batch_size)
+    writer.write(
+        """
+        UNWIND $rows AS row
+        MATCH (c:CVE {cveId: row.cveId})
+        MATCH (p:CAPEC {id: row.capec})
+        MERGE (c)-[r:CHAIN_CAPEC]->(p)
+        SET r.viaCwes = row.cwes
+        """,
+        capec_rows,
+        lambda row: ("CVE", row["cveId"]),
+        lambda row: ("CAPEC", row["capec"]),
+        desc="CVE → CAPEC shortcuts",
+    )
+    writer.write(
+        """
+        UNWIND $rows AS row
+        MATCH (c:CVE {cveId: row.cveId})
+        MATCH (t:TTP {ttp_id: row.ttp})
+        MERGE (c)-[r:CHAIN_TTP]->(t)
+        SET r.viaCwes = row.cwes, r.viaCapecs = row.capecs
+        """,
+        ttp_rows,
+        lambda row: ("CVE", row["cveId"]),
+        lambda row: ("TTP", row["ttp"]),
+        desc="CVE → TTP shortcuts",
+    )
+
+    write_batches(
+        driver,
+        """
+        UNWIND $rows AS row
+        MATCH (c:CVE {cveId: row.cveId})
+        SET c.chainSignature = row.signature, c.chainRefreshedAt = datetime()
+        """,
+        changed,
+        batch_size,
+        desc="Recording signatures",
+    )
+    return len(changed)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Materialize CVE → CAPEC/TTP attack-chain shortcuts")
+    parser.add_argument("--full", action="store_true", help="Rewrite every CVE, not only changed ones")
+    parser.add_argument("--sessions", type=int, default=4, help="Concurrent write sessions")
+    parser.add_argument("--batch-size", type=int, default=1000, help="Rows per write transaction")
+    args = parser.parse_args()
+
+    driver = get_driver()
+    refreshed = refresh_attack_chains(driver, full=args.full, sessions=args.sessions, batch_size=args.batch_size)
+    if refreshed:
+        mark_graph_changed(driver, "attack-chains")
+    driver.close()
+
+    print("✅ Attack-chain shortcuts are up to date.")
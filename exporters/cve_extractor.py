@@ -0,0 +1,374 @@
+import os
+import json
+import argparse
+from typing import NamedTuple, Optional
+from tqdm import tqdm
+
+try:
+    # orjson parses cvelistV5 files 2-3x faster than the json module
+    from orjson import loads as parse_cve_json
+except ImportError:
+    parse_cve_json = json.loads
+
+
+# --- Flat record types ---
+# Every record carries the CVE id and the container it came from:
+# "cna" or "adp:<shortName>".
+
+class CveRecord(NamedTuple):
+    cveId: str
+    state: Optional[str]
+    assignerOrgId: Optional[str]
+    assignerShortName: Optional[str]
+    dateReserved: Optional[str]
+    datePublished: Optional[str]
+    dateUpdated: Optional[str]
+
+
+class DescriptionRecord(NamedTuple):
+    cveId: str
+    source: str
+    lang: Optional[str]
+    value: Optional[str]
+
+
+class MetricRecord(NamedTuple):
+    cveId: str
+    source: str
+    version: str
+    vectorString: Optional[str]
+    baseScore: Optional[float]
+    baseSeverity: Optional[str]
+
+
+class CweRecord(NamedTuple):
+    cveId: str
+    source: str
+    cweId: Optional[str]
+    description: Optional[str]
+    lang: Optional[str]
+
+
+class AffectedRecord(NamedTuple):
+    cveId: str
+    source: str
+    vendor: str
+    product: str
+    version: str
+    lessThan: Optional[str]
+    lessThanOrEqual: Optional[str]
+    versionType: Optional[str]
+    status: str
+    defaultStatus: Optional[str]
+
+
+class ReferenceRecord(NamedTuple):
+    cveId: str
+    source: str
+    url: Optional[str]
+    name: Optional[str]
+    tags: list
+
+
+# CVSS key in a cvelistV5 metric entry -> CVSS version
+CVSS_VERSIONS = {
+    "cvssV2_0": "2.0",
+    "cvssV3_0": "3.0",
+    "cvssV3_1": "3.1",
+    "cvssV4_0": "4.0",
+}
+
+# Preference order when a single metric is needed for the CVE node
+PREFERRED_CVSS_VERSIONS = ("3.1", "3.0", "4.0", "2.0")
+RANKED_CVSS_KEYS = tuple(
+    enumerate(next(key for key, v in CVSS_VERSIONS.items() if v == version) for version in PREFERRED_CVSS_VERSIONS)
+)
+
+RECORD_TYPES = (CveRecord, DescriptionRecord, MetricRecord, CweRecord, AffectedRecord, ReferenceRecord)
+
+# What reading a record that does not follow the CVE JSON 5 schema raises
+SCHEMA_ERRORS = (KeyError, TypeError, AttributeError)
+
+
+# --- Extraction ---
+
+def summarize_cve(cve_json, rows=None):
+    """Walk one cvelistV5 record once and return the dict used for CVE nodes.
+
+    English descriptions win over other languages, CVSS metrics are picked in
+    PREFERRED_CVSS_VERSIONS order and the first CWE id is kept. "products"
+    holds the affected entries as plain tuples in AffectedRecord layout.
+
+    When *rows* maps each record type to a list, every flat record of the CNA
+    container and every ADP container is also appended to it as a plain tuple
+    in that type's field order; without it, fields the node does not keep are
+    skipped.
+
+    The walk trusts the CVE JSON 5 schema: fields it requires are subscripted
+    and arrays are iterated without type checks, and a record that does not
+    follow it raises ValueError.
+    """
+    meta = cve_json.get("cveMetadata", {})
+    cve_id = meta.get("cveId")
+    if not cve_id:
+        raise ValueError("Missing cveMetadata.cveId")
+
+    date_reserved = meta.get("dateReserved")
+    date_published = meta.get("datePublished")
+    # 'dateUpdated' or 'dateModified' may exist depending on the source
+    date_modified = meta.get("dateUpdated") or meta.get("dateModified")
+    products = []
+    append_product = products.append
+    description = None
+    english = False
+    vector_string = base_score = base_severity = None
+    metric_rank = len(PREFERRED_CVSS_VERSIONS)
+    cwe_id = None
+    if rows is None:
+        descriptions = metrics = cwes = unaffected = references = None
+    else:
+        rows[CveRecord].append(
+            (
+                cve_id,
+                meta.get("state"),
+                meta.get("assignerOrgId"),
+                meta.get("assignerShortName"),
+                date_reserved,
+                date_published,
+                date_modified,
+            )
+        )
+        descriptions = rows[DescriptionRecord]
+        metrics = rows[MetricRecord]
+        cwes = rows[CweRecord]
+        unaffected = []
+        references = rows[ReferenceRecord]
+
+    try:
+        for name, container in cve_json["containers"].items():
+            # "cna" is a single container, "adp" a list of them
+            listed = isinstance(container, list)
+            for item in container if listed else (container,):
+                if not listed:
+                    source = name
+                elif rows is not None or "affected" in item:
+                    # Only rows carry the ADP label, and the node keeps affected rows alone
+                    source = f"{name}:{item['providerMetadata'].get('shortName') or 'unknown'}"
+
+                if descriptions is not None or not english:
+                    for desc in item.get("descriptions", ()):
+                        lang = desc["lang"]
+                        text = desc["value"]
+                        if descriptions is not None:
+                            descriptions.append((cve_id, source, lang, text))
+                        if not english:
+                            if lang.startswith("en"):
+                                english = True
+                                description = text
+                                if descriptions is None:
+                                    break
+                            elif description is None:
+                                description = text
+
+                if metrics is not None or metric_rank:
+                    for entry in item.get("metrics", ()):
+                        if metrics is not None:
+                            for key, cvss in entry.items():
+                                version = CVSS_VERSIONS.get(key)
+                                if version:
+                                    metrics.append(
+                                        (
+                                            cve_id,
+                                            source,
+                                            version,
+                                            cvss["vectorString"],
+                                            cvss["baseScore"],
+                                            # CVSS 2.0 has no severity
+                                            cvss.get("baseSeverity"),
+                                        )
+                                    )
+                        # Only versions preferred over the current pick can replace it
+                        for rank, key in RANKED_CVSS_KEYS:
+                            if rank == metric_rank:
+                                break
+                            cvss = entry.get(key)
+                            if cvss is not None:
+                                metric_rank = rank
+                                vector_string = cvss["vectorString"]
+                                base_score = cvss["baseScore"]
+                                base_severity = cvss.get("baseSeverity")
+                                break
+
+                if cwes is not None or cwe_id is None:
+                    for pt in item.get("problemTypes") or item.get("ProblemTypes") or ():
+                        for desc in pt["descriptions"]:
+                            cwe = desc.get("cweId")
+                            if cwes is not None:
+                                cwes.append((cve_id, source, cwe, desc["description"], desc["lang"]))
+                            if cwe_id is None and cwe:
+                                cwe_id = cwe
+                                if cwes is None:
+                                    break
+                        if cwe_id is not None and cwes is None:
+                            break
+
+                for aff in item.get("affected", ()):
+                    vendor = aff.get("vendor") or ""
+                    product = aff.get("product") or ""
+                    default_status = aff.get("defaultStatus")
+                    versions = aff.get("versions")
+
+                    if not versions:
+                        # No version list: the default status covers every version
+                        if default_status == "affected":
+                            append_product((cve_id, source, vendor, product, "", None, None, None, "affected", default_status))
+                        continue
+
+                    for v in versions:
+                        status = v["status"]
+                        if status == "affected":
+                            append_product(
+                                (
+                                    cve_id,
+                                    source,
+                                    vendor,
+                                    product,
+                                    v["version"],
+                                    v.get("lessThan"),
+                                    v.get("lessThanOrEqual"),
+                                    v.get("versionType"),
+                                    status,
+                                    default_status,
+                                )
+                            )
+                        elif status == "unaffected" and unaffected is not None:
+                            unaffected.append(
+                                (
+                                    cve_id,
+                                    source,
+                                    vendor,
+                                    product,
+                                    v["version"],
+                                    v.get("lessThan"),
+                                    v.get("lessThanOrEqual"),
+                                    v.get("versionType"),
+                                    status,
+                                    default_status,
+                                )
+                            )
+
+                if references is not None:
+                    for ref in item.get("references", ()):
+                        references.append((cve_id, source, ref["url"], ref.get("name"), ref.get("tags") or []))
+    except SCHEMA_ERRORS as e:
+        raise ValueError(f"{cve_id} does not follow the CVE JSON 5 schema: {e!r}") from e
+
+    if rows is not None:
+        # Records keep the unaffected entries too; the node only the affected ones
+        rows[AffectedRecord].extend(products)
+        rows[AffectedRecord].extend(unaffected)
+    return {
+        "cveId": cve_id,
+        "dateReserved": date_reserved,
+        "datePublished": date_published,
+        "dateModified": date_modified,
+        "description": description,
+        "vectorString": vector_string,
+        "baseScore": base_score,
+        "baseSeverity": base_severity,
+        "products": products,
+        "cweId": cwe_id,
+    }
+
+
+_new = tuple.__new__
+
+
+def extract_records(cve_json):
+    """Return every flat record of one cvelistV5 record as typed NamedTuples.
+
+    The list starts with the CveRecord, followed by the description, metric,
+    CWE, affected and reference records of every container.
+    """
+    rows = {record_type: [] for record_type in RECORD_TYPES}
+    summarize_cve(cve_json, rows)
+    records = []
+    for record_type, type_rows in rows.items():
+        records.extend([_new(record_type, row) for row in type_rows])
+    return records
+
+
+# --- File helpers ---
+
+def iter_cve_files(directory, years=None):
+    """Yield cvelistV5 file paths under *directory*, optionally limited to *years*.
+
+    If years is None or contains "all" then all subdirectories are scanned.
+    """
+    if not years or "all" in years:
+        search_dirs = [directory]
+    else:
+        search_dirs = [os.path.join(directory, y) for y in years]
+
+    for search in search_dirs:
+        if not os.path.isdir(search):
+            print(f"⚠️ Directory does not exist: {search}")
+            continue
+        for root, _, files in os.walk(search):
+            for file in files:
+                if file.startswith("CVE-") and file.endswith(".json"):
+                    yield os.path.join(root, file)
+
+
+def load_cve_file(file_path):
+    """Return the CVE record dicts stored in one JSON file."""
+    with open(file_path, "rb") as file:
+        cve_json = parse_cve_json(file.read())
+    if isinstance(cve_json, list):
+        return [item for item in cve_json if isinstance(item, dict)]
+    if isinstance(cve_json, dict):
+        return [cve_json]
+    raise ValueError(f"Unsupported JSON structure: {type(cve_json).__name__}")
+
+
+def export_records(directory, output_dir, years=None):
+    """Walk the corpus once and write one JSON-lines file per record type."""
+    os.makedirs(output_dir, exist_ok=True)
+    outputs = {}
+    try:
+        cve_files = list(iter_cve_files(directory, years))
+        for cve_file in tqdm(cve_files, desc="🧾 Extracting CVE records", unit="file"):
+            try:
+                cve_records = load_cve_file(cve_file)
+            except Exception as e:
+                print(f"[❌] Error reading {cve_file}: {e}")
+                continue
+            for cve_json in cve_records:
+                try:
+                    records = extract_records(cve_json)
+                except ValueError as e:
+                    print(f"[❌] Skipped record in {cve_file}: {e}")
+                    continue
+                for record in records:
+                    name = type(record).__name__
+                    out = outputs.get(name)
+                    if out is None:
+                        out = outputs[name] = open(
+                            os.path.join(output_dir, f"{name}.jsonl"), "w", encoding="utf-8"
+                        )
+                    out.write(json.dumps(record._asdict(), ensure_ascii=False))
+                    out.write("\n")
+    finally:
+        for out in outputs.values():
+            out.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Extract flat records from cvelistV5 JSON files")
+    parser.add_argument("years", nargs="*", help="Years to extract (default: all)")
+    parser.add_argument("--cve-dir", default="../data/cve/cvelistV5-main/cves")
+    parser.add_argument("--output-dir", default="../data/cve/records")
+    args = parser.parse_args()
+
+    export_records(args.cve_dir, args.output_dir, years=args.years)
+    print(f"✅ CVE records written to {args.output_dir}")
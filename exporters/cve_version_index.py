@@ -0,0 +1,216 @@
+import os
+import csv
+import pickle
+import argparse
+from collections import defaultdict
+from tqdm import tqdm
+
+from cve_extractor import AffectedRecord, extract_records, iter_cve_files, load_cve_file
+from cve_versions import product_key, range_bounds, version_key
+
+
+class _IntervalNode:
+    """Node of a centered interval tree over version keys."""
+
+    __slots__ = ("center", "by_low", "by_high", "left", "right")
+
+    def __init__(self, intervals):
+        points = sorted({i[0] for i in intervals} | {i[1] for i in intervals})
+        self.center = points[len(points) // 2]
+
+        here, left, right = [], [], []
+        for interval in intervals:
+            low, high = interval[0], interval[1]
+            if high < self.center:
+                left.append(interval)
+            elif low > self.center:
+                right.append(interval)
+            else:
+                here.append(interval)
+
+        self.by_low = sorted(here, key=lambda i: i[0])
+        self.by_high = sorted(here, key=lambda i: i[1], reverse=True)
+        self.left = _IntervalNode(left) if left else None
+        self.right = _IntervalNode(right) if right else None
+
+    def stab(self, key, out):
+        node = self
+        while node is not None:
+            if key < node.center:
+                for interval in node.by_low:
+                    if interval[0] > key:
+                        break
+                    out.append(interval)
+                node = node.left
+            elif key > node.center:
+                for interval in node.by_high:
+                    if interval[1] < key:
+                        break
+                    if interval[1] > key or interval[2]:
+                        out.append(interval)
+                node = node.right
+            else:
+                for interval in node.by_low:
+                    if interval[1] > key or interval[2]:
+                        out.append(interval)
+                return out
+        return out
+
+
+class VersionIndex:
+    """Interval index of affected version ranges per normalized vendor/product.
+
+    Intervals are ``(low, high, high_inclusive, cve_id, status, exact)`` tuples.
+    A version is affected by a CVE when an exact (single version) entry says so,
+    or else when an affected range or an ``affected`` default status covers it and
+    no unaffected entry does.
+    """
+
+    def __init__(self):
+        self._intervals = defaultdict(list)
+        self._default_affected = defaultdict(set)
+        self._trees = {}
+        # Entries range_bounds rejected: unorderable versions or inverted ranges
+        self.skipped = 0
+
+    def add(self, record):
+        """Add one AffectedRecord."""
+        key = product_key(record.vendor, record.product)
+        if record.defaultStatus == "affected":
+            self._default_affected[key].add(record.cveId)
+        bounds = range_bounds(record.version, record.lessThan, record.lessThanOrEqual, record.versionType)
+        if bounds is None:
+            self.skipped += 1
+            return
+        low, high, inclusive = bounds
+        exact = low == high and record.lessThan is None and record.lessThanOrEqual is None
+        self._intervals[key].append((low, high, inclusive, record.cveId, record.status, exact))
+        self._trees.pop(key, None)
+
+    def add_cve(self, cve_json):
+        """Add every affected/unaffected entry of a CVE 5 record."""
+        for record in extract_records(cve_json):
+            if type(record) is AffectedRecord:
+                self.add(record)
+
+    def build(self):
+        """Build the interval trees for every product."""
+        for key, intervals in self._intervals.items():
+            if key not in self._trees:
+                self._trees[key] = _IntervalNode(intervals)
+        return self
+
+    def match(self, vendor, product, version):
+        """Return the sorted CVE ids affecting vendor/product at *version*."""
+        key = product_key(vendor, product)
+        vkey = version_key(version)
+        if vkey is None:
+            return []
+
+        tree = self._trees.get(key)
+        if tree is None and key in self._intervals:
+            tree = self._trees[key] = _IntervalNode(self._intervals[key])
+
+        hits = tree.stab(vkey, []) if tree is not None else []
+        exact, affected, unaffected = {}, set(), set()
+        for _, _, _, cve_id, status, is_exact in hits:
+            if is_exact:
+                exact[cve_id] = status == "affected" or exact.get(cve_id, False)
+            elif status == "affected":
+                affected.add(cve_id)
+            else:
+                unaffected.add(cve_id)
+
+        result = (affected | (self._default_affected.get(key, set()) - unaffected)) - exact.keys()
+        result.update(cve_id for cve_id, is_affected in exact.items() if is_affected)
+        return sorted(result)
+
+    def match_inventory(self, rows):
+        """Yield (vendor, product, version, cve_id) for each affected inventory row."""
+        cache = {}
+        for vendor, product, version in rows:
+            lookup = (product_key(vendor, product), version)
+            if lookup not in cache:
+                cache[lookup] = self.match(vendor, product, version)
+            for cve_id in cache[lookup]:
+                yield vendor, product, version, cve_id
+
+    def __len__(self):
+        return sum(len(v) for v in self._intervals.values())
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "wb") as f:
+            pickle.dump(
+                {"intervals": dict(self._intervals), "default_affected": dict(self._default_affected)},
+                f,
+                protocol=pickle.HIGHEST_PROTOCOL,
+            )
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            data = pickle.load(f)
+        index = cls()
+        index._intervals.update(data["intervals"])
+        index._default_affected.update(data["default_affected"])
+        return index.build()
+
+
+def build_version_index(directory, years=None):
+    """Build a VersionIndex from the cvelistV5 files under *directory*."""
+    cve_files = list(iter_cve_files(directory, years))
+
+    index = VersionIndex()
+    for cve_file in tqdm(cve_files, desc="📚 Indexing affected versions", unit="file"):
+        try:
+            records = load_cve_file(cve_file)
+        except Exception as e:
+            print(f"[❌] Error reading {cve_file}: {e}")
+            continue
+        for record in records:
+            try:
+                index.add_cve(record)
+            except ValueError as e:
+                print(f"[❌] Skipped record in {cve_file}: {e}")
+    if index.skipped:
+        print(f"⚠️ Skipped {index.skipped} affected entries with unorderable or inverted version ranges")
+    return index.build()
+
+
+def match_inventory_csv(index, inventory_path, output_path):
+    """Match a vendor,product,version CSV against *index* and write the hits."""
+    with open(inventory_path, "r", encoding="utf-8-sig", newline="") as f:
+        rows = [(r.get("vendor", ""), r.get("product", ""), r.get("version", "")) for r in csv.DictReader(f)]
+
+    matches = 0
+    with open(output_path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["vendor", "product", "version", "cveId"])
+        for match in tqdm(index.match_inventory(rows), desc="🔎 Matching inventory", unit="hit"):
+            writer.writerow(match)
+            matches += 1
+    print(f"✅ Matched {len(rows)} inventory rows to {matches} CVE hits in {output_path}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build and query the CVE affected-version interval index")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    build = sub.add_parser("build", help="Build the index from the cvelistV5 corpus")
+    build.add_argument("years", nargs="*", help="Years to index (default: all)")
+    build.add_argument("--cve-dir", default="../data/cve/cvelistV5-main/cves")
+    build.add_argument("--index", default="../data/cve/version_index.pkl")
+
+    match = sub.add_parser("match", help="Match an asset inventory CSV (vendor,product,version)")
+    match.add_argument("inventory")
+    match.add_argument("--output", default="../data/cve/inventory_matches.csv")
+    match.add_argument("--index", default="../data/cve/version_index.pkl")
+
+    args = parser.parse_args()
+    if args.command == "build":
+        version_index = build_version_index(args.cve_dir, years=args.years)
+        version_index.save(args.index)
+        print(f"✅ Indexed {len(version_index)} version entries into {args.index}")
+    else:
+        match_inventory_csv(VersionIndex.load(args.index), args.inventory, args.output)
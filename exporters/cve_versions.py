@@ -0,0 +1,104 @@
+import re
+
+# Pre-release markers sort before the release they belong to (1.0rc1 < 1.0)
+PRERELEASE_TAGS = {"dev", "pre", "preview", "alpha", "a", "beta", "b", "rc", "c"}
+
+# Values CNAs use when a range has no lower or upper bound
+UNBOUNDED_VERSIONS = {"", "*", "-", "0", "n/a", "unspecified", "unknown", "all"}
+
+# Version types whose values cannot be ordered (e.g. commit hashes)
+UNORDERED_VERSION_TYPES = {"git"}
+
+# Sentinel keys below and above every real version key
+MIN_KEY = ()
+MAX_KEY = ((9, ""),)
+
+_VERSION_TOKEN = re.compile(r"\d+|[a-z]+|\*")
+_NAME_SEPARATORS = re.compile(r"[\s\-_.,/:+]+")
+
+
+def normalize_name(value):
+    """Return a case-folded vendor/product name with separators collapsed."""
+    if not value:
+        return ""
+    return _NAME_SEPARATORS.sub("_", str(value).casefold()).strip("_")
+
+
+def product_key(vendor, product):
+    """Return the normalized (vendor, product) lookup key."""
+    return normalize_name(vendor), normalize_name(product)
+
+
+def version_key(version):
+    """Return a sortable key for *version*, or None if it cannot be ordered.
+
+    Numeric parts compare as integers, trailing zero parts are ignored
+    (1.0 == 1.0.0), pre-release tags sort before the release and a trailing
+    ``*`` sorts after every version sharing its prefix (5.4.* > 5.4.999).
+    """
+    if version is None:
+        return None
+    tokens = _VERSION_TOKEN.findall(str(version).strip().lower().lstrip("v"))
+    if not tokens:
+        return None
+
+    parts = []
+    for idx, token in enumerate(tokens):
+        if token == "*":
+            parts.append((9, ""))
+            break
+        if token.isdigit():
+            parts.append((2, int(token)))
+        elif token in PRERELEASE_TAGS and (
+            len(token) > 1 or (idx + 1 < len(tokens) and tokens[idx + 1].isdigit())
+        ):
+            # Single letters only mark a pre-release when numbered (1.0a1, not 1.1.1a)
+            parts.append((0, token))
+        else:
+            parts.append((1, token))
+
+    # Drop zero components that only pad a release number: 1.0 -> 1, 1.0rc1 -> 1rc1
+    key = []
+    for idx, part in enumerate(parts):
+        if part == (2, 0):
+            following = parts[idx + 1:]
+            if all(p == (2, 0) for p in following) or following[0][0] == 0:
+                continue
+        key.append(part)
+    if not key or key[-1] != (9, ""):
+        key.append((1, ""))
+    return tuple(key)
+
+
+def range_bounds(version, less_than=None, less_equal=None, version_type=None):
+    """Return (low, high, high_inclusive) keys for a CVE 5 version entry.
+
+    Entries without an upper bound match their exact version only, unless the
+    version itself is a wildcard. Returns None for unorderable entries and for
+    ranges whose start lies above their end.
+    """
+    if version_type in UNORDERED_VERSION_TYPES:
+        return None
+
+    version = (version or "").strip().lower()
+
+    if less_than is None and less_equal is None:
+        if version in UNBOUNDED_VERSIONS:
+            return MIN_KEY, MAX_KEY, True
+        key = version_key(version)
+        if key is None:
+            return None
+        return key, key, True
+
+    low = MIN_KEY if version in UNBOUNDED_VERSIONS else version_key(version)
+    if less_equal is not None:
+        bound, inclusive = less_equal, True
+    else:
+        bound, inclusive = less_than, False
+    high = MAX_KEY if str(bound).strip() in ("", "*") else version_key(bound)
+    if low is None or high is None:
+        return None
+    # Inverted ranges ("5.0" < 4.0) are CNA data errors; there is no telling which bound is wrong
+    if low > high:
+        return None
+    return low, high, inclusive
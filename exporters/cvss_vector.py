@@ -0,0 +1,197 @@
+"""Decompose CVSS v2, v3.x and v4.0 vector strings into typed CVE properties.
+
+CVE nodes carry the raw ``vectorString`` of their preferred metric, so a
+filter such as AV:N/PR:N/UI:N is a string match over every CVE. Decomposed,
+it is an index seek:
+
+    MATCH (c:CVE) WHERE c.cvssAV = 'NETWORK' AND c.cvssPR = 'NONE' AND c.cvssUI = 'NONE'
+
+Every base metric becomes a ``cvss<Metric>`` property holding the NVD
+enumeration name. Metrics that mean the same thing across versions share a
+property so filters work on mixed corpora: v4's VC/VI/VA (impact on the
+vulnerable system) land on cvssC/cvssI/cvssA. ``cvssVersion`` records the
+version, or "unparsed" when the backfill could not parse the vector, so later
+runs skip it until the CVE is re-imported or ``--full`` retries every vector.
+Properties a vector does not have are set to null, which removes stale values
+when a CVE's preferred metric changes version.
+
+The CVE exporter decomposes vectors on import; run this module to backfill
+CVEs imported before that:
+
+    python cvss_vector.py [--full] [--sessions 4]
+"""
+import os
+import re
+import argparse
+from functools import lru_cache
+from tqdm import tqdm
+from neo4j import GraphDatabase
+from dotenv import load_dotenv
+
+from parallel_writer import ParallelWriter
+from graph_stamp import mark_graph_changed
+
+# Load environment variables
+load_dotenv()
+NEO4J_USERNAME = os.getenv("NEO4J_USERNAME")
+NEO4J_PASSWORD = os.getenv("NEO4J_PASSWORD")
+
+# Neo4j connection, opened on first use so importing this module has no side effects
+driver = None
+
+
+def get_driver():
+    global driver
+    if driver is None:
+        driver = GraphDatabase.driver("bolt://localhost:7687", auth=(NEO4J_USERNAME, NEO4J_PASSWORD))
+    return driver
+
+
+NONE_LOW_HIGH = {"N": "NONE", "L": "LOW", "H": "HIGH"}
+ATTACK_VECTOR = {"N": "NETWORK", "A": "ADJACENT_NETWORK", "L": "LOCAL", "P": "PHYSICAL"}
+LOW_HIGH = {"L": "LOW", "H": "HIGH"}
+
+# Base metric -> (property, value names) per major version
+BASE_METRICS = {
+    "2": {
+        "AV": ("cvssAV", ATTACK_VECTOR),
+        "AC": ("cvssAC", {"L": "LOW", "M": "MEDIUM", "H": "HIGH"}),
+        "Au": ("cvssAu", {"N": "NONE", "S": "SINGLE", "M": "MULTIPLE"}),
+        "C": ("cvssC", {"N": "NONE", "P": "PARTIAL", "C": "COMPLETE"}),
+        "I": ("cvssI", {"N": "NONE", "P": "PARTIAL", "C": "COMPLETE"}),
+        "A": ("cvssA", {"N": "NONE", "P": "PARTIAL", "C": "COMPLETE"}),
+    },
+    "3": {
+        "AV": ("cvssAV", ATTACK_VECTOR),
+        "AC": ("cvssAC", LOW_HIGH),
+        "PR": ("cvssPR", NONE_LOW_HIGH),
+        "UI": ("cvssUI", {"N": "NONE", "R": "REQUIRED"}),
+        "S": ("cvssS", {"U": "UNCHANGED", "C": "CHANGED"}),
+        "C": ("cvssC", NONE_LOW_HIGH),
+        "I": ("cvssI", NONE_LOW_HIGH),
+        "A": ("cvssA", NONE_LOW_HIGH),
+    },
+    "4": {
+        "AV": ("cvssAV", ATTACK_VECTOR),
+        "AC": ("cvssAC", LOW_HIGH),
+        "AT": ("cvssAT", {"N": "NONE", "P": "PRESENT"}),
+        "PR": ("cvssPR", NONE_LOW_HIGH),
+        "UI": ("cvssUI", {"N": "NONE", "P": "PASSIVE", "A": "ACTIVE"}),
+        "VC": ("cvssC", NONE_LOW_HIGH),
+        "VI": ("cvssI", NONE_LOW_HIGH),
+        "VA": ("cvssA", NONE_LOW_HIGH),
+        "SC": ("cvssSC", NONE_LOW_HIGH),
+        "SI": ("cvssSI", NONE_LOW_HIGH),
+        "SA": ("cvssSA", NONE_LOW_HIGH),
+    },
+}
+
+CVSS_PROPERTIES = ["cvssVersion"] + sorted(
+    {prop for metrics in BASE_METRICS.values() for prop, _ in metrics.values()}
+)
+
+# Range indexes for the components filters use most; the composite one serves
+# the common "remote, unauthenticated, no interaction" question
+CVSS_INDEXES = {
+    "cve_cvss_av": ("cvssAV",),
+    "cve_cvss_ac": ("cvssAC",),
+    "cve_cvss_pr": ("cvssPR",),
+    "cve_cvss_ui": ("cvssUI",),
+    "cve_cvss_c": ("cvssC",),
+    "cve_cvss_i": ("cvssI",),
+    "cve_cvss_a": ("cvssA",),
+    "cve_cvss_av_pr_ui": ("cvssAV", "cvssPR", "cvssUI"),
+}
+
+VERSION_PREFIX = re.compile(r"^CVSS:(\d)\.(\d)/")
+EMPTY = dict.fromkeys(CVSS_PROPERTIES)
+# What the backfill records for a vector parse_vector rejects
+UNPARSED = dict(EMPTY, cvssVersion="unparsed")
+
+
+@lru_cache(maxsize=65536)
+def parse_vector(vector):
+    """Return {property: value} for every name in CVSS_PROPERTIES.
+
+    Unknown or malformed vectors give all-null properties; components outside
+    the base metric group (temporal, environmental, supplemental) are ignored.
+    Results are cached and shared (a corpus has few distinct vectors), so do
+    not mutate them.
+    """
+    if not vector:
+        return EMPTY
+    match = VERSION_PREFIX.match(vector)
+    if match:
+        major, version = match.group(1), f"{match.group(1)}.{match.group(2)}"
+        body = vector[match.end():]
+    else:
+        # v2 vectors have no prefix, e.g. AV:N/AC:L/Au:N/C:P/I:P/A:P
+        major, version, body = "2", "2.0", vector.strip("()")
+
+    metrics = BASE_METRICS.get(major)
+    if metrics is None:
+        return EMPTY
+    props = dict(EMPTY, cvssVersion=version)
+    for component in body.split("/"):
+        key, _, value = component.partition(":")
+        if key in metrics:
+            prop, names = metrics[key]
+            if value not in names:
+                return EMPTY
+            props[prop] = names[value]
+    # A vector without AV is not a base vector at all
+    return props if props["cvssAV"] else EMPTY
+
+
+def create_indexes(driver):
+    with driver.session() as session:
+        for name, props in CVSS_INDEXES.items():
+            columns = ", ".join(f"c.{prop}" for prop in props)
+            session.run(f"CREATE INDEX {name} IF NOT EXISTS FOR (c:CVE) ON ({columns})")
+
+
+def backfill(driver, full=False, sessions=4, batch_size=5000):
+    """Decompose the vectors of CVEs that have none decomposed yet (or all with *full*).
+
+    Vectors that do not parse are marked with UNPARSED, so they are reported
+    once rather than on every run.
+    """
+    where = "c.vectorString IS NOT NULL" if full else "c.vectorString IS NOT NULL AND c.cvssVersion IS NULL"
+    rows, unparsed = [], 0
+    with driver.session(fetch_size=10000) as session:
+        result = session.run(f"MATCH (c:CVE) WHERE {where} RETURN c.cveId AS cveId, c.vectorString AS vector")
+        for cve_id, vector in tqdm(result, desc="🧮 Decomposing CVSS vectors", unit="cve"):
+            cvss = parse_vector(vector)
+            if cvss["cvssVersion"] is None:
+                unparsed += 1
+                cvss = UNPARSED
+            rows.append({"cveId": cve_id, "cvss": cvss})
+
+    ParallelWriter(driver, sessions=sessions, batch_size=batch_size).write(
+        """
+        UNWIND $rows AS row
+        MATCH (c:CVE {cveId: row.cveId})
+        SET c += row.cvss
+        """,
+        rows,
+        lambda row: ("CVE", row["cveId"]),
+        desc="📝 Writing CVSS components",
+    )
+    if unparsed:
+        print(f"⚠️ {unparsed} vectors could not be parsed")
+    return len(rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backfill decomposed CVSS components on existing CVE nodes")
+    parser.add_argument("--full", action="store_true", help="Re-decompose every CVE, not only new ones")
+    parser.add_argument("--sessions", type=int, default=4, help="Concurrent write sessions")
+    args = parser.parse_args()
+
+    driver = get_driver()
+    create_indexes(driver)
+    written = backfill(driver, full=args.full, sessions=args.sessions)
+    if written:
+        mark_graph_changed(driver, "cvss")
+    driver.close()
+    print(f"✅ Decomposed CVSS vectors on {written} CVEs.")
@@ -4,19 +4,26 @@ import re
 from neo4j import GraphDatabase
 from dotenv import load_dotenv
 
+from graph_stamp import mark_graph_changed
+
 load_dotenv()
 NEO4J_USERNAME = os.getenv("NEO4J_USERNAME")
 NEO4J_PASSWORD = os.getenv("NEO4J_PASSWORD")
 
-# Neo4j connection
-driver = GraphDatabase.driver(
-    "bolt://localhost:7687", auth=(NEO4J_USERNAME, NEO4J_PASSWORD)
-)
+# Neo4j connection, opened on first use so importing this module has no side effects
+driver = None
+
+
+def get_driver():
+    global driver
+    if driver is None:
+        driver = GraphDatabase.driver("bolt://localhost:7687", auth=(NEO4J_USERNAME, NEO4J_PASSWORD))
+    return driver
 
 
 def create_constraint():
     """Ensure uniqueness of TTP nodes by ttp_id."""
-    with driver.session() as session:
+    with get_driver().session() as session:
         session.run(
             """
             CREATE CONSTRAINT ttp_id_unique IF NOT EXISTS
@@ -59,7 +66,7 @@ def import_attack_ttps(json_path: str):
     with open(json_path, "r", encoding="utf-8") as f:
         data = json.load(f)
 
-    with driver.session() as session:
+    with get_driver().session() as session:
         for obj in data.get("objects", []):
             if obj.get("type") != "attack-pattern":
                 continue
@@ -95,7 +102,7 @@ def import_attack_ttps(json_path: str):
 
 def link_ttps_to_capecs():
     """Create relationships between TTP and CAPEC nodes using taxonomy mappings."""
-    with driver.session() as session:
+    with get_driver().session() as session:
         result = session.run("MATCH (t:TTP) RETURN t.ttp_id AS id")
         for record in result:
             ttp_id = record["id"]
@@ -116,6 +123,7 @@ def main():
     create_constraint()
     import_attack_ttps(json_path)
     link_ttps_to_capecs()
+    mark_graph_changed(get_driver(), "attack")
     print("TTP import complete.")
 
 
@@ -5,18 +5,26 @@ from tqdm import tqdm
 from neo4j import GraphDatabase
 from dotenv import load_dotenv
 
+from parallel_writer import ParallelWriter
+from graph_stamp import mark_graph_changed
+
 # Load environment variables
 load_dotenv()
 NEO4J_USERNAME = os.getenv("NEO4J_USERNAME")
 NEO4J_PASSWORD = os.getenv("NEO4J_PASSWORD")
-# Neo4j connection
-driver = GraphDatabase.driver(
-    "bolt://localhost:7687", auth=(NEO4J_USERNAME, NEO4J_PASSWORD)
-)
+# Neo4j connection, opened on first use so importing this module has no side effects
+driver = None
+
+
+def get_driver():
+    global driver
+    if driver is None:
+        driver = GraphDatabase.driver("bolt://localhost:7687", auth=(NEO4J_USERNAME, NEO4J_PASSWORD))
+    return driver
 
 # Ensure CAPEC node uniqueness
 def create_constraint():
-    with driver.session() as session:
+    with get_driver().session() as session:
         session.run(
             """
             CREATE CONSTRAINT capec_id_unique IF NOT EXISTS
@@ -92,18 +100,6 @@ def create_capec_relationships(tx, entry):
     capec_raw_id = entry.get("ID") or entry.get("'ID")
     capec_id = f"CAPEC-{capec_raw_id}"
 
-    # Link to CWE nodes
-    for cwe_id in clean_related_weaknesses(entry.get("Related Weaknesses", "")):
-        result = tx.run("MATCH (w:CWE {id: $cwe_id}) RETURN w", cwe_id=cwe_id)
-        if result.single():
-            tx.run("""
-                MATCH (c:CAPEC {id: $capec_id})
-                MATCH (w:CWE {id: $cwe_id})
-                MERGE (c)-[:RELATED_TO]->(w)
-            """, capec_id=capec_id, cwe_id=cwe_id)
-        else:
-            print(f"[⚠️] Missing CWE {cwe_id} for {capec_id}")
-
     # Link to other CAPECs
     for related_id, rel_type in extract_capec_relationships(entry.get("Related Attack Patterns", "")):
         result = tx.run("MATCH (r:CAPEC {id: $related_id}) RETURN r", related_id=related_id)
@@ -121,16 +117,45 @@ def create_capec_relationships(tx, entry):
         else:
             print(f"[⚠️] Missing CAPEC {related_id} ({rel_type}) for {capec_id}")
 
+# Link to CWE nodes; many CAPECs share the same CWEs, so these edges go
+# through a ParallelWriter instead of one transaction per entry
+def link_capecs_to_cwes(capec_entries, sessions=4):
+    with get_driver().session() as session:
+        known_cwes = {record["id"] for record in session.run("MATCH (w:CWE) RETURN w.id AS id")}
+
+    rows = []
+    for entry in capec_entries:
+        capec_raw_id = entry.get("ID") or entry.get("'ID")
+        capec_id = f"CAPEC-{capec_raw_id}"
+        for cwe_id in clean_related_weaknesses(entry.get("Related Weaknesses", "")):
+            if cwe_id in known_cwes:
+                rows.append({"capec_id": capec_id, "cwe_id": cwe_id})
+            else:
+                print(f"[⚠️] Missing CWE {cwe_id} for {capec_id}")
+
+    ParallelWriter(get_driver(), sessions=sessions).write(
+        """
+        UNWIND $rows AS row
+        MATCH (c:CAPEC {id: row.capec_id})
+        MATCH (w:CWE {id: row.cwe_id})
+        MERGE (c)-[:RELATED_TO]->(w)
+        """,
+        rows,
+        lambda row: ("CAPEC", row["capec_id"]),
+        lambda row: ("CWE", row["cwe_id"]),
+        desc="🔗 Linking CAPECs to CWEs",
+    )
+
 # --- Combined Loader ---
 
-def load_capec_data(file_path):
+def load_capec_data(file_path, sessions=4):
     with open(file_path, "r", encoding="utf-8") as f:
         capec_entries = json.load(f)
 
     print(f"📦 Total CAPEC entries: {len(capec_entries)}")
 
     # Phase 1: create nodes
-    with driver.session() as session:
+    with get_driver().session() as session:
         for entry in tqdm(capec_entries, desc="🧱 Creating CAPEC nodes", unit="entry"):
             try:
                 session.execute_write(create_capec_node, entry)
@@ -139,7 +164,8 @@ def load_capec_data(file_path):
                 print(f"[❌] Error creating CAPEC-{capec_id}: {e}")
 
     # Phase 2: create relationships
-    with driver.session() as session:
+    link_capecs_to_cwes(capec_entries, sessions=sessions)
+    with get_driver().session() as session:
         for entry in tqdm(capec_entries, desc="🔗 Creating CAPEC relationships", unit="entry"):
             try:
                 session.execute_write(create_capec_relationships, entry)
@@ -173,7 +199,7 @@ def link_capecs_to_ttps_via_taxonomy(file_path):
     with open(file_path, "r", encoding="utf-8") as f:
         capec_entries = json.load(f)
 
-    with driver.session() as session:
+    with get_driver().session() as session:
         for entry in tqdm(capec_entries, desc="📎 Linking CAPECs via Taxonomy", unit="capec"):
             capec_raw_id = entry.get("ID") or entry.get("'ID")
             capec_id = f"CAPEC-{capec_raw_id}"
@@ -187,8 +213,10 @@ def link_capecs_to_ttps_via_taxonomy(file_path):
 
 if __name__ == "__main__":
     path_to_capec = "../data/capec/capec_data.json"
+    driver = get_driver()
     create_constraint()
     load_capec_data(path_to_capec)
     link_capecs_to_ttps_via_taxonomy(path_to_capec)
+    mark_graph_changed(driver, "capec")
     print("✅ CAPEC → TTP linking via Taxonomy complete.")
     print("✅ CAPEC import and relationship linking completed.")
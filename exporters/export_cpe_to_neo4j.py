@@ -5,6 +5,9 @@ from tqdm import tqdm
 from neo4j import GraphDatabase, exceptions
 
 from dotenv import load_dotenv
+
+from graph_stamp import mark_graph_changed
+
 # Load environment variables
 load_dotenv()
 NEO4J_USERNAME = os.getenv("NEO4J_USERNAME")
@@ -16,16 +19,19 @@ log_dir = '../.log'
 log_file = 'import_errors.log'
 log_path = os.path.join(log_dir, log_file)
 
-# Create the log directory if it doesn't exist
-os.makedirs(log_dir, exist_ok=True)
 
-# Set up logging to file
-logging.basicConfig(
-    filename=log_path,
-    filemode='a',  # Append mode
-    level=logging.ERROR,
-    format='%(asctime)s - %(levelname)s - %(message)s'
-)
+def setup_logging():
+    """Log import errors to the log file; called when run as a script, not on import."""
+    # Create the log directory if it doesn't exist
+    os.makedirs(log_dir, exist_ok=True)
+
+    # Set up logging to file
+    logging.basicConfig(
+        filename=log_path,
+        filemode='a',  # Append mode
+        level=logging.ERROR,
+        format='%(asctime)s - %(levelname)s - %(message)s'
+    )
 
 def create_cpe_node(tx, cpe_item):
     query = """
@@ -77,10 +83,12 @@ def import_cpe_data(file_path, uri, user, password):
                 print(error_message)
                 logging.error(error_message)
 
+    mark_graph_changed(driver, "cpe")
     driver.close()
 
 if __name__ == "__main__":
     file_path = '../data/cpe/cpe_dictionary.json'
     uri = "bolt://localhost:7687"  # Update if your Neo4j instance is hosted elsewhere
 
+    setup_logging()
     import_cpe_data(file_path, uri, NEO4J_USERNAME, NEO4J_PASSWORD)
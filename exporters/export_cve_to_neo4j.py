@@ -5,6 +5,10 @@ from tqdm import tqdm
 from neo4j import GraphDatabase
 import argparse
 
+from cve_extractor import AffectedRecord, iter_cve_files, load_cve_file, summarize_cve
+from cvss_vector import create_indexes, parse_vector
+from parallel_writer import ParallelWriter
+from graph_stamp import mark_graph_changed
 from dotenv import load_dotenv
 # Load environment variables
 load_dotenv()
@@ -17,14 +21,17 @@ log_dir = '../.log'
 log_file = 'cve_import_errors.log'
 log_path = os.path.join(log_dir, log_file)
 
-os.makedirs(log_dir, exist_ok=True)
 
-logging.basicConfig(
-    filename=log_path,
-    filemode='a',
-    level=logging.ERROR,
-    format='%(asctime)s - %(levelname)s - %(message)s'
-)
+def setup_logging():
+    """Log import errors to the log file; called when run as a script, not on import."""
+    os.makedirs(log_dir, exist_ok=True)
+
+    logging.basicConfig(
+        filename=log_path,
+        filemode='a',
+        level=logging.ERROR,
+        format='%(asctime)s - %(levelname)s - %(message)s'
+    )
 
 # --- Neo4j functions ---
 
@@ -41,23 +48,8 @@ def create_constraint(driver):
 
 def import_cve_file(file_path, driver):
     try:
-        #print(f"Reading file: {file_path}")
-        with open(file_path, 'r') as file:
-            cve_json = json.load(file)
-
-        #print(f"Top-level JSON type: {type(cve_json).__name__}")
-
-        if isinstance(cve_json, list):
-            for idx, item in enumerate(cve_json):
-                #print(f"Processing item {idx} in list")
-                if isinstance(item, dict):
-                    process_cve(item, driver)
-                else:
-                    print(f"⚠️ Skipped non-dict item in list: {item}")
-        elif isinstance(cve_json, dict):
+        for cve_json in load_cve_file(file_path):
             process_cve(cve_json, driver)
-        else:
-            print(f"⚠️ Unsupported JSON structure: {type(cve_json).__name__}")
 
     except Exception as e:
         error_message = f"❌ Error processing file {file_path}: {e}"
@@ -67,105 +59,7 @@ def import_cve_file(file_path, driver):
 def process_cve(cve_json, driver):
     """Extract relevant information from a CVE JSON blob and create the node."""
     try:
-        meta = cve_json.get("cveMetadata", {})
-        cve_id = meta.get("cveId")
-        if not cve_id:
-            raise ValueError("Missing cveMetadata.cveId")
-
-        data = {
-            "cveId": cve_id,
-            "dateReserved": meta.get("dateReserved"),
-            "datePublished": meta.get("datePublished"),
-            # 'dateUpdated' or 'dateModified' may exist depending on the source
-            "dateModified": meta.get("dateUpdated") or meta.get("dateModified"),
-            "description": None,
-            "vectorString": None,
-            "baseScore": None,
-            "baseSeverity": None,
-            "products": [],
-            "cweId": None,
-        }
-
-        containers = cve_json.get("containers", {})
-        for container in containers.values():
-            if isinstance(container, dict):
-                container_list = [container]
-            elif isinstance(container, list):
-                container_list = container
-            else:
-                continue
-            for item in container_list:
-                if not isinstance(item, dict):
-                    continue
-                if data["cweId"] is None:
-                    problems = item.get("problemTypes") or item.get("ProblemTypes")
-                    if isinstance(problems, list):
-                        for pt in problems:
-                            if not isinstance(pt, dict):
-                                continue
-                            descs = pt.get("descriptions")
-                            if isinstance(descs, list):
-                                for desc in descs:
-                                    if isinstance(desc, dict):
-                                        cwe = desc.get("cweId")
-                                        if cwe:
-                                            data["cweId"] = cwe
-                                            break
-                                if data["cweId"]:
-                                    break
-                            if data["cweId"]:
-                                break
-                if data["description"] is None:
-                    descs = item.get("descriptions")
-                    if isinstance(descs, list) and descs:
-                        data["description"] = descs[0].get("value")
-                if data["vectorString"] is None:
-                    metrics = item.get("metrics")
-                    if isinstance(metrics, list) and metrics:
-                        first_metric = metrics[0]
-                        cvss = (
-                            first_metric.get("cvssV3_1")
-                            or first_metric.get("cvssV3_0")
-                            or first_metric
-                        )
-                        if isinstance(cvss, dict):
-                            data["vectorString"] = cvss.get("vectorString")
-                            data["baseScore"] = cvss.get("baseScore")
-                            data["baseSeverity"] = cvss.get("baseSeverity")
-                affected = item.get("affected")
-                if isinstance(affected, list):
-                    for aff in affected:
-                        if not isinstance(aff, dict):
-                            continue
-                        vendor = aff.get("vendor") or ""
-                        product = aff.get("product") or ""
-                        versions = aff.get("versions", [])
-                        if not isinstance(versions, list):
-                            continue
-                        for v in versions:
-                            if (
-                                isinstance(v, dict)
-                                and v.get("status") == "affected"
-                            ):
-                                data["products"].append(
-                                    {
-                                        "vendor": vendor,
-                                        "product": product,
-                                        "version": v.get("version") or "",
-                                    }
-                                )
-                if (
-                    data["description"]
-                    and data["vectorString"]
-                    and data["cweId"] is not None
-                ):
-                    break
-            if (
-                data["description"]
-                and data["vectorString"]
-                and data["cweId"] is not None
-            ):
-                break
+        data = summarize_cve(cve_json)
 
         with driver.session() as session:
             session.execute_write(create_cve_node, data)
@@ -186,7 +80,8 @@ def create_cve_node(tx, data):
         c.description = $description,
         c.vectorString = $vectorString,
         c.baseScore = $baseScore,
-        c.baseSeverity = $baseSeverity"""
+        c.baseSeverity = $baseSeverity,
+        c += $cvss"""
     params = {
         "cveId": data.get("cveId"),
         "dateReserved": data.get("dateReserved"),
@@ -196,23 +91,35 @@ def create_cve_node(tx, data):
         "vectorString": data.get("vectorString"),
         "baseScore": data.get("baseScore"),
         "baseSeverity": data.get("baseSeverity"),
+        "cvss": parse_vector(data.get("vectorString")),
     }
     if data.get("cweId"):
         query += ",\n        c.cweId = $cweId"
         params["cweId"] = data.get("cweId")
     tx.run(query, **params)
 
-    for prod in data.get("products", []):
+    for prod in map(AffectedRecord._make, data.get("products", [])):
         tx.run(
             """
             MERGE (p:Product {vendor: $vendor, product: $product, version: $version})
             WITH p
             MATCH (c:CVE {cveId: $cveId})
-            MERGE (c)-[:AFFECTS]->(p)
+            MERGE (c)-[r:AFFECTS {range: coalesce($lessThan, '') + '|' + coalesce($lessThanOrEqual, '') + '|' + coalesce($versionType, '')}]->(p)
+            SET r.lessThan = $lessThan,
+                r.lessThanOrEqual = $lessThanOrEqual,
+                r.versionType = $versionType,
+                r.defaultStatus = $defaultStatus
+            WITH c, p
+            OPTIONAL MATCH (c)-[legacy:AFFECTS]->(p) WHERE legacy.range IS NULL
+            DELETE legacy
             """,
-            vendor=prod.get("vendor") or "",
-            product=prod.get("product"),
-            version=prod.get("version") or "",
+            vendor=prod.vendor,
+            product=prod.product,
+            version=prod.version,
+            lessThan=prod.lessThan,
+            lessThanOrEqual=prod.lessThanOrEqual,
+            versionType=prod.versionType,
+            defaultStatus=prod.defaultStatus,
             cveId=data.get("cveId"),
         )
 
@@ -222,23 +129,8 @@ def import_cve_data(directory, driver, years=None):
 
     If years is None or contains "all" then all subdirectories are scanned.
     """
-    cve_files = []
-
-    if not years or "all" in years:
-        search_dirs = [directory]
-    else:
-        search_dirs = [os.path.join(directory, y) for y in years]
-
-    for search in search_dirs:
-        print(f"🔍 Scanning directory: {search}")
-        if not os.path.isdir(search):
-            print(f"⚠️ Directory does not exist: {search}")
-            continue
-        for root, _, files in os.walk(search):
-            for file in files:
-                if file.startswith("CVE-") and file.endswith(".json"):
-                    full_path = os.path.join(root, file)
-                    cve_files.append(full_path)
+    print(f"🔍 Scanning directory: {directory}")
+    cve_files = list(iter_cve_files(directory, years))
 
     if not cve_files:
         print("⚠️ No CVE files found. Check directory structure or path.")
@@ -253,6 +145,90 @@ def import_cve_data(directory, driver, years=None):
         except Exception as e:
             print(f"[❌] Error importing {cve_file}: {e}")
 
+# --- Parallel batched import ---
+
+CVE_NODES_QUERY = """
+UNWIND $rows AS row
+MERGE (c:CVE {cveId: row.cveId})
+SET c.dateReserved = row.dateReserved,
+    c.datePublished = row.datePublished,
+    c.dateModified = row.dateModified,
+    c.description = row.description,
+    c.vectorString = row.vectorString,
+    c.baseScore = row.baseScore,
+    c.baseSeverity = row.baseSeverity,
+    c += row.cvss,
+    c.cweId = coalesce(row.cweId, c.cweId)
+"""
+
+# One product often has several ranges starting at the same version (e.g.
+# "0" < 3.2 and "0" < 4.14.5), so the range is part of the edge's identity.
+# Edges written before it was are replaced by the keyed ones.
+# Rows are the AffectedRecord-layout tuples of summarize_cve's "products".
+AFFECTS_QUERY = """
+UNWIND $rows AS row
+WITH row[0] AS cveId, row[2] AS vendor, row[3] AS product, row[4] AS version,
+     row[5] AS lessThan, row[6] AS lessThanOrEqual, row[7] AS versionType, row[9] AS defaultStatus
+MERGE (p:Product {vendor: vendor, product: product, version: version})
+WITH p, cveId, lessThan, lessThanOrEqual, versionType, defaultStatus
+MATCH (c:CVE {cveId: cveId})
+MERGE (c)-[r:AFFECTS {range: coalesce(lessThan, '') + '|' + coalesce(lessThanOrEqual, '') + '|' + coalesce(versionType, '')}]->(p)
+SET r.lessThan = lessThan,
+    r.lessThanOrEqual = lessThanOrEqual,
+    r.versionType = versionType,
+    r.defaultStatus = defaultStatus
+WITH c, p
+OPTIONAL MATCH (c)-[legacy:AFFECTS]->(p) WHERE legacy.range IS NULL
+DELETE legacy
+"""
+
+
+def cve_key(row):
+    return "CVE", row["cveId"]
+
+
+def affected_cve_key(row):
+    return "CVE", row[0]
+
+
+def product_key(row):
+    return "Product", row[2], row[3], row[4]
+
+
+def import_cve_data_parallel(directory, driver, years=None, sessions=4, chunk_size=20000):
+    """Import CVE files in UNWIND batches spread over concurrent sessions.
+
+    Files are extracted in chunks of *chunk_size*; each chunk's CVE nodes and
+    AFFECTS edges are written with a ParallelWriter so that writes touching the
+    same CVE or Product never run on two sessions at once.
+    """
+    print(f"🔍 Scanning directory: {directory}")
+    cve_files = list(iter_cve_files(directory, years))
+    if not cve_files:
+        print("⚠️ No CVE files found. Check directory structure or path.")
+        return
+
+    print(f"✅ Found {len(cve_files)} CVE JSON files")
+    writer = ParallelWriter(driver, sessions=sessions)
+
+    for start in range(0, len(cve_files), chunk_size):
+        nodes, products = [], []
+        chunk = cve_files[start:start + chunk_size]
+        for cve_file in tqdm(chunk, desc="🧾 Extracting CVE files", unit="file"):
+            try:
+                for cve_json in load_cve_file(cve_file):
+                    data = summarize_cve(cve_json)
+                    products.extend(data.pop("products"))
+                    data["cvss"] = parse_vector(data["vectorString"])
+                    nodes.append(data)
+            except Exception as e:
+                error_message = f"❌ Error processing file {cve_file}: {e}"
+                print(error_message)
+                logging.error(error_message)
+
+        writer.write(CVE_NODES_QUERY, nodes, cve_key, desc="📦 Writing CVE nodes")
+        writer.write(AFFECTS_QUERY, products, affected_cve_key, product_key, desc="🔗 Writing AFFECTS edges")
+
 # --- Main ---
 
 if __name__ == "__main__":
@@ -262,16 +238,28 @@ if __name__ == "__main__":
         nargs="*",
         help="Years of CVEs to import (e.g. 2020 2021). Use 'all' or no argument to import everything.",
     )
+    parser.add_argument(
+        "--sessions",
+        type=int,
+        default=1,
+        help="Concurrent write sessions. Values above 1 switch to the batched parallel importer.",
+    )
     args = parser.parse_args()
 
     cve_directory = "../data/cve/cvelistV5-main/cves"
     uri = "bolt://localhost:7687"
 
+    setup_logging()
     driver = GraphDatabase.driver(uri, auth=(NEO4J_USERNAME, NEO4J_PASSWORD))
 
     create_constraint(driver)
-    import_cve_data(cve_directory, driver, years=args.years)
+    create_indexes(driver)
+    if args.sessions > 1:
+        import_cve_data_parallel(cve_directory, driver, years=args.years, sessions=args.sessions)
+    else:
+        import_cve_data(cve_directory, driver, years=args.years)
 
+    mark_graph_changed(driver, "cve")
     driver.close()
 
     print("✅ CVE import completed successfully.")
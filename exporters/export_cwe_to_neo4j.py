@@ -1,22 +1,27 @@
 import os
 import json
 import logging
+import argparse
 from tqdm import tqdm
 from neo4j import GraphDatabase
 
-# Setup logging
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(levelname)s - %(message)s"
-)
+from parallel_writer import ParallelWriter
+from graph_stamp import mark_graph_changed
 
 from dotenv import load_dotenv
 # Load environment variables
 load_dotenv()
 NEO4J_USERNAME = os.getenv("NEO4J_USERNAME")
 NEO4J_PASSWORD = os.getenv("NEO4J_PASSWORD")
-# Neo4j connection
-driver = GraphDatabase.driver("bolt://localhost:7687", auth=(NEO4J_USERNAME, NEO4J_PASSWORD))
+# Neo4j connection, opened on first use so importing this module has no side effects
+driver = None
+
+
+def get_driver():
+    global driver
+    if driver is None:
+        driver = GraphDatabase.driver("bolt://localhost:7687", auth=(NEO4J_USERNAME, NEO4J_PASSWORD))
+    return driver
 
 
 def parse_delimited_list(value: str, numeric: bool = False):
@@ -40,7 +45,7 @@ def parse_delimited_list(value: str, numeric: bool = False):
 
 def create_constraint():
     """Ensure uniqueness of CWE nodes by id."""
-    with driver.session() as session:
+    with get_driver().session() as session:
         session.run(
             """
             CREATE CONSTRAINT cwe_id_unique IF NOT EXISTS
@@ -55,7 +60,7 @@ def import_cwe_data(cwe_json_path: str):
     with open(cwe_json_path, "r", encoding="utf-8") as f:
         cwe_list = json.load(f)
 
-    with driver.session() as session:
+    with get_driver().session() as session:
         for cwe in tqdm(cwe_list, desc="Importing CWEs"):
             cwe_id = f"CWE-{cwe.get('CWE-ID')}"
             props = {
@@ -91,25 +96,46 @@ def import_cwe_data(cwe_json_path: str):
                 cwe_id=cwe_id,
             )
 
-            # Link to CVE nodes where cweId matches
-            session.run(
-                """
-                MATCH (cve:CVE {cweId: $cwe_id})
-                MATCH (cwe:CWE {id: $cwe_id})
-                MERGE (cve)-[:HAS_CWE]->(cwe)
-                """,
-                cwe_id=cwe_id,
-            )
-
     logging.info("✅ CWE import completed.")
 
+
+def link_cves_to_cwes(sessions: int = 4):
+    """Link CVE nodes to CWE nodes where cweId matches.
+
+    Common CWEs are hubs for thousands of CVEs, so the edges are written with a
+    ParallelWriter that never lets two sessions MERGE onto the same CWE.
+    """
+    logging.info("Linking CVEs to CWEs")
+    with get_driver().session() as session:
+        result = session.run(
+            """
+            MATCH (cve:CVE) WHERE cve.cweId IS NOT NULL
+            RETURN cve.cveId AS cveId, cve.cweId AS cweId
+            """
+        )
+        rows = [record.data() for record in result]
+
+    ParallelWriter(get_driver(), sessions=sessions).write(
+        """
+        UNWIND $rows AS row
+        MATCH (cve:CVE {cveId: row.cveId})
+        MATCH (cwe:CWE {id: row.cweId})
+        MERGE (cve)-[:HAS_CWE]->(cwe)
+        """,
+        rows,
+        lambda row: ("CVE", row["cveId"]),
+        lambda row: ("CWE", row["cweId"]),
+        desc="Linking CVEs to CWEs",
+    )
+    logging.info("✅ CVE → CWE relationships created.")
+
 def create_cwe_relationships(cwe_json_path: str):
     logging.info(f"Creating CWE relationships from: {cwe_json_path}")
 
     with open(cwe_json_path, "r", encoding="utf-8") as f:
         cwe_list = json.load(f)
 
-    with driver.session() as session:
+    with get_driver().session() as session:
         for cwe in tqdm(cwe_list, desc="Linking Related CWEs"):
             source_id = f"CWE-{cwe.get('CWE-ID')}"
             related_raw = cwe.get("Related Weaknesses", "")
@@ -134,6 +160,16 @@ def create_cwe_relationships(cwe_json_path: str):
     logging.info("✅ Related CWE relationships created.")
 
 def main():
+    parser = argparse.ArgumentParser(description="Import CWE data into Neo4j")
+    parser.add_argument("--sessions", type=int, default=4, help="Concurrent sessions for CVE → CWE linking")
+    args = parser.parse_args()
+
+    # Setup logging
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(levelname)s - %(message)s"
+    )
+
     cwe_json_path = os.path.join("..", "data", "cwe", "cwe_data.json")
 
     if not os.path.exists(cwe_json_path):
@@ -142,7 +178,9 @@ def main():
 
     create_constraint()
     import_cwe_data(cwe_json_path)
+    link_cves_to_cwes(sessions=args.sessions)
     create_cwe_relationships(cwe_json_path)
+    mark_graph_changed(get_driver(), "cwe")
 
 
 if __name__ == "__main__":
@@ -4,15 +4,22 @@ from neo4j import GraphDatabase
 from tqdm import tqdm
 from dotenv import load_dotenv
 
+from graph_stamp import mark_graph_changed
+
 # Load environment variables for Neo4j credentials
 load_dotenv()
 NEO4J_USERNAME = os.getenv("NEO4J_USERNAME")
 NEO4J_PASSWORD = os.getenv("NEO4J_PASSWORD")
 
-# Neo4j connection
-driver = GraphDatabase.driver(
-    "bolt://localhost:7687", auth=(NEO4J_USERNAME, NEO4J_PASSWORD)
-)
+# Neo4j connection, opened on first use so importing this module has no side effects
+driver = None
+
+
+def get_driver():
+    global driver
+    if driver is None:
+        driver = GraphDatabase.driver("bolt://localhost:7687", auth=(NEO4J_USERNAME, NEO4J_PASSWORD))
+    return driver
 
 
 def mark_all_cves(tx):
@@ -39,12 +46,14 @@ def update_kev_flags(file_path: str):
         if entry.get("cveID")
     ]
 
-    with driver.session() as session:
+    with get_driver().session() as session:
         session.write_transaction(mark_all_cves)
         for cve_id in tqdm(kev_cves, desc="\U0001F504 Updating CVEs", unit="cve"):
             session.write_transaction(mark_exploited, cve_id)
 
 
 if __name__ == "__main__":
+    driver = get_driver()
     update_kev_flags("../data/kev/known_exploited_vulnerabilities.json")
+    mark_graph_changed(driver, "kev")
     print("\u2705 KEV exploited flags updated.")
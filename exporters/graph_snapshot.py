@@ -0,0 +1,493 @@
+"""Export the whole graph to a snapshot directory, restore it, or diff two snapshots.
+
+Rebuilding a graph from the feeds means every download, parser, exporter and
+the vectorizer. A snapshot captures the result instead:
+
+    manifest.json                    counts, unique keys, schema, graph version
+    nodes/<Label>.jsonl.gz           {"sid", "labels", "props"} per node, by first label
+    relationships/<TYPE>.jsonl.gz    [start sid, end sid, props] per relationship
+    embeddings/<Label>.<prop>.npy    float32 ``embedding`` or int8 ``embedding_int8`` rows,
+                                     with <Label>.<prop>.sids.npy (and .scales.npy for int8)
+
+``sid`` is a snapshot-local node number. Embeddings are kept out of the JSON
+files as NumPy matrices, which is where most of the bytes are. Temporal
+values are tagged in JSON so they come back as Neo4j temporals.
+
+``export`` reads everything in one read transaction. Neo4j only isolates it
+at read-committed, so relationships or embeddings of nodes created after
+the node pass are skipped and counted as ``dangling`` in the manifest.
+
+``restore`` bulk-loads a snapshot into an empty database: nodes and
+relationships in UNWIND batches over concurrent sessions (matched through a
+temporary indexed ``_Snapshot`` label), then embeddings, then the
+constraints and indexes (vector indexes included) recorded at export time.
+
+``diff`` compares two snapshots without a database. Nodes are identified by
+their label's unique key, or by their content when the label has none;
+relationships by their type and end nodes, so a property change on one is
+reported as changed rather than as one added and one removed.
+
+Usage (from the exporters directory):
+
+    python graph_snapshot.py export ../data/snapshots/2026-10-19
+    python graph_snapshot.py restore ../data/snapshots/2026-10-19 --sessions 8
+    python graph_snapshot.py diff ../data/snapshots/2026-10-01 ../data/snapshots/2026-10-19
+"""
+import os
+import sys
+import gzip
+import json
+import hashlib
+import argparse
+from collections import Counter, defaultdict
+from datetime import datetime, timezone
+import numpy as np
+from tqdm import tqdm
+from dotenv import load_dotenv
+
+from parallel_writer import ParallelWriter
+from graph_stamp import STAMP_LABEL, graph_version, mark_graph_changed
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "vectorizer"))
+from embedding_storage import STORAGE_MODES, storage_clause  # noqa: E402
+from embedding_writer import unique_id_fields  # noqa: E402
+
+# Load environment variables
+load_dotenv()
+NEO4J_USERNAME = os.getenv("NEO4J_USERNAME")
+NEO4J_PASSWORD = os.getenv("NEO4J_PASSWORD")
+
+# Neo4j connection, opened on first use; diff needs no database at all
+driver = None
+
+
+def get_driver():
+    global driver
+    if driver is None:
+        from neo4j import GraphDatabase
+
+        driver = GraphDatabase.driver("bolt://localhost:7687", auth=(NEO4J_USERNAME, NEO4J_PASSWORD))
+    return driver
+
+
+FORMAT_VERSION = 1
+TEMP_LABEL = "_Snapshot"
+TEMP_INDEX = "snapshot_sid"
+# Node properties written to the .npy files rather than the JSON rows
+EMBEDDING_PROPERTIES = ("embedding", "embedding_int8", "embedding_scale")
+
+
+# --- Value encoding ---
+
+def encode_value(value):
+    """JSON ``default`` hook for the non-JSON values properties can hold."""
+    import neo4j.time
+
+    if isinstance(value, neo4j.time.Duration):
+        return {"$duration": [value.months, value.days, value.seconds, value.nanoseconds]}
+    for name in ("DateTime", "Date", "Time"):
+        if isinstance(value, getattr(neo4j.time, name)):
+            return {"$" + name.lower(): value.iso_format()}
+    if isinstance(value, (bytes, bytearray)):
+        return {"$bytes": value.hex()}
+    raise TypeError(f"Cannot snapshot a property of type {type(value).__name__}")
+
+
+def decode_value(obj):
+    """JSON ``object_hook`` reversing ``encode_value``."""
+    if len(obj) != 1:
+        return obj
+    (tag, value), = obj.items()
+    if tag == "$bytes":
+        return bytes.fromhex(value)
+    if tag in ("$datetime", "$date", "$time", "$duration"):
+        import neo4j.time
+
+        if tag == "$duration":
+            months, days, seconds, nanoseconds = value
+            return neo4j.time.Duration(months=months, days=days, seconds=seconds, nanoseconds=nanoseconds)
+        cls = {"$datetime": neo4j.time.DateTime, "$date": neo4j.time.Date, "$time": neo4j.time.Time}[tag]
+        return cls.from_iso_format(value)
+    return obj
+
+
+def dump_row(f, row):
+    f.write(json.dumps(row, default=encode_value, separators=(",", ":"), sort_keys=True))
+    f.write("\n")
+
+
+def iter_rows(path):
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            yield json.loads(line, object_hook=decode_value)
+
+
+def _paths(directory):
+    return {kind: os.path.join(directory, kind) for kind in ("nodes", "relationships", "embeddings")}
+
+
+def load_manifest(directory):
+    with open(os.path.join(directory, "manifest.json"), "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+    if manifest.get("format") != FORMAT_VERSION:
+        raise ValueError(f"{directory} is snapshot format {manifest.get('format')}, expected {FORMAT_VERSION}")
+    return manifest
+
+
+# === Export ===
+
+def schema_statements(driver):
+    """Return the CREATE statements of every constraint and of the indexes they do not own."""
+    with driver.session() as session:
+        constraints = [r["createStatement"] for r in session.run("SHOW CONSTRAINTS YIELD createStatement")]
+        indexes = [
+            r["createStatement"]
+            for r in session.run(
+                """
+                SHOW INDEXES YIELD name, type, owningConstraint, createStatement
+                WHERE type <> 'LOOKUP' AND owningConstraint IS NULL AND name <> $temp
+                RETURN createStatement
+                """,
+                temp=TEMP_INDEX,
+            )
+        ]
+    return constraints + indexes
+
+
+def export_snapshot(driver, directory, compresslevel=5, fetch_size=10000):
+    """Write the graph under *directory* and return the manifest."""
+    paths = _paths(directory)
+    for path in paths.values():
+        os.makedirs(path, exist_ok=True)
+
+    keys = dict(unique_id_fields(driver))
+    manifest = {
+        "format": FORMAT_VERSION,
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "graph_version": graph_version(driver),
+        "schema": schema_statements(driver),
+        "nodes": {},
+        "relationships": {},
+        "embeddings": {},
+        "dangling": 0,
+    }
+
+    with driver.session(fetch_size=fetch_size) as session, session.begin_transaction() as tx:
+        nodes = export_nodes(tx, paths["nodes"], keys, manifest, compresslevel)
+        export_relationships(tx, paths["relationships"], nodes, manifest, compresslevel)
+        export_embeddings(tx, paths["embeddings"], nodes, manifest)
+    if manifest["dangling"]:
+        print(f"[⚠️] Skipped {manifest['dangling']} relationships/embeddings of nodes written during the export")
+
+    with open(os.path.join(directory, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def export_nodes(tx, out, keys, manifest, compresslevel=5):
+    """Write every node to ``<out>/<Label>.jsonl.gz``; returns {elementId: (sid, file label)}."""
+    # Only valid for the duration of the export transaction
+    nodes, files = {}, {}
+    projection = ", ".join(f"{prop}: null" for prop in EMBEDDING_PROPERTIES)
+    result = tx.run(f"MATCH (n) RETURN elementId(n) AS eid, labels(n) AS labels, n {{.*, {projection}}} AS props")
+    for eid, labels, props in tqdm(result, desc="📤 Exporting nodes", unit="node"):
+        labels = sorted(labels)
+        label = labels[0] if labels else "_Unlabeled"
+        sid = len(nodes)
+        nodes[eid] = (sid, label)
+        if label not in files:
+            files[label] = gzip.open(
+                os.path.join(out, f"{label}.jsonl.gz"), "wt", encoding="utf-8", compresslevel=compresslevel
+            )
+            manifest["nodes"][label] = {"file": f"nodes/{label}.jsonl.gz", "count": 0, "key": keys.get(label)}
+        props = {k: v for k, v in props.items() if v is not None}
+        dump_row(files[label], {"sid": sid, "labels": labels, "props": props})
+        manifest["nodes"][label]["count"] += 1
+    for f in files.values():
+        f.close()
+    return nodes
+
+
+def export_relationships(tx, out, nodes, manifest, compresslevel=5):
+    """Write every relationship between exported nodes to ``<out>/<TYPE>.jsonl.gz``."""
+    files = {}
+    result = tx.run(
+        "MATCH (a)-[r]->(b) RETURN elementId(a) AS start, type(r) AS type, elementId(b) AS end, properties(r) AS props"
+    )
+    for start, rel_type, end, props in tqdm(result, desc="📤 Exporting relationships", unit="rel"):
+        if start not in nodes or end not in nodes:
+            manifest["dangling"] += 1
+            continue
+        if rel_type not in files:
+            files[rel_type] = gzip.open(
+                os.path.join(out, f"{rel_type}.jsonl.gz"), "wt", encoding="utf-8", compresslevel=compresslevel
+            )
+            manifest["relationships"][rel_type] = {"file": f"relationships/{rel_type}.jsonl.gz", "count": 0}
+        dump_row(files[rel_type], [nodes[start][0], nodes[end][0], props])
+        manifest["relationships"][rel_type]["count"] += 1
+    for f in files.values():
+        f.close()
+
+
+def export_embeddings(tx, out, nodes, manifest):
+    """Write float32 and int8 embeddings per label as .npy matrices with their sids."""
+    float_rows, int8_rows = defaultdict(lambda: ([], [])), defaultdict(lambda: ([], [], []))
+    result = tx.run(
+        """
+        MATCH (n) WHERE n.embedding IS NOT NULL OR n.embedding_int8 IS NOT NULL
+        RETURN elementId(n) AS eid, n.embedding AS embedding, n.embedding_int8 AS codes, n.embedding_scale AS scale
+        """
+    )
+    for eid, embedding, codes, scale in tqdm(result, desc="📤 Exporting embeddings", unit="node"):
+        if eid not in nodes:
+            manifest["dangling"] += 1
+            continue
+        sid, label = nodes[eid]
+        if embedding is not None:
+            float_rows[label][0].append(sid)
+            float_rows[label][1].append(np.asarray(embedding, dtype=np.float32))
+        else:
+            int8_rows[label][0].append(sid)
+            int8_rows[label][1].append(np.frombuffer(codes, dtype=np.int8))
+            int8_rows[label][2].append(scale)
+
+    for label, (sids, vectors) in float_rows.items():
+        base = f"{label}.embedding"
+        np.save(os.path.join(out, base + ".npy"), np.stack(vectors))
+        np.save(os.path.join(out, base + ".sids.npy"), np.asarray(sids, dtype=np.int64))
+        manifest["embeddings"].setdefault(label, {})["embedding"] = {
+            "file": f"embeddings/{base}.npy", "count": len(sids), "dimension": len(vectors[0])
+        }
+    for label, (sids, codes, scales) in int8_rows.items():
+        base = f"{label}.embedding_int8"
+        np.save(os.path.join(out, base + ".npy"), np.stack(codes))
+        np.save(os.path.join(out, base + ".sids.npy"), np.asarray(sids, dtype=np.int64))
+        np.save(os.path.join(out, base + ".scales.npy"), np.asarray(scales, dtype=np.float32))
+        manifest["embeddings"].setdefault(label, {})["embedding_int8"] = {
+            "file": f"embeddings/{base}.npy", "count": len(sids), "dimension": len(codes[0])
+        }
+
+
+# === Restore ===
+
+def _label_clause(labels):
+    return "".join(f":`{label}`" for label in labels)
+
+
+def restore_snapshot(driver, directory, sessions=4, batch_size=5000, embedding_storage="float32"):
+    """Load the snapshot in *directory* into an empty database."""
+    manifest = load_manifest(directory)
+    with driver.session() as session:
+        if session.run("MATCH (n) RETURN count(n) > 0 AS used").single()["used"]:
+            raise RuntimeError("The target database is not empty; restore only loads into an empty database")
+        session.run(f"CREATE INDEX {TEMP_INDEX} IF NOT EXISTS FOR (n:{TEMP_LABEL}) ON (n._sid)")
+        session.run("CALL db.awaitIndexes(300)")
+
+    writer = ParallelWriter(driver, sessions=sessions, batch_size=batch_size)
+
+    for label, entry in manifest["nodes"].items():
+        by_labels = defaultdict(list)
+        for row in iter_rows(os.path.join(directory, entry["file"])):
+            by_labels[tuple(row["labels"])].append({"sid": row["sid"], "props": row["props"]})
+        for labels, rows in by_labels.items():
+            writer.write(
+                f"""
+                UNWIND $rows AS row
+                CREATE (n:{TEMP_LABEL}{_label_clause(labels)} {{_sid: row.sid}})
+                SET n += row.props
+                """,
+                rows,
+                lambda row: (TEMP_LABEL, row["sid"]),
+                desc=f"📥 {label} nodes",
+            )
+
+    for rel_type, entry in manifest["relationships"].items():
+        rows = [{"start": start, "end": end, "props": props} for start, end, props in iter_rows(os.path.join(directory, entry["file"]))]
+        writer.write(
+            f"""
+            UNWIND $rows AS row
+            MATCH (a:{TEMP_LABEL} {{_sid: row.start}})
+            MATCH (b:{TEMP_LABEL} {{_sid: row.end}})
+            CREATE (a)-[r:`{rel_type}`]->(b)
+            SET r += row.props
+            """,
+            rows,
+            lambda row: (TEMP_LABEL, row["start"]),
+            lambda row: (TEMP_LABEL, row["end"]),
+            desc=f"📥 {rel_type} relationships",
+        )
+
+    restore_embeddings(driver, directory, manifest, writer, embedding_storage)
+
+    with driver.session() as session:
+        print("🧹 Removing restore markers")
+        session.run(
+            f"""
+            MATCH (n:{TEMP_LABEL})
+            CALL {{ WITH n REMOVE n:{TEMP_LABEL}, n._sid }} IN TRANSACTIONS OF 10000 ROWS
+            """
+        ).consume()
+        session.run(f"DROP INDEX {TEMP_INDEX} IF EXISTS")
+        for statement in tqdm(manifest["schema"], desc="🗂️ Creating constraints and indexes", unit="stmt"):
+            try:
+                session.run(statement).consume()
+            except Exception as e:
+                print(f"[⚠️] Could not run {statement!r}: {e}")
+    return manifest
+
+
+def restore_embeddings(driver, directory, manifest, writer, storage="float32"):
+    if storage not in STORAGE_MODES:
+        raise ValueError(f"Unknown embedding storage {storage!r}; expected one of {STORAGE_MODES}")
+    match = f"UNWIND $rows AS row MATCH (n:{TEMP_LABEL} {{_sid: row.key}}) "
+    for label, entries in manifest["embeddings"].items():
+        for prop, entry in entries.items():
+            base = os.path.join(directory, entry["file"])[: -len(".npy")]
+            sids = np.load(base + ".sids.npy")
+            vectors = np.load(base + ".npy", mmap_mode="r")
+            if prop == "embedding_int8":
+                scales = np.load(base + ".scales.npy")
+                rows = [
+                    {"key": int(sid), "codes": code.tobytes(), "scale": float(scale)}
+                    for sid, code, scale in zip(sids, vectors, scales)
+                ]
+                clause = storage_clause("int8")
+            else:
+                # int8 is lossy; a float snapshot restored as int8 would not round-trip
+                mode = storage if storage != "int8" else "float32"
+                rows = [{"key": int(sid), "embedding": vector.tolist()} for sid, vector in zip(sids, vectors)]
+                clause = storage_clause(mode)
+            writer.write(match + clause, rows, lambda row: (TEMP_LABEL, row["key"]), desc=f"📥 {label} {prop}")
+
+
+# === Diff ===
+
+def node_identity(label, key, props):
+    if key and props.get(key) is not None:
+        return label, props[key]
+    return label, "#" + _digest(props)
+
+
+def _digest(value):
+    data = json.dumps(value, default=encode_value, separators=(",", ":"), sort_keys=True)
+    return hashlib.sha1(data.encode("utf-8")).hexdigest()[:16]
+
+
+def read_snapshot(directory, with_embeddings=True):
+    """Return ({identity: props digest}, {(type, start, end): Counter of props digests},
+    {identity: vector digest})."""
+    manifest = load_manifest(directory)
+    nodes, identities = {}, {}
+    for label, entry in manifest["nodes"].items():
+        for row in tqdm(iter_rows(os.path.join(directory, entry["file"])), desc=f"📖 {label}", unit="node", leave=False):
+            identity = node_identity(label, entry.get("key"), row["props"])
+            identities[row["sid"]] = identity
+            # The version stamp changes on every run; it is bookkeeping, not content
+            if label != STAMP_LABEL:
+                nodes[identity] = _digest([row["labels"], row["props"]])
+
+    # Parallel relationships of one type are allowed (e.g. AFFECTS per range)
+    relationships = defaultdict(Counter)
+    for rel_type, entry in manifest["relationships"].items():
+        for start, end, props in iter_rows(os.path.join(directory, entry["file"])):
+            relationships[(rel_type, identities[start], identities[end])][_digest(props)] += 1
+
+    embeddings = {}
+    for label, entries in manifest["embeddings"].items() if with_embeddings else ():
+        for prop, entry in entries.items():
+            base = os.path.join(directory, entry["file"])[: -len(".npy")]
+            for sid, vector in zip(np.load(base + ".sids.npy"), np.load(base + ".npy", mmap_mode="r")):
+                embeddings[identities[int(sid)]] = hashlib.sha1(vector.tobytes()).hexdigest()[:16]
+    return nodes, relationships, embeddings
+
+
+def diff_snapshots(old_dir, new_dir, with_embeddings=True):
+    """Return per-label and per-type counts of added, removed and changed items."""
+    old_nodes, old_rels, old_vectors = read_snapshot(old_dir, with_embeddings)
+    new_nodes, new_rels, new_vectors = read_snapshot(new_dir, with_embeddings)
+
+    report = {"nodes": defaultdict(Counter), "relationships": defaultdict(Counter), "embeddings": defaultdict(Counter)}
+    for identity in old_nodes.keys() | new_nodes.keys():
+        label = identity[0]
+        if identity not in new_nodes:
+            report["nodes"][label]["removed"] += 1
+        elif identity not in old_nodes:
+            report["nodes"][label]["added"] += 1
+        elif old_nodes[identity] != new_nodes[identity]:
+            report["nodes"][label]["changed"] += 1
+
+    for rel in old_rels.keys() | new_rels.keys():
+        old, new = old_rels.get(rel, Counter()), new_rels.get(rel, Counter())
+        added, removed = sum((new - old).values()), sum((old - new).values())
+        # Between the same two nodes, a removed and an added digest are one edited relationship
+        changed = min(added, removed)
+        counts = report["relationships"][rel[0]]
+        for kind, count in (("added", added - changed), ("removed", removed - changed), ("changed", changed)):
+            if count:
+                counts[kind] += count
+
+    for identity in old_vectors.keys() | new_vectors.keys():
+        old, new = old_vectors.get(identity), new_vectors.get(identity)
+        if old != new:
+            kind = "added" if old is None else "removed" if new is None else "changed"
+            report["embeddings"][identity[0]][kind] += 1
+    return report
+
+
+def print_report(report):
+    if not any(report.values()):
+        print("✅ Snapshots are identical")
+        return
+    for section, groups in report.items():
+        if not groups:
+            continue
+        print(f"\n{section}:")
+        for name, counts in sorted(groups.items()):
+            parts = ", ".join(f"{kind} {counts[kind]}" for kind in ("added", "removed", "changed") if counts[kind])
+            print(f"  {name:<24} {parts}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export, restore or diff graph snapshots")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    export = sub.add_parser("export", help="Write the current graph to a snapshot directory")
+    export.add_argument("directory")
+
+    restore = sub.add_parser("restore", help="Load a snapshot into an empty database")
+    restore.add_argument("directory")
+    restore.add_argument("--sessions", type=int, default=4, help="Concurrent write sessions")
+    restore.add_argument("--batch-size", type=int, default=5000, help="Rows per write transaction")
+    restore.add_argument("--embedding-storage", choices=STORAGE_MODES, default="float32",
+                         help="How float embeddings are stored (int8 snapshots stay int8)")
+
+    diff = sub.add_parser("diff", help="Compare two snapshot directories")
+    diff.add_argument("old")
+    diff.add_argument("new")
+    diff.add_argument("--no-embeddings", action="store_true", help="Skip comparing embeddings")
+    args = parser.parse_args()
+
+    if args.command == "diff":
+        print_report(diff_snapshots(args.old, args.new, with_embeddings=not args.no_embeddings))
+    elif args.command == "export":
+        driver = get_driver()
+        manifest = export_snapshot(driver, args.directory)
+        nodes = sum(entry["count"] for entry in manifest["nodes"].values())
+        rels = sum(entry["count"] for entry in manifest["relationships"].values())
+        print(f"✅ Snapshot of {nodes} nodes and {rels} relationships written to {args.directory}")
+        driver.close()
+    else:
+        driver = get_driver()
+        try:
+            restore_snapshot(
+                driver,
+                args.directory,
+                sessions=args.sessions,
+                batch_size=args.batch_size,
+                embedding_storage=args.embedding_storage,
+            )
+        except RuntimeError as e:
+            parser.error(str(e))
+        mark_graph_changed(driver, "snapshot-restore")
+        driver.close()
+        print(f"✅ Restored {args.directory}")
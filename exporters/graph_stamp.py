@@ -0,0 +1,34 @@
+"""A version stamp that exporters bump whenever they change the graph.
+
+Readers that cache something derived from the graph (such as the LLM schema
+snapshot) compare their stored version with ``graph_version`` instead of
+re-reading the graph. The stamp is a single ``:GraphMeta`` node, so checking
+it reads one node.
+"""
+
+STAMP_LABEL = "GraphMeta"
+
+
+def mark_graph_changed(driver, source):
+    """Bump the graph version after an exporter run; returns the new version."""
+    with driver.session() as session:
+        record = session.run(
+            f"""
+            MERGE (m:{STAMP_LABEL} {{id: 'graph'}})
+            SET m.version = coalesce(m.version, 0) + 1,
+                m.updatedAt = datetime(),
+                m.updatedBy = $source
+            RETURN m.version AS version
+            """,
+            source=source,
+        ).single()
+    return record["version"]
+
+
+def graph_version(driver):
+    """Return the current graph version, or 0 if no exporter has stamped it yet."""
+    with driver.session() as session:
+        record = session.run(
+            f"MATCH (m:{STAMP_LABEL} {{id: 'graph'}}) RETURN m.version AS version"
+        ).single()
+    return record["version"] if record else 0
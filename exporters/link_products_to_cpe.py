@@ -0,0 +1,214 @@
+import os
+import argparse
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from urllib.parse import unquote
+from tqdm import tqdm
+from neo4j import GraphDatabase
+
+from cve_versions import UNBOUNDED_VERSIONS, normalize_name, range_bounds, version_key
+from graph_stamp import mark_graph_changed
+from dotenv import load_dotenv
+# Load environment variables
+load_dotenv()
+NEO4J_USERNAME = os.getenv("NEO4J_USERNAME")
+NEO4J_PASSWORD = os.getenv("NEO4J_PASSWORD")
+
+
+def clean_cpe_value(value):
+    """Undo CPE 2.2 percent-encoding and CPE 2.3 backslash escaping."""
+    if not value:
+        return ""
+    return unquote(str(value)).replace("\\", "")
+
+
+def link_key(vendor, product, version):
+    """Return the normalized CPE join key, or None for wildcard/unorderable versions."""
+    version = (version or "").strip()
+    if version.lower() in UNBOUNDED_VERSIONS:
+        return None
+    vkey = version_key(version)
+    if vkey is None:
+        return None
+    return normalize_name(clean_cpe_value(vendor)), normalize_name(clean_cpe_value(product)), vkey
+
+
+def fetch_products(driver):
+    with driver.session() as session:
+        result = session.run(
+            "MATCH (p:Product) RETURN elementId(p) AS id, p.vendor AS vendor, "
+            "p.product AS product, p.version AS version"
+        )
+        for record in result:
+            yield record["id"], record["vendor"], record["product"], record["version"]
+
+
+def fetch_ranges(driver):
+    """Yield (cveId, range, vendor, product, version, lessThan, lessThanOrEqual, versionType).
+
+    One row per AFFECTS edge that covers more than its Product's version: an
+    upper bound, or a wildcard start such as "0" or "*".
+    """
+    with driver.session() as session:
+        result = session.run(
+            """
+            MATCH (c:CVE)-[r:AFFECTS]->(p:Product)
+            WHERE r.lessThan IS NOT NULL OR r.lessThanOrEqual IS NOT NULL
+               OR toLower(trim(coalesce(p.version, ''))) IN $unbounded
+            RETURN c.cveId AS cveId,
+                   coalesce(r.range, coalesce(r.lessThan, '') + '|' + coalesce(r.lessThanOrEqual, '') + '|'
+                            + coalesce(r.versionType, '')) AS range,
+                   p.vendor AS vendor, p.product AS product, p.version AS version,
+                   r.lessThan AS lessThan, r.lessThanOrEqual AS lessThanOrEqual, r.versionType AS versionType
+            """,
+            unbounded=sorted(UNBOUNDED_VERSIONS),
+        )
+        for record in result:
+            yield tuple(record.values())
+
+
+def fetch_cpes(driver):
+    with driver.session() as session:
+        result = session.run(
+            "MATCH (c:CPE) RETURN elementId(c) AS id, c.vendor AS vendor, "
+            "c.product AS product, c.version AS version"
+        )
+        for record in result:
+            yield record["id"], record["vendor"], record["product"], record["version"]
+
+
+def build_cpe_table(cpes):
+    """Group (id, vendor, product, version) CPEs by normalized vendor/product.
+
+    Returns {(vendor, product): (sorted version keys, CPE ids in the same order)}.
+    """
+    grouped = defaultdict(list)
+    for cpe_id, vendor, product, version in cpes:
+        key = link_key(vendor, product, version)
+        if key is not None:
+            grouped[key[:2]].append((key[2], cpe_id))
+    table = {}
+    for name, entries in grouped.items():
+        entries.sort(key=lambda entry: entry[0])
+        table[name] = ([vkey for vkey, _ in entries], [cpe_id for _, cpe_id in entries])
+    return table
+
+
+def _covered(table, vendor, product, bounds):
+    entry = table.get((normalize_name(clean_cpe_value(vendor)), normalize_name(clean_cpe_value(product))))
+    if entry is None or bounds is None:
+        return []
+    keys, ids = entry
+    low, high, inclusive = bounds
+    first = bisect_left(keys, low)
+    last = bisect_right(keys, high) if inclusive else bisect_left(keys, high)
+    return ids[first:last]
+
+
+def join_products_to_cpes(products, table):
+    """Match (id, vendor, product, version) Products to the CPEs of exactly their version.
+
+    A Product node is shared by every CVE that points at it, whatever range
+    the edge carries, so it is only linked to the CPE it is itself. Returns
+    a list of ``{"product": id, "cpe": id}`` pairs.
+    """
+    pairs = []
+    for product_id, vendor, product, version in products:
+        if (version or "").strip().lower() in UNBOUNDED_VERSIONS:
+            continue
+        bounds = range_bounds(version)
+        pairs.extend({"product": product_id, "cpe": cpe_id} for cpe_id in _covered(table, vendor, product, bounds))
+    return pairs
+
+
+def join_ranges_to_cpes(ranges, table):
+    """Match the rows of ``fetch_ranges`` to the CPE versions each range covers.
+
+    Bounds come from ``range_bounds`` and the covered versions are found by
+    bisection. Returns ``{"cve": cveId, "range": range key, "cpe": id}`` rows,
+    so each link belongs to one CVE's range rather than to the shared Product.
+    """
+    rows = []
+    for cve_id, range_key, vendor, product, version, less_than, less_equal, version_type in ranges:
+        bounds = range_bounds(version, less_than, less_equal, version_type)
+        rows.extend(
+            {"cve": cve_id, "range": range_key, "cpe": cpe_id} for cpe_id in _covered(table, vendor, product, bounds)
+        )
+    return rows
+
+
+def create_cpe_links(tx, rows):
+    tx.run(
+        """
+        UNWIND $rows AS row
+        MATCH (p:Product) WHERE elementId(p) = row.product
+        MATCH (c:CPE) WHERE elementId(c) = row.cpe
+        MERGE (p)-[:MATCHES_CPE]->(c)
+        """,
+        rows=rows,
+    )
+
+
+def create_range_links(tx, rows):
+    tx.run(
+        """
+        UNWIND $rows AS row
+        MATCH (v:CVE {cveId: row.cve})
+        MATCH (c:CPE) WHERE elementId(c) = row.cpe
+        MERGE (v)-[:AFFECTS_CPE {range: row.range}]->(c)
+        """,
+        rows=rows,
+    )
+
+
+def clear_links(driver):
+    """Drop the derived MATCHES_CPE/AFFECTS_CPE edges so a run never keeps stale ones."""
+    with driver.session() as session:
+        for rel_type in ("MATCHES_CPE", "AFFECTS_CPE"):
+            session.run(
+                f"""
+                MATCH ()-[l:{rel_type}]->()
+                CALL {{ WITH l DELETE l }} IN TRANSACTIONS OF 10000 ROWS
+                """
+            ).consume()
+
+
+def link_products_to_cpes(driver, batch_size=5000):
+    """Link CVEs to CPE dictionary nodes.
+
+    Product nodes get MATCHES_CPE to the CPE of their own version. Each
+    AFFECTS range (upper bound or wildcard start) gets AFFECTS_CPE edges
+    from its CVE, keyed by the same ``range`` as the AFFECTS edge, to every
+    CPE version it covers.
+    """
+    print("📥 Loading CPE, Product and range keys...")
+    table = build_cpe_table(tqdm(fetch_cpes(driver), desc="CPE", unit="node"))
+    products = list(tqdm(fetch_products(driver), desc="Product", unit="node"))
+    ranges = list(tqdm(fetch_ranges(driver), desc="Range", unit="edge"))
+
+    pairs = join_products_to_cpes(products, table)
+    range_links = join_ranges_to_cpes(ranges, table)
+    print(f"🔗 {len(pairs)} Product → CPE matches, {len(range_links)} CVE range → CPE matches")
+
+    clear_links(driver)
+    with driver.session() as session:
+        for start in tqdm(range(0, len(pairs), batch_size), desc="📦 Writing MATCHES_CPE", unit="batch"):
+            session.execute_write(create_cpe_links, pairs[start:start + batch_size])
+        for start in tqdm(range(0, len(range_links), batch_size), desc="📦 Writing AFFECTS_CPE", unit="batch"):
+            session.execute_write(create_range_links, range_links[start:start + batch_size])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Link CVE Product nodes and affected ranges to CPE dictionary nodes")
+    parser.add_argument("--batch-size", type=int, default=5000, help="Relationships per write transaction")
+    args = parser.parse_args()
+
+    uri = "bolt://localhost:7687"
+    driver = GraphDatabase.driver(uri, auth=(NEO4J_USERNAME, NEO4J_PASSWORD))
+
+    link_products_to_cpes(driver, batch_size=args.batch_size)
+    mark_graph_changed(driver, "cpe-links")
+
+    driver.close()
+
+    print("✅ Product and range → CPE linking completed successfully.")
@@ -0,0 +1,228 @@
+"""Bulk priority scoring of CVE nodes.
+
+Pulls the scoring inputs of every CVE in one streamed read into NumPy
+arrays, computes the score for the whole corpus in one vectorized pass and
+writes back only the scores that changed. The score is a weighted mean of
+components in [0, 1], scaled to 0-100:
+
+    cvss     baseScore / 10, or a stand-in from baseSeverity when unscored
+    kev      1 when kev_exploited is 'true'
+    cwe      specificity of the most specific linked CWE (Variant > Base > Class > Pillar)
+    recency  0.5 ** (days since datePublished / half-life)
+    epss     EPSS probability from a local CSV (--epss), stored as c.epss too
+
+Components without inputs (epss without --epss, or for a CVE missing from
+the EPSS file) drop out of that CVE's mean so scores stay on the same scale. ``riskScore`` is indexed, so
+
+    MATCH (c:CVE) WHERE c.riskScore IS NOT NULL
+    RETURN c.cveId, c.riskScore ORDER BY c.riskScore DESC LIMIT 100
+
+is served from the index. Run after the CVE, CWE and KEV exporters:
+
+    python risk_scoring.py [--epss ../data/epss/epss_scores-current.csv.gz] [--weight kev=0.4] [--top 20]
+"""
+import os
+import csv
+import gzip
+import argparse
+from datetime import date
+import numpy as np
+from neo4j import GraphDatabase
+from dotenv import load_dotenv
+
+from parallel_writer import ParallelWriter
+from graph_stamp import mark_graph_changed
+
+# Load environment variables
+load_dotenv()
+NEO4J_USERNAME = os.getenv("NEO4J_USERNAME")
+NEO4J_PASSWORD = os.getenv("NEO4J_PASSWORD")
+
+# Neo4j connection, opened on first use so importing this module has no side effects
+driver = None
+
+
+def get_driver():
+    global driver
+    if driver is None:
+        driver = GraphDatabase.driver("bolt://localhost:7687", auth=(NEO4J_USERNAME, NEO4J_PASSWORD))
+    return driver
+
+
+DEFAULT_WEIGHTS = {"cvss": 0.4, "kev": 0.25, "epss": 0.15, "cwe": 0.1, "recency": 0.1}
+SEVERITY_SCORES = {"CRITICAL": 0.95, "HIGH": 0.8, "MEDIUM": 0.55, "LOW": 0.25, "NONE": 0.0}
+ABSTRACTION_SCORES = {"Variant": 1.0, "Base": 0.8, "Compound": 0.6, "Class": 0.4, "Pillar": 0.2}
+
+
+def create_index(driver):
+    with driver.session() as session:
+        session.run(
+            """
+            CREATE INDEX cve_risk_score IF NOT EXISTS
+            FOR (c:CVE) ON (c.riskScore)
+            """
+        )
+
+
+def fetch_columns(driver, fetch_size=10000):
+    """Read the scoring inputs of every CVE into a dict of NumPy arrays."""
+    ids, scores, severities, kev, published, abstraction, current, stored_epss = [], [], [], [], [], [], [], []
+    with driver.session(fetch_size=fetch_size) as session:
+        result = session.run(
+            """
+            MATCH (c:CVE)
+            RETURN c.cveId AS cveId, c.baseScore AS baseScore, c.baseSeverity AS baseSeverity,
+                   c.kev_exploited AS kev, c.datePublished AS datePublished, c.riskScore AS riskScore,
+                   c.epss AS epss, [(c)-[:HAS_CWE]->(w:CWE) | w.abstraction] AS abstractions
+            """
+        )
+        for cve_id, base_score, severity, exploited, date_published, risk, epss, abstractions in result:
+            ids.append(cve_id)
+            scores.append(base_score)
+            severities.append(SEVERITY_SCORES.get((severity or "").upper(), 0.0))
+            kev.append(exploited == "true")
+            published.append((date_published or "")[:10] or "NaT")
+            abstraction.append(max((ABSTRACTION_SCORES.get(a, 0.0) for a in abstractions), default=0.0))
+            current.append(risk)
+            stored_epss.append(epss)
+
+    return {
+        "cveId": np.array(ids, dtype=object),
+        "baseScore": np.array([np.nan if s is None else float(s) for s in scores], dtype=np.float64),
+        "severity": np.array(severities, dtype=np.float64),
+        "kev": np.array(kev, dtype=bool),
+        "published": np.array(published, dtype="datetime64[D]"),
+        "abstraction": np.array(abstraction, dtype=np.float64),
+        "riskScore": np.array([np.nan if r is None else float(r) for r in current], dtype=np.float64),
+        "epss": np.array([np.nan if p is None else float(p) for p in stored_epss], dtype=np.float64),
+    }
+
+
+def load_epss(path):
+    """Return {cveId: probability} from an EPSS CSV (plain or .gz, '#' comment line first)."""
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rt", encoding="utf-8", newline="") as f:
+        rows = csv.DictReader(line for line in f if not line.startswith("#"))
+        return {row["cve"]: float(row["epss"]) for row in rows if row.get("epss")}
+
+
+def compute_scores(columns, weights=None, epss=None, half_life_days=365.0, today=None):
+    """Return (scores 0-100, epss array or None) for the columns from ``fetch_columns``."""
+    weights = dict(DEFAULT_WEIGHTS, **(weights or {}))
+    today = np.datetime64(today or date.today(), "D")
+
+    base = columns["baseScore"]
+    components = {
+        "cvss": np.where(np.isnan(base), columns["severity"], np.clip(base / 10.0, 0.0, 1.0)),
+        "kev": columns["kev"].astype(np.float64),
+        "cwe": columns["abstraction"],
+    }
+
+    # Unpublished or undated CVEs count as old rather than new
+    published = columns["published"]
+    age = np.clip((today - np.where(np.isnat(published), today, published)).astype(np.float64), 0.0, None)
+    components["recency"] = np.where(np.isnat(published), 0.0, 0.5 ** (age / half_life_days))
+
+    # Per-row weight totals, so a CVE missing from the EPSS file is scored
+    # on the other components instead of on an EPSS of 0
+    total = np.full(len(base), sum(weights[name] for name in components), dtype=np.float64)
+    score = sum(weights[name] * values for name, values in components.items())
+
+    epss_values = None
+    if epss is not None:
+        epss_values = np.array([epss.get(cve_id, np.nan) for cve_id in columns["cveId"]], dtype=np.float64)
+        known = ~np.isnan(epss_values)
+        score = score + np.where(known, weights["epss"] * np.nan_to_num(epss_values), 0.0)
+        total = total + np.where(known, weights["epss"], 0.0)
+
+    if (total <= 0).any():
+        raise ValueError("The weights of the available components sum to zero")
+    return np.round(score / total * 100.0, 2), epss_values
+
+
+def write_scores(driver, columns, scores, epss_values=None, sessions=4, batch_size=5000, full=False):
+    """Write back the scores or EPSS values that changed (or all with *full*); returns how many."""
+    changed = np.ones(len(scores), dtype=bool) if full else ~np.isclose(scores, columns["riskScore"])
+    if epss_values is not None:
+        changed |= ~np.isclose(epss_values, columns["epss"], equal_nan=True)
+        rows = [
+            {"cveId": cve_id, "score": float(score), "epss": None if np.isnan(p) else float(p)}
+            for cve_id, score, p in zip(columns["cveId"][changed], scores[changed], epss_values[changed])
+        ]
+        query = """
+        UNWIND $rows AS row
+        MATCH (c:CVE {cveId: row.cveId})
+        SET c.riskScore = row.score, c.epss = row.epss
+        """
+    else:
+        rows = [{"cveId": cve_id, "score": float(score)} for cve_id, score in zip(columns["cveId"][changed], scores[changed])]
+        query = """
+        UNWIND $rows AS row
+        MATCH (c:CVE {cveId: row.cveId})
+        SET c.riskScore = row.score
+        """
+
+    ParallelWriter(driver, sessions=sessions, batch_size=batch_size).write(
+        query, rows, lambda row: ("CVE", row["cveId"]), desc="📝 Writing risk scores"
+    )
+    return len(rows)
+
+
+def top_risks(driver, limit=100):
+    with driver.session() as session:
+        result = session.run(
+            """
+            MATCH (c:CVE) WHERE c.riskScore IS NOT NULL
+            RETURN c.cveId AS cveId, c.riskScore AS riskScore, c.baseSeverity AS baseSeverity, c.kev_exploited AS kev
+            ORDER BY c.riskScore DESC LIMIT $limit
+            """,
+            limit=limit,
+        )
+        return [record.data() for record in result]
+
+
+def parse_weights(values):
+    weights = {}
+    for value in values:
+        name, _, weight = value.partition("=")
+        if name not in DEFAULT_WEIGHTS or not weight:
+            raise argparse.ArgumentTypeError(f"Expected one of {sorted(DEFAULT_WEIGHTS)}=<number>, got {value!r}")
+        weights[name] = float(weight)
+    return weights
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compute and store a priority score for every CVE")
+    parser.add_argument("--epss", help="EPSS CSV (cve,epss,percentile), plain or gzipped")
+    parser.add_argument("--weight", action="append", default=[], metavar="NAME=VALUE",
+                        help=f"Override a component weight; defaults {DEFAULT_WEIGHTS}")
+    parser.add_argument("--half-life", type=float, default=365.0, help="Days after which recency counts half")
+    parser.add_argument("--sessions", type=int, default=4, help="Concurrent write sessions")
+    parser.add_argument("--full", action="store_true", help="Rewrite every score, not only changed ones")
+    parser.add_argument("--top", type=int, default=0, help="Print the N highest scores afterwards")
+    args = parser.parse_args()
+
+    try:
+        weights = parse_weights(args.weight)
+    except argparse.ArgumentTypeError as e:
+        parser.error(str(e))
+
+    driver = get_driver()
+    create_index(driver)
+
+    epss = None
+    if args.epss:
+        epss = load_epss(args.epss)
+        print(f"📈 Loaded EPSS scores for {len(epss)} CVEs")
+
+    columns = fetch_columns(driver)
+    print(f"📦 Scoring {len(columns['cveId'])} CVEs")
+    scores, epss_values = compute_scores(columns, weights, epss, half_life_days=args.half_life)
+    written = write_scores(driver, columns, scores, epss_values, sessions=args.sessions, full=args.full)
+    print(f"✅ Updated {written} risk scores.")
+    if written:
+        mark_graph_changed(driver, "risk-score")
+
+    for row in top_risks(driver, args.top) if args.top else []:
+        print(f"{row['riskScore']:6.2f}  {row['cveId']}  {row['baseSeverity'] or '-'}  KEV={row['kev']}")
+    driver.close()
@@ -0,0 +1,156 @@
+"""Answer many questions concurrently.
+
+LLM calls run on asyncio under a concurrency limit and a requests-per-second
+rate limit; generated Cypher runs on worker threads that share one Neo4j
+driver and its connection pool. Results stream back in completion order,
+each with its latency.
+
+Usage (from the llm directory):
+
+    python batch_qa.py questions.txt --concurrency 16 --rate 5 --output answers.jsonl
+"""
+import sys
+import json
+import time
+import asyncio
+import argparse
+
+from cypher_guard import CypherGuard
+from neo4j_query import aanswer_question, build_graph, build_llm, get_driver
+from query_cache import DEFAULT_CACHE_PATH, QueryCache
+from schema_cache import load_schema
+
+
+class RateLimiter:
+    """Token bucket allowing *rate* acquisitions per second, in bursts of up to *burst*."""
+
+    def __init__(self, rate, burst=None):
+        self.rate = rate
+        self.capacity = burst or max(1, int(rate))
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+async def answer_stream(
+    questions, llm, graph, cache=None, schema=None, concurrency=8, rate=None, router=True, guard=None
+):
+    """Yield one result dict per question as soon as it is answered.
+
+    Each result carries ``index`` (position in *questions*), ``latency``
+    (seconds from start of work on it) and, on failure, ``error``.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    limiter = RateLimiter(rate) if rate else None
+
+    async def answer(index, question):
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                result = await aanswer_question(
+                    question,
+                    llm,
+                    graph,
+                    cache=cache,
+                    schema=schema,
+                    router=router,
+                    limiter=limiter,
+                    verbose=False,
+                    guard=guard,
+                )
+            except Exception as e:
+                result = {"question": question, "error": f"{type(e).__name__}: {e}"}
+            result["index"] = index
+            result["latency"] = time.perf_counter() - start
+            return result
+
+    tasks = [asyncio.create_task(answer(i, q)) for i, q in enumerate(questions)]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+def answer_batch(questions, llm, graph, **kwargs):
+    """Blocking helper: return every result, ordered like *questions*."""
+
+    async def collect():
+        return [result async for result in answer_stream(questions, llm, graph, **kwargs)]
+
+    return sorted(asyncio.run(collect()), key=lambda result: result["index"])
+
+
+def latency_summary(latencies):
+    ordered = sorted(latencies)
+    if not ordered:
+        return "no questions answered"
+
+    def pct(p):
+        return ordered[min(len(ordered) - 1, int(p * len(ordered)))]
+
+    return f"p50 {pct(0.5):.2f}s, p95 {pct(0.95):.2f}s, max {ordered[-1]:.2f}s"
+
+
+async def run_cli(args):
+    source = sys.stdin if args.questions == "-" else open(args.questions, "r", encoding="utf-8")
+    with source:
+        questions = [line.strip() for line in source if line.strip()]
+
+    llm = build_llm()
+    graph = build_graph(pool_size=args.concurrency, timeout=args.timeout)
+    schema = load_schema(get_driver())
+    cache = None if args.no_cache else QueryCache(path=DEFAULT_CACHE_PATH)
+    guard = None if args.no_guard else CypherGuard(get_driver(), timeout=args.timeout)
+
+    output = open(args.output, "w", encoding="utf-8") if args.output else None
+    latencies, failures, start = [], 0, time.perf_counter()
+    try:
+        stream = answer_stream(
+            questions,
+            llm,
+            graph,
+            cache=cache,
+            schema=schema,
+            concurrency=args.concurrency,
+            rate=args.rate,
+            guard=guard,
+        )
+        async for result in stream:
+            latencies.append(result["latency"])
+            status = "❌" if "error" in result else "✅"
+            failures += "error" in result
+            print(f"{status} [{result['index']}] {result['latency']:.2f}s {result.get('route', '-'):<24} {result['question']}")
+            if output:
+                output.write(json.dumps(result, default=str) + "\n")
+                output.flush()
+    finally:
+        if output:
+            output.close()
+
+    elapsed = time.perf_counter() - start
+    print(f"\n⏱️ {len(latencies)} questions in {elapsed:.1f}s ({latency_summary(latencies)}), {failures} failed")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Answer a file of questions concurrently")
+    parser.add_argument("questions", help="Text file with one question per line, or - for stdin")
+    parser.add_argument("--concurrency", type=int, default=8, help="Questions in flight at once")
+    parser.add_argument("--rate", type=float, help="Maximum LLM requests per second")
+    parser.add_argument("--output", help="Write results as JSON lines, in completion order")
+    parser.add_argument("--no-cache", action="store_true", help="Do not reuse cached Cypher")
+    parser.add_argument("--timeout", type=float, default=30.0, help="Seconds any query may run")
+    parser.add_argument("--no-guard", action="store_true", help="Run generated Cypher without the EXPLAIN checks (and without caching it)")
+    asyncio.run(run_cli(parser.parse_args()))
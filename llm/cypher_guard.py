@@ -0,0 +1,101 @@
+"""Check LLM-generated Cypher before it reaches the database.
+
+A single generated Cartesian product, or an unbounded variable-length path
+over CVE/Product, can keep the database busy for minutes. ``CypherGuard``
+first rewrites what can be fixed by rewriting: unbounded expansions get an
+upper bound and a query without LIMIT gets one. It then runs EXPLAIN, which
+plans the query without executing it, and rejects queries that write, plan a
+Cartesian product or are estimated to touch too many rows.
+"""
+import re
+
+# "-[*]", "-[r:X*2..]" and friends: a variable-length relationship without an upper bound
+UNBOUNDED_EXPANSION = re.compile(r"(-\[[^\[\]]*?\*)\s*(\d*)\s*(\.\.)?\s*(\])")
+BOUNDED_EXPANSION = re.compile(r"-\[[^\[\]]*?\*\s*\d*\s*\.\.\s*\d+\s*\]|-\[[^\[\]]*?\*\s*\d+\s*\]")
+FINAL_LIMIT = re.compile(r"\bLIMIT\s+(\d+|\$\w+)\s*;?\s*$", re.IGNORECASE)
+RETURN_CLAUSE = re.compile(r"\bRETURN\b", re.IGNORECASE)
+UNION = re.compile(r"\bUNION\b", re.IGNORECASE)
+WRAPPED_UNION = re.compile(r"CALL\s*\{.*\}\s*RETURN\s+\*\s+LIMIT\b", re.IGNORECASE | re.DOTALL)
+
+REJECTED_OPERATORS = {"CartesianProduct": "a Cartesian product (disconnected MATCH patterns)"}
+
+
+class CypherRejected(ValueError):
+    """Raised for generated Cypher that is too expensive or not read-only."""
+
+
+def bound_expansions(cypher, max_hops):
+    """Give every unbounded variable-length relationship an upper bound of *max_hops*."""
+
+    def bound(match):
+        if BOUNDED_EXPANSION.fullmatch(match.group(0)):
+            return match.group(0)
+        low = match.group(2) or "1"
+        return f"{match.group(1)}{low}..{max(int(low), max_hops)}{match.group(4)}"
+
+    return UNBOUNDED_EXPANSION.sub(bound, cypher)
+
+
+def ensure_limit(cypher, max_rows):
+    """Append ``LIMIT max_rows`` to a query whose final RETURN has no LIMIT.
+
+    A trailing LIMIT would only bound the last part of a UNION, so UNION
+    queries are wrapped as ``CALL { ... } RETURN * LIMIT max_rows`` instead.
+    """
+    cypher = cypher.strip().rstrip(";").strip()
+    if not RETURN_CLAUSE.search(cypher):
+        return cypher
+    if UNION.search(cypher):
+        if WRAPPED_UNION.match(cypher) and FINAL_LIMIT.search(cypher):
+            return cypher
+        return f"CALL {{\n{cypher}\n}}\nRETURN *\nLIMIT {max_rows}"
+    if FINAL_LIMIT.search(cypher):
+        return cypher
+    return f"{cypher}\nLIMIT {max_rows}"
+
+
+def plan_operators(plan):
+    """Yield (operator type, estimated rows, details) for every operator of an EXPLAIN plan."""
+    stack = [plan] if plan else []
+    while stack:
+        node = stack.pop()
+        args = node.get("args", {})
+        yield node["operatorType"].split("@")[0], args.get("EstimatedRows", 0), args.get("Details", "")
+        stack.extend(node.get("children", []))
+
+
+class CypherGuard:
+    def __init__(self, driver, max_rows=1000, max_hops=4, max_estimated_rows=1_000_000, timeout=30.0):
+        self.driver = driver
+        self.max_rows = max_rows
+        self.max_hops = max_hops
+        self.max_estimated_rows = max_estimated_rows
+        self.timeout = timeout
+
+    def explain(self, cypher, params=None):
+        """Return (query type, plan) from EXPLAIN, which does not execute *cypher*."""
+        from neo4j import Query
+
+        with self.driver.session() as session:
+            summary = session.run(Query(f"EXPLAIN {cypher}", timeout=self.timeout), params or {}).consume()
+        return summary.query_type, summary.plan
+
+    def check(self, cypher, params=None):
+        """Return *cypher*, rewritten to be bounded, or raise CypherRejected."""
+        cypher = ensure_limit(bound_expansions(cypher, self.max_hops), self.max_rows)
+        try:
+            query_type, plan = self.explain(cypher, params)
+        except Exception as e:
+            raise CypherRejected(f"the query does not compile: {e}") from e
+
+        if query_type != "r":
+            raise CypherRejected("only read queries may run; this one writes to the graph")
+        for operator, estimated_rows, details in plan_operators(plan):
+            if operator in REJECTED_OPERATORS:
+                raise CypherRejected(f"the plan contains {REJECTED_OPERATORS[operator]}")
+            if estimated_rows > self.max_estimated_rows:
+                step = f"{operator} ({details})" if details else operator
+                raise CypherRejected(
+                    f"{step} is estimated at {estimated_rows:,.0f} rows (limit {self.max_estimated_rows:,})"
+                )
+        return cypher
@@ -0,0 +1,143 @@
+"""Vector + graph retrieval for questions Cypher generation handles badly.
+
+Fuzzy questions ("attacks similar to deserialization in Java frameworks")
+quote no identifier, so generated Cypher either fails or matches half the
+graph. Instead, the question is embedded with the model the vectorizer used,
+the *k* closest nodes across all vector-indexed labels are taken as seeds,
+and their neighbourhood is expanded a bounded number of hops. The result is
+rendered as a short context for the explanation prompt.
+
+Everything runs against a deadline: hops are skipped once the budget is
+spent, and each expansion query carries a server-side timeout.
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "vectorizer"))
+
+from vector_search import search  # noqa: E402
+
+# bge models retrieve better when short queries carry this instruction
+QUERY_INSTRUCTION = "Represent this sentence for searching relevant passages: "
+
+# Properties tried in order to name a node in the context
+NAME_FIELDS = ("cveId", "id", "ttp_id", "external_id", "name", "Name", "product", "cpe23Uri")
+TEXT_FIELDS = ("name", "Name", "description", "Description", "value", "summary")
+
+EXPAND_QUERY = """
+UNWIND $ids AS id
+MATCH (n) WHERE elementId(n) = id
+CALL {
+    WITH n
+    MATCH (n)-[r]-(m)
+    WHERE NOT m:GraphMeta AND NOT elementId(m) IN $seen
+    RETURN r, m
+    LIMIT $per_node
+}
+RETURN elementId(n) AS source, type(r) AS type, startNode(r) = n AS outgoing,
+       elementId(m) AS target, labels(m)[0] AS label,
+       m {.*, embedding: null, embedding_int8: null, embedding_scale: null} AS properties
+"""
+
+
+def node_name(properties, fallback=""):
+    for field in NAME_FIELDS:
+        if properties.get(field):
+            return str(properties[field])
+    return fallback
+
+
+def node_summary(properties, max_chars=160):
+    for field in TEXT_FIELDS:
+        value = properties.get(field)
+        if isinstance(value, str) and value:
+            return value if len(value) <= max_chars else value[:max_chars - 1] + "…"
+    return ""
+
+
+def expand(driver, seeds, depth=1, per_node=10, deadline=None):
+    """Walk up to *depth* hops out from *seeds* (element ids).
+
+    Returns (nodes, edges): nodes maps element id to (label, properties) for
+    every node reached; edges are (start id, type, end id). Each node
+    contributes at most *per_node* new neighbours per hop. No hop starts
+    after *deadline* (a ``time.perf_counter`` value).
+    """
+    from neo4j import Query
+
+    nodes, edges = {}, []
+    frontier, seen = list(seeds), set(seeds)
+    with driver.session() as session:
+        for _ in range(depth):
+            remaining = deadline - time.perf_counter() if deadline else None
+            if not frontier or (remaining is not None and remaining <= 0):
+                break
+            result = session.run(
+                Query(EXPAND_QUERY, timeout=remaining),
+                ids=frontier,
+                seen=list(seen),
+                per_node=per_node,
+            )
+            frontier = []
+            for record in result:
+                target = record["target"]
+                edge = (record["source"], record["type"], target)
+                edges.append(edge if record["outgoing"] else edge[::-1])
+                if target not in seen:
+                    seen.add(target)
+                    frontier.append(target)
+                    properties = {key: value for key, value in record["properties"].items() if value is not None}
+                    nodes[target] = (record["label"], properties)
+    return nodes, edges
+
+
+def retrieve(driver, question, engine, k=8, labels=None, depth=1, per_node=10, budget_ms=None):
+    """Return the seeds, their neighbourhood and stage timings for *question*.
+
+    The result is a dict with "hits" (vector_search hits), "nodes" and
+    "edges" (see ``expand``) and "timings" in milliseconds.
+    """
+    start = time.perf_counter()
+    deadline = start + budget_ms / 1000 if budget_ms else None
+
+    hits, timings = search(driver, QUERY_INSTRUCTION + question, k=k, labels=labels, engine=engine)
+    timings["vector"] = (time.perf_counter() - start) * 1000
+
+    expand_start = time.perf_counter()
+    nodes, edges = expand(driver, [hit["element_id"] for hit in hits], depth, per_node, deadline)
+    timings["expand"] = (time.perf_counter() - expand_start) * 1000
+    return {"hits": hits, "nodes": nodes, "edges": edges, "timings": timings}
+
+
+def format_context(retrieved, max_edges=60, max_chars=6000):
+    """Render retrieved nodes and edges as compact lines for the explanation prompt."""
+    nodes = dict(retrieved["nodes"])
+    nodes.update((hit["element_id"], (hit["label"], hit["properties"])) for hit in retrieved["hits"])
+
+    def name(element_id):
+        label, properties = nodes.get(element_id, ("?", {}))
+        return f"{label} {node_name(properties, element_id)}"
+
+    lines = ["Closest matches:"]
+    for hit in retrieved["hits"]:
+        summary = node_summary(hit["properties"])
+        lines.append(f"- {name(hit['element_id'])} (similarity {hit['score']:.2f})" + (f": {summary}" if summary else ""))
+
+    described = {hit["element_id"] for hit in retrieved["hits"]}
+    if retrieved["edges"]:
+        lines.append("Connections:")
+    for start, rel_type, end in list(dict.fromkeys(retrieved["edges"]))[:max_edges]:
+        line = f"- ({name(start)})-[:{rel_type}]->({name(end)})"
+        # Describe each neighbour once, where it first appears
+        for element_id in (start, end):
+            if element_id not in described:
+                described.add(element_id)
+                properties = nodes.get(element_id, ("", {}))[1]
+                summary = node_summary(properties, max_chars=100)
+                if summary:
+                    line += f" [{node_name(properties, element_id)}: {summary}]"
+        lines.append(line)
+
+    context = "\n".join(lines)
+    return context if len(context) <= max_chars else context[:max_chars].rsplit("\n", 1)[0]
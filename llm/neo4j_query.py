@@ -1,56 +1,56 @@
-from langchain_neo4j import Neo4jGraph
-from langchain_openai import ChatOpenAI
-from langchain.prompts import PromptTemplate
-from langchain.chains import LLMChain
 import os
+import time
+import asyncio
+import argparse
+from functools import partial
 
 from dotenv import load_dotenv
 
+from cypher_guard import CypherGuard, CypherRejected
+from hybrid_retrieval import format_context, retrieve
+from query_cache import DEFAULT_CACHE_PATH, QueryCache, parameterize
+from query_router import extract_ids, route
+from result_budget import budget_results
+from schema_cache import DEFAULT_SCHEMA_PATH, format_schema, load_schema, trim_schema
+
 # Load environment variables
 load_dotenv()
 NEO4J_USERNAME = os.getenv("NEO4J_USERNAME")
 NEO4J_PASSWORD = os.getenv("NEO4J_PASSWORD")
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
-# Neo4j connection
-driver = GraphDatabase.driver("bolt://localhost:7687", auth=(NEO4J_USERNAME, NEO4J_PASSWORD))
+# Neo4j connection, opened on first use so importing this module stays cheap
+driver = None
 
 
-def get_query_from_openai():
+def get_driver():
+    global driver
+    if driver is None:
+        from neo4j import GraphDatabase
+
+        driver = GraphDatabase.driver("bolt://localhost:7687", auth=(NEO4J_USERNAME, NEO4J_PASSWORD))
+    return driver
 
-    llm = ChatOpenAI(model="gpt-4o", temperature=0, api_key=OPENAI_API_KEY)
-    graph = Neo4jGraph(
-        url="bolt://localhost:7687",  # Or your remote URL
-        username=NEO4J_USERNAME,
-        password=NEO4J_PASSWORD
-    )
 
-    schema = graph.get_schema
-    question = "What is te CWE linked with CVE-2024-50801?"
-    prompt = PromptTemplate.from_template("""
+DEFAULT_QUESTION = "What is te CWE linked with CVE-2024-50801?"
+
+CYPHER_PROMPT = """
     You are an expert Cypher developer for Neo4j.
     You will be given a schema and a natural language question.
+    Identifiers in the question have been replaced by query parameters.
+    Use those parameters (e.g. $cve_0) in the query instead of literal values.
     ONLY return the Cypher query without explanations, markdown, or comments.
-    
+
     Schema:
     {schema}
-    
-    Question:
-    {question}
-    """)
-
 
-    chain = prompt | llm
-    response = chain.invoke({"schema": schema, "question": question})
-    cypher_query = response.content.strip()
-
-    print("Generated query:\n", cypher_query)
-
-    results = graph.query(cypher_query)
-    print("Results:\n", results)
+    Parameters:
+    {parameters}
 
+    Question:
+    {question}
+    """
 
-    # --- Prompt for explanation of results ---
-    explain_prompt = PromptTemplate.from_template("""
+EXPLAIN_PROMPT = """
     Given the original question and these Cypher results, explain the answer in plain English.
 
     Question:
@@ -60,11 +60,378 @@ def get_query_from_openai():
     {results}
 
     Explanation:
-    """)
-    explain_chain = explain_prompt | llm
-    explanation = explain_chain.invoke({"question": question, "results": str(results)})
+    """
+
+HYBRID_PROMPT = """
+    Answer the question using only this context retrieved from a vulnerability knowledge graph
+    (CVE, CWE, CAPEC and ATT&CK nodes closest to the question, and how they connect).
+    Name the identifiers you rely on. Say so if the context does not answer the question.
+
+    Question:
+    {question}
+
+    Context:
+    {context}
+
+    Answer:
+    """
+
+MODES = ("cypher", "hybrid", "auto")
+
+
+def clean_cypher(text):
+    """Strip the markdown fences models sometimes add despite the prompt."""
+    text = text.strip()
+    if text.startswith("```"):
+        text = text.split("\n", 1)[1] if "\n" in text else ""
+        text = text.rsplit("```", 1)[0]
+    return text.strip()
+
+
+async def call_llm(llm, prompt, limiter=None):
+    """Invoke *llm* without blocking the event loop, after *limiter* allows it."""
+    if limiter is not None:
+        await limiter.acquire()
+    if hasattr(llm, "ainvoke"):
+        return await llm.ainvoke(prompt)
+    return await asyncio.to_thread(llm.invoke, prompt)
+
+
+async def stream_llm(llm, prompt, limiter=None, on_token=None, chunks=None):
+    """Return *llm*'s answer to *prompt*, streamed token by token when it supports ``astream``.
+
+    *on_token* is called with each piece of text as it arrives; *chunks*
+    collects them, so a caller that times out still has the partial answer.
+    """
+    chunks = [] if chunks is None else chunks
+    if hasattr(llm, "astream"):
+        if limiter is not None:
+            await limiter.acquire()
+        async for chunk in llm.astream(prompt):
+            text = getattr(chunk, "content", chunk)
+            if text:
+                chunks.append(text)
+                if on_token:
+                    on_token(text)
+    else:
+        response = await call_llm(llm, prompt, limiter)
+        chunks.append(response.content)
+        if on_token:
+            on_token(response.content)
+    return "".join(chunks).strip()
+
+
+def print_token(text):
+    print(text, end="", flush=True)
+
+
+async def run_query(graph, cypher_query, params):
+    # Neo4jGraph.query is blocking; its driver's pool is shared by every thread
+    return await asyncio.to_thread(graph.query, cypher_query, params)
+
+
+async def generate_cypher(llm, schema, template, params, limiter=None, feedback=None):
+    parameters = "\n".join(f"${name} (e.g. {value})" for name, value in params.items()) or "(none)"
+    if feedback:
+        template += f"\n\n(A previous query for this question was rejected: {feedback}. Write a cheaper one.)"
+    prompt = CYPHER_PROMPT.format(schema=schema, parameters=parameters, question=template)
+    response = await call_llm(llm, prompt, limiter)
+    return clean_cypher(response.content)
+
+
+async def ahybrid_answer(question, llm, retriever, budget_ms=None, limiter=None, verbose=True, on_token=None):
+    """Answer *question* from vector + graph retrieval (see hybrid_retrieval).
+
+    *retriever* is called as ``retriever(question, budget_ms=...)``. With
+    *budget_ms*, retrieval and the explanation share that deadline; when the
+    LLM cannot finish in the time left, the partial answer (or, without one,
+    the retrieved context) is returned instead.
+    """
+    log = print if verbose else (lambda *args: None)
+    on_token = on_token or (print_token if verbose else None)
+    start = time.perf_counter()
+    retrieved = await asyncio.to_thread(retriever, question, budget_ms=budget_ms)
+    context = format_context(retrieved)
+    log("Context:\n", context)
+
+    remaining = budget_ms / 1000 - (time.perf_counter() - start) if budget_ms else None
+    timings = retrieved["timings"]
+    chunks = []
+    log("\n💡 Answer:")
+    try:
+        if remaining is not None and remaining <= 0:
+            raise asyncio.TimeoutError
+        explanation = await asyncio.wait_for(
+            stream_llm(llm, HYBRID_PROMPT.format(question=question, context=context), limiter, on_token, chunks),
+            remaining,
+        )
+    except asyncio.TimeoutError:
+        log(f"\n[⏱️] Latency budget of {budget_ms} ms spent")
+        explanation = "".join(chunks).strip() or context
+    timings["total"] = (time.perf_counter() - start) * 1000
+    log()
+
+    return {
+        "question": question,
+        "cypher": None,
+        "params": {},
+        "results": [
+            {"label": hit["label"], "score": hit["score"], "properties": hit["properties"]} for hit in retrieved["hits"]
+        ],
+        "explanation": explanation,
+        "route": "hybrid",
+        "cached": False,
+        "timings": timings,
+    }
+
+
+async def aanswer_question(
+    question,
+    llm,
+    graph,
+    cache=None,
+    schema=None,
+    router=True,
+    limiter=None,
+    verbose=True,
+    mode="cypher",
+    retriever=None,
+    budget_ms=None,
+    max_rows=50,
+    max_tokens=1500,
+    on_token=None,
+    guard=None,
+):
+    """Answer *question* with generated (or cached) Cypher and an LLM explanation.
+
+    *mode* "hybrid" answers from vector + graph retrieval instead (see
+    ``ahybrid_answer``); "auto" does so only for questions that quote no
+    CVE/CWE/CAPEC/ATT&CK identifier. Both need a *retriever*, e.g. from
+    ``build_retriever``. Questions the *router* recognizes run a precompiled
+    query and are answered without the LLM.
+
+    *schema* is a snapshot from schema_cache; the prompt then only carries the
+    part of it the question is about. Without it, ``graph.get_schema`` is
+    used. Generated and cached Cypher is checked (and bounded) by *guard*, a
+    CypherGuard; a rejected query is regenerated once with the reason, and
+    CypherRejected is raised if that fails too. Without a guard, generated
+    Cypher is not written to *cache*. Results reach the explanation prompt through
+    ``budget_results`` (at most *max_rows* rows and about *max_tokens*
+    tokens); the explanation streams to *on_token*, or to stdout when
+    *verbose*. *limiter* (see batch_qa.RateLimiter) paces the LLM calls.
+
+    Returns a dict with the question, cypher, params, results,
+    explanation, the route taken ("template:<name>", "cache" or "llm") and
+    whether the Cypher came from *cache*.
+    """
+    if mode not in MODES:
+        raise ValueError(f"Unknown answer mode {mode!r}; expected one of {MODES}")
+    if mode != "cypher" and retriever is None:
+        raise ValueError(f"Answer mode {mode!r} needs a retriever; build one with build_retriever()")
+    if mode == "hybrid" or (mode == "auto" and not any(extract_ids(question).values())):
+        return await ahybrid_answer(question, llm, retriever, budget_ms, limiter, verbose, on_token)
+
+    log = print if verbose else (lambda *args: None)
+    on_token = on_token or (print_token if verbose else None)
+
+    routed = route(question) if router else None
+    if routed:
+        query_template, params = routed
+        log(f"⚡ Answering with the '{query_template.name}' template")
+        results = await run_query(graph, query_template.cypher, params)
+        explanation = query_template.render(results)
+        log("\n💡 Answer:\n", explanation)
+        return {
+            "question": question,
+            "cypher": query_template.cypher,
+            "params": params,
+            "results": results,
+            "explanation": explanation,
+            "route": f"template:{query_template.name}",
+            "cached": False,
+        }
+
+    template, params = parameterize(question)
+    cached = cache.get(template, params) if cache is not None else None
+
+    if cached:
+        cypher_query, matched = cached
+        log(f"♻️ Reusing cached query for '{matched}'")
+        try:
+            # The cache file is shared, so its entries get the same checks as fresh Cypher
+            if guard is not None:
+                cypher_query = await asyncio.to_thread(guard.check, cypher_query, params)
+            results = await run_query(graph, cypher_query, params)
+        except Exception as e:
+            # A cached query that no longer runs (e.g. schema change) or no longer
+            # passes the guard is regenerated once
+            log(f"[⚠️] Cached query failed, regenerating: {e}")
+            cache.invalidate(template, params)
+            cached = None
+
+    if not cached:
+        schema_text = format_schema(trim_schema(schema, question)) if schema is not None else graph.get_schema
+        cypher_query = await generate_cypher(llm, schema_text, template, params, limiter)
+        if guard is not None:
+            try:
+                cypher_query = await asyncio.to_thread(guard.check, cypher_query, params)
+            except CypherRejected as e:
+                log(f"[🛡️] Generated query rejected, regenerating: {e}")
+                cypher_query = await generate_cypher(llm, schema_text, template, params, limiter, feedback=str(e))
+                cypher_query = await asyncio.to_thread(guard.check, cypher_query, params)
+        log("Generated query:\n", cypher_query)
+        results = await run_query(graph, cypher_query, params)
+        # Only Cypher that passed the guard is shared through the cache
+        if cache is not None and guard is not None:
+            cache.put(template, params, cypher_query)
+
+    results_text, result_stats = budget_results(results, max_rows, max_tokens)
+    log("Results:\n", results_text)
+    if result_stats["summarized"]:
+        log(f"[✂️] {result_stats['rows']} rows summarized, {result_stats['shown']} shown to the model")
+
+    log("\n💡 Explanation:")
+    start = time.perf_counter()
+    first_token = []
+
+    def emit(text):
+        if not first_token:
+            first_token.append((time.perf_counter() - start) * 1000)
+        if on_token:
+            on_token(text)
+
+    explanation = await stream_llm(llm, EXPLAIN_PROMPT.format(question=question, results=results_text), limiter, emit)
+    log()
+
+    return {
+        "question": question,
+        "cypher": cypher_query,
+        "params": params,
+        "results": results,
+        "explanation": explanation,
+        "route": "cache" if cached else "llm",
+        "cached": bool(cached),
+        "result_stats": result_stats,
+        "timings": {
+            "first_token": first_token[0] if first_token else None,
+            "explanation": (time.perf_counter() - start) * 1000,
+        },
+    }
+
+
+def answer_question(question, llm, graph, cache=None, schema=None, router=True, **kwargs):
+    """Blocking wrapper around ``aanswer_question``."""
+    return asyncio.run(aanswer_question(question, llm, graph, cache=cache, schema=schema, router=router, **kwargs))
+
+
+def build_llm():
+    from langchain_openai import ChatOpenAI
+
+    return ChatOpenAI(model="gpt-4o", temperature=0, api_key=OPENAI_API_KEY)
+
+
+def build_graph(pool_size=None, timeout=None):
+    """Return a Neo4jGraph without per-question schema introspection.
+
+    *pool_size* sizes the driver's connection pool for concurrent callers;
+    *timeout* (seconds) is enforced by the server on every query.
+    """
+    from langchain_neo4j import Neo4jGraph
+
+    return Neo4jGraph(
+        url="bolt://localhost:7687",  # Or your remote URL
+        username=NEO4J_USERNAME,
+        password=NEO4J_PASSWORD,
+        timeout=timeout,
+        refresh_schema=False,  # schema_cache snapshots replace per-question introspection
+        driver_config={"max_connection_pool_size": pool_size} if pool_size else None,
+    )
+
+
+def build_engine():
+    from embedding_engine import EmbeddingEngine  # importable once hybrid_retrieval put vectorizer/ on the path
+
+    return EmbeddingEngine(device=os.getenv("EMBEDDING_DEVICE", "auto"), backend=os.getenv("EMBEDDING_BACKEND", "torch"))
+
+
+def build_retriever(k=8, depth=1, per_node=10, engine=None):
+    """Return a ``retriever(question, budget_ms)`` over the module driver."""
+    engine = engine or build_engine()
+    return partial(retrieve, get_driver(), engine=engine, k=k, depth=depth, per_node=per_node)
+
+
+def get_query_from_openai(
+    question=DEFAULT_QUESTION,
+    cache=None,
+    schema_path=DEFAULT_SCHEMA_PATH,
+    refresh_schema=False,
+    router=True,
+    mode="cypher",
+    retriever=None,
+    budget_ms=None,
+    max_rows=50,
+    max_tokens=1500,
+    guard=None,
+    timeout=None,
+):
+
+    llm = build_llm()
+    graph = build_graph(timeout=timeout)
+    schema = load_schema(get_driver(), schema_path, force=refresh_schema) if mode != "hybrid" else None
+    return answer_question(
+        question,
+        llm,
+        graph,
+        cache=cache,
+        schema=schema,
+        router=router,
+        mode=mode,
+        retriever=retriever,
+        budget_ms=budget_ms,
+        max_rows=max_rows,
+        max_tokens=max_tokens,
+        guard=guard,
+    )
 
-    print("\n💡 Explanation:\n", explanation.content.strip())
 
 if __name__ == "__main__":
-    get_query_from_openai()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Answer a question about the graph with LLM-generated Cypher")
+    parser.add_argument("question", nargs="?", default=DEFAULT_QUESTION)
+    parser.add_argument("--cache-path", default=DEFAULT_CACHE_PATH, help="File of cached question templates")
+    parser.add_argument("--no-cache", action="store_true", help="Always generate Cypher with the LLM")
+    parser.add_argument("--no-router", action="store_true", help="Send every question to the LLM")
+    parser.add_argument("--schema-path", default=DEFAULT_SCHEMA_PATH, help="Cached schema snapshot")
+    parser.add_argument("--refresh-schema", action="store_true", help="Re-introspect the schema even if unchanged")
+    parser.add_argument("--mode", choices=MODES, default="cypher", help="auto: vector + graph retrieval when no id is quoted")
+    parser.add_argument("--top-k", type=int, default=8, help="Hybrid mode: closest nodes to start from")
+    parser.add_argument("--depth", type=int, default=1, help="Hybrid mode: hops to expand around them")
+    parser.add_argument("--budget-ms", type=float, help="Hybrid mode: end-to-end latency budget")
+    parser.add_argument("--max-rows", type=int, default=50, help="Result rows passed to the explanation as-is")
+    parser.add_argument("--max-tokens", type=int, default=1500, help="Approximate token budget for results")
+    parser.add_argument("--timeout", type=float, default=30.0, help="Seconds any query may run")
+    parser.add_argument("--row-limit", type=int, default=1000, help="LIMIT added to generated queries without one")
+    parser.add_argument("--max-estimated-rows", type=int, default=1_000_000, help="Reject plans estimated above this")
+    parser.add_argument("--no-guard", action="store_true", help="Run generated Cypher without the EXPLAIN checks (and without caching it)")
+    args = parser.parse_args()
+
+    query_cache = None if args.no_cache else QueryCache(path=args.cache_path)
+    cypher_guard = None if args.no_guard else CypherGuard(
+        get_driver(), max_rows=args.row_limit, max_estimated_rows=args.max_estimated_rows, timeout=args.timeout
+    )
+    try:
+        get_query_from_openai(
+            args.question,
+            cache=query_cache,
+            schema_path=args.schema_path,
+            refresh_schema=args.refresh_schema,
+            router=not args.no_router,
+            mode=args.mode,
+            retriever=build_retriever(args.top_k, args.depth) if args.mode != "cypher" else None,
+            budget_ms=args.budget_ms,
+            max_rows=args.max_rows,
+            max_tokens=args.max_tokens,
+            guard=cypher_guard,
+            timeout=args.timeout,
+        )
+    except CypherRejected as e:
+        print(f"[❌] Generated query rejected twice: {e}")
@@ -0,0 +1,154 @@
+"""Cache of generated Cypher, keyed by the shape of the question.
+
+Identifiers are lifted out of the question before anything else happens:
+"What is the CWE linked with CVE-2024-50801?" becomes the template
+"what is the cwe linked with $cve_0" plus ``{"cve_0": "CVE-2024-50801"}``.
+The LLM writes Cypher against the template, so the cached query answers the
+same question for any other CVE by passing new parameters.
+
+The cache is exact on the question's shape (``question_shape``): its
+content words plus its parameter names. Years, versions, vendor and product
+names are not parameters, so they stay in the template and end up in the
+Cypher, and "published in 2023" must never reuse the query for "published in
+2019"; only stopwords, word order, punctuation and plurals are ignored.
+Entries expire after *ttl* seconds, and the least recently used ones are
+evicted beyond *max_entries*.
+"""
+import os
+import re
+import json
+import time
+from collections import OrderedDict
+
+# (parameter prefix, pattern) for the identifiers lifted out of questions
+ID_PATTERNS = [
+    ("cve", re.compile(r"\bCVE-\d{4}-\d{4,}\b", re.IGNORECASE)),
+    ("cwe", re.compile(r"\bCWE-\d+\b", re.IGNORECASE)),
+    ("capec", re.compile(r"\bCAPEC-\d+\b", re.IGNORECASE)),
+    ("ttp", re.compile(r"\bT\d{4}(?:\.\d{3})?\b", re.IGNORECASE)),
+]
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.dirname(__file__), "..", "data", "llm", "cypher_cache.json")
+
+
+def parameterize(question):
+    """Return (normalized template, {parameter: identifier}) for *question*."""
+    params = {}
+    template = question
+    for prefix, pattern in ID_PATTERNS:
+        seen = {}
+
+        def replace(match, prefix=prefix, seen=seen):
+            value = match.group(0).upper()
+            if value not in seen:
+                seen[value] = f"{prefix}_{len(seen)}"
+                params[seen[value]] = value
+            return f" ${seen[value]} "
+
+        template = pattern.sub(replace, template)
+    return normalize_question(template), params
+
+
+def normalize_question(text):
+    """Lower-case *text*, drop punctuation other than $ and _, and collapse whitespace."""
+    text = re.sub(r"[^\w$\s]", " ", text.lower())
+    return " ".join(text.split())
+
+
+# Words that carry no meaning about which query to run
+STOPWORDS = set(
+    "a an the is are was were what which who whose s do does did of for to with in on by at from and or "
+    "me show list give tell find about that this these those be its it any all there linked related associated".split()
+)
+
+
+def content_tokens(template):
+    """Return the words of *template* that decide which query answers it.
+
+    Stopwords and $parameters are dropped and a plural "s" is stripped; every
+    other word (including numbers and names) is part of the question's shape.
+    """
+    tokens = set()
+    for word in template.split():
+        if word in STOPWORDS or word.startswith("$"):
+            continue
+        if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+            word = word[:-1]
+        tokens.add(word)
+    return frozenset(tokens)
+
+
+def question_shape(template, params):
+    """Return the cache key of *template*: its content words and parameter names.
+
+    The Cypher refers to the parameters by name, and any literal they do not
+    cover is baked into it, so both have to match for a cached query to apply.
+    """
+    return " ".join(sorted(content_tokens(template))), tuple(sorted(params))
+
+
+class QueryCache:
+    """LRU + TTL cache from question shapes to generated Cypher."""
+
+    def __init__(self, ttl=7 * 24 * 3600, max_entries=1000, path=None):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # shape -> {"template", "cypher", "params", "created"}
+        if path and os.path.exists(path):
+            self._load()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _expired(self, entry, now):
+        return self.ttl is not None and now - entry["created"] > self.ttl
+
+    def get(self, template, params):
+        """Return (cypher, cached template) or None."""
+        shape = question_shape(template, params)
+        entry = self._entries.get(shape)
+        if entry is None or self._expired(entry, time.time()):
+            self.misses += 1
+            return None
+        self._entries.move_to_end(shape)
+        self.hits += 1
+        return entry["cypher"], entry["template"]
+
+    def put(self, template, params, cypher):
+        shape = question_shape(template, params)
+        self._entries.pop(shape, None)
+        self._entries[shape] = {
+            "template": template,
+            "cypher": cypher,
+            "params": sorted(params),
+            "created": time.time(),
+        }
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        if self.path:
+            self.save()
+
+    def invalidate(self, template, params):
+        self._entries.pop(question_shape(template, params), None)
+        if self.path:
+            self.save()
+
+    def save(self):
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        data = list(self._entries.values())
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+    def _load(self):
+        with open(self.path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        now = time.time()
+        for item in data:
+            entry = {key: item[key] for key in ("template", "cypher", "params", "created")}
+            if not self._expired(entry, now):
+                self._entries[question_shape(entry["template"], entry["params"])] = entry
@@ -0,0 +1,191 @@
+"""Precompiled answers for the question shapes we get most.
+
+``route`` recognizes a question by the identifiers it quotes and a few
+keywords, and returns a parameterized Cypher template for it when exactly
+one template's keywords match. Routed
+questions never reach the LLM: the Cypher is fixed, so it cannot be
+malformed, and the answer is rendered from the rows directly. Anything the
+router does not recognize falls through to LLM generation.
+"""
+import re
+from typing import Callable, NamedTuple, Optional, Pattern
+
+from query_cache import ID_PATTERNS
+
+
+class QueryTemplate(NamedTuple):
+    name: str
+    ids: str  # identifier kind the question must quote; passed as $<ids>s
+    keywords: Pattern
+    cypher: str
+    render: Callable[[list], str]
+
+
+def extract_ids(question):
+    """Return {kind: [identifiers in order of appearance]} for cve, cwe, capec and ttp ids."""
+    return {
+        kind: list(dict.fromkeys(match.upper() for match in pattern.findall(question)))
+        for kind, pattern in ID_PATTERNS
+    }
+
+
+def _render_cwes(rows):
+    lines = []
+    for row in rows:
+        cwes = ", ".join(f"{w['id']} ({w['name']})" if w.get("name") else w["id"] for w in row["cwes"] if w.get("id"))
+        lines.append(f"{row['cve']}: {cwes or 'no CWE recorded'}")
+    return "\n".join(lines)
+
+
+def _render_attack_chain(rows):
+    lines = []
+    for row in rows:
+        techniques = ", ".join(f"{t['id']} {t['name']}" for t in row["techniques"] if t.get("id")) or "no ATT&CK technique"
+        lines.append(f"{row['cve']} -> {row['cwe']} -> {row['capec']} ({row['capec_name']}) -> {techniques}")
+    return "\n".join(lines) or "No CAPEC is linked to the CWEs of these CVEs."
+
+
+def _render_capecs(rows):
+    lines = []
+    for row in rows:
+        capecs = ", ".join(f"{p['id']} ({p['name']})" for p in row["capecs"] if p.get("id"))
+        lines.append(f"{row['cwe']}: {capecs or 'no CAPEC recorded'}")
+    return "\n".join(lines)
+
+
+def _render_techniques(rows):
+    lines = []
+    for row in rows:
+        techniques = ", ".join(f"{t['id']} {t['name']}" for t in row["techniques"] if t.get("id"))
+        lines.append(f"{row['capec']}: {techniques or 'no ATT&CK technique recorded'}")
+    return "\n".join(lines)
+
+
+def _render_kev(rows):
+    return "\n".join(
+        f"{row['cve']}: {'in' if row['exploited'] == 'true' else 'not in'} CISA's Known Exploited Vulnerabilities catalog"
+        for row in rows
+    )
+
+
+def _render_products(rows):
+    lines = []
+    for row in rows:
+        version = row["version"] or "*"
+        if row["lessThan"]:
+            version += f" (< {row['lessThan']})"
+        elif row["lessThanOrEqual"]:
+            version += f" (<= {row['lessThanOrEqual']})"
+        lines.append(f"{row['cve']}: {row['vendor']} {row['product']} {version}")
+    return "\n".join(lines) or "No affected products recorded."
+
+
+TEMPLATES = [
+    QueryTemplate(
+        "cve_capec_ttp",
+        "cve",
+        re.compile(r"\b(capecs?|attack patterns?|ttps?|techniques?|tactics?|att&ck)\b", re.IGNORECASE),
+        # Reads the shortcuts materialized by exporters/attack_chains.py and
+        # only walks the full chain for CVEs that stage has not reached yet
+        """
+        UNWIND $cves AS cveId
+        MATCH (c:CVE {cveId: cveId})
+        CALL {
+            WITH c
+            MATCH (c)-[r:CHAIN_CAPEC]->(p:CAPEC)
+            UNWIND r.viaCwes AS cwe
+            RETURN cwe, p, [(c)-[s:CHAIN_TTP]->(t:TTP) WHERE p.id IN s.viaCapecs | {id: t.ttp_id, name: t.name}] AS techniques
+            UNION
+            WITH c
+            MATCH (c)-[:HAS_CWE]->(w:CWE)<-[:RELATED_TO]-(p:CAPEC)
+            WHERE c.chainSignature IS NULL
+            OPTIONAL MATCH (p)-[:USES_TTP|RELATED_TO]-(t:TTP)
+            RETURN w.id AS cwe, p, collect(DISTINCT {id: t.ttp_id, name: t.name}) AS techniques
+        }
+        RETURN c.cveId AS cve, cwe, p.id AS capec, p.name AS capec_name, techniques
+        ORDER BY cve, cwe, capec
+        """,
+        _render_attack_chain,
+    ),
+    QueryTemplate(
+        "cve_cwe",
+        "cve",
+        re.compile(r"\b(cwes?|weakness(es)?)\b", re.IGNORECASE),
+        """
+        UNWIND $cves AS cveId
+        MATCH (c:CVE {cveId: cveId})
+        OPTIONAL MATCH (c)-[:HAS_CWE]->(w:CWE)
+        WITH c, collect(DISTINCT {id: w.id, name: w.name}) AS linked
+        RETURN c.cveId AS cve,
+               CASE WHEN size([x IN linked WHERE x.id IS NOT NULL]) > 0 OR c.cweId IS NULL
+                    THEN linked ELSE [{id: c.cweId, name: null}] END AS cwes
+        """,
+        _render_cwes,
+    ),
+    QueryTemplate(
+        "kev_status",
+        "cve",
+        re.compile(r"\b(kev|known exploited|exploited|exploitation)\b", re.IGNORECASE),
+        """
+        UNWIND $cves AS cveId
+        MATCH (c:CVE {cveId: cveId})
+        RETURN c.cveId AS cve, c.kev_exploited AS exploited
+        """,
+        _render_kev,
+    ),
+    QueryTemplate(
+        "affected_products",
+        "cve",
+        re.compile(r"\b(products?|vendors?|versions?|affect(s|ed|ing)?|vulnerable software)\b", re.IGNORECASE),
+        """
+        UNWIND $cves AS cveId
+        MATCH (c:CVE {cveId: cveId})-[r:AFFECTS]->(p:Product)
+        RETURN c.cveId AS cve, p.vendor AS vendor, p.product AS product, p.version AS version,
+               r.lessThan AS lessThan, r.lessThanOrEqual AS lessThanOrEqual
+        ORDER BY cve, vendor, product, version
+        """,
+        _render_products,
+    ),
+    QueryTemplate(
+        "cwe_capec",
+        "cwe",
+        re.compile(r"\b(capecs?|attack patterns?)\b", re.IGNORECASE),
+        """
+        UNWIND $cwes AS cweId
+        MATCH (w:CWE {id: cweId})
+        OPTIONAL MATCH (p:CAPEC)-[:RELATED_TO]->(w)
+        RETURN w.id AS cwe, collect(DISTINCT {id: p.id, name: p.name}) AS capecs
+        """,
+        _render_capecs,
+    ),
+    QueryTemplate(
+        "capec_ttp",
+        "capec",
+        re.compile(r"\b(ttps?|techniques?|tactics?|att&ck)\b", re.IGNORECASE),
+        """
+        UNWIND $capecs AS capecId
+        MATCH (p:CAPEC {id: capecId})
+        OPTIONAL MATCH (p)-[:USES_TTP|RELATED_TO]-(t:TTP)
+        RETURN p.id AS capec, collect(DISTINCT {id: t.ttp_id, name: t.name}) AS techniques
+        """,
+        _render_techniques,
+    ),
+]
+
+
+def route(question) -> Optional[tuple]:
+    """Return (template, params) for a recognized question, or None.
+
+    A question is only routed when it quotes identifiers of a single kind,
+    so "CWE-79 in CVE-2024-1234" still goes to the LLM, and when the keywords
+    of exactly one template match: "which CAPECs and affected versions for
+    CVE-2024-1234" asks for two things, so it goes to the LLM as well.
+    """
+    ids = {kind: values for kind, values in extract_ids(question).items() if values}
+    if len(ids) != 1:
+        return None
+    (kind, values), = ids.items()
+    matches = [t for t in TEMPLATES if t.ids == kind and t.keywords.search(question)]
+    if len(matches) != 1:
+        return None
+    return matches[0], {f"{kind}s": values}
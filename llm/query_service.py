@@ -0,0 +1,269 @@
+"""Long-running local service that answers questions with everything kept warm.
+
+Running neo4j_query.py per question re-imports LangChain and rebuilds the LLM
+client, the Neo4j connection and the schema every time. The service builds
+them once: one driver pool, one schema snapshot (re-checked against the graph
+version at most every *schema_ttl* seconds), the Cypher cache and, for
+similarity search, the embedding model. Request threads hand questions to
+one asyncio loop running in the background, the same async core that
+batch_qa uses.
+
+Endpoints (JSON in, JSON out):
+
+    GET  /health                     -> status, graph version, uptime, counters
+    POST /ask      {"question", "mode"?, "budget_ms"?, "max_rows"?, "max_tokens"?}
+    POST /similar  {"text", "k"?, "labels"?}
+
+Invalid requests get 400. When the cost guard rejects the Cypher generated
+for a question (twice, see ``aanswer_question``), the reply is 422 with the
+guard's reason, since the request was well-formed but could not be served.
+
+Usage (from the llm directory):
+
+    python query_service.py --port 8765
+    curl -s localhost:8765/ask -d '{"question": "Is CVE-2021-44228 in KEV?"}'
+
+``--offline`` serves StubLLM/StubGraph instead of OpenAI and Neo4j, which is
+enough to exercise the HTTP layer, routing and caching locally.
+"""
+import json
+import time
+import asyncio
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from cypher_guard import CypherRejected
+from hybrid_retrieval import search
+from neo4j_query import MODES, aanswer_question
+from schema_cache import DEFAULT_SCHEMA_PATH, graph_version, load_schema
+
+
+class QueryService:
+    """Warm LLM, graph, schema and caches behind ``ask``/``similar``/``health``.
+
+    *driver* is only needed for the schema snapshot, the cost guard and
+    similarity search; *engine* only for similarity search and hybrid mode.
+    Leaving them out (e.g. with StubLLM and StubGraph) serves what remains.
+    """
+
+    def __init__(
+        self,
+        llm,
+        graph,
+        driver=None,
+        cache=None,
+        guard=None,
+        engine=None,
+        retriever=None,
+        schema_path=DEFAULT_SCHEMA_PATH,
+        schema_ttl=60.0,
+    ):
+        self.llm = llm
+        self.graph = graph
+        self.driver = driver
+        self.cache = cache
+        self.guard = guard
+        self.engine = engine
+        self.retriever = retriever
+        self.schema_path = schema_path
+        self.schema_ttl = schema_ttl
+        self._schema = None
+        self._schema_checked = 0.0
+        self._schema_lock = threading.Lock()
+        self.started = time.time()
+        self.counters = {"ask": 0, "similar": 0, "errors": 0}
+        self._counter_lock = threading.Lock()
+
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self.loop.run_forever, name="query-service-loop", daemon=True)
+        self._thread.start()
+
+    @property
+    def schema(self):
+        """The schema snapshot, re-validated against the graph version every *schema_ttl* seconds."""
+        if self.driver is None:
+            return None
+        with self._schema_lock:
+            if self._schema is None or time.monotonic() - self._schema_checked > self.schema_ttl:
+                self._schema = load_schema(self.driver, self.schema_path)
+                self._schema_checked = time.monotonic()
+            return self._schema
+
+    def count(self, name):
+        with self._counter_lock:
+            self.counters[name] += 1
+
+    def ask(self, payload):
+        question = (payload.get("question") or "").strip()
+        if not question:
+            raise ValueError("'question' is required")
+        mode = payload.get("mode", "cypher")
+        if mode not in MODES:
+            raise ValueError(f"'mode' must be one of {MODES}")
+        if mode != "cypher" and self.retriever is None:
+            raise ValueError("hybrid retrieval is not available on this service")
+
+        self.count("ask")
+        future = asyncio.run_coroutine_threadsafe(
+            aanswer_question(
+                question,
+                self.llm,
+                self.graph,
+                cache=self.cache,
+                schema=self.schema if mode != "hybrid" else None,
+                verbose=False,
+                mode=mode,
+                retriever=self.retriever,
+                budget_ms=payload.get("budget_ms"),
+                max_rows=int(payload.get("max_rows", 50)),
+                max_tokens=int(payload.get("max_tokens", 1500)),
+                guard=self.guard,
+            ),
+            self.loop,
+        )
+        return future.result()
+
+    def similar(self, payload):
+        text = (payload.get("text") or "").strip()
+        if not text:
+            raise ValueError("'text' is required")
+        if self.engine is None or self.driver is None:
+            raise ValueError("similarity search is not available on this service")
+
+        self.count("similar")
+        hits, timings = search(
+            self.driver, text, k=int(payload.get("k", 10)), labels=payload.get("labels"), engine=self.engine
+        )
+        return {"hits": hits, "timings": timings}
+
+    def health(self):
+        version = None
+        if self.driver is not None:
+            version = graph_version(self.driver)
+        return {
+            "status": "ok",
+            "graph_version": version,
+            "uptime": round(time.time() - self.started, 1),
+            "counters": dict(self.counters),
+        }
+
+    def close(self):
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join()
+        self.loop.close()
+
+
+class ServiceHandler(BaseHTTPRequestHandler):
+    # Set on the subclass made by make_server
+    service = None
+    routes = {"/ask": "ask", "/similar": "similar"}
+
+    def _send(self, status, body):
+        data = json.dumps(body, default=str).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path == "/health":
+            self._send(200, self.service.health())
+        else:
+            self._send(404, {"error": f"unknown path {self.path}"})
+
+    def do_POST(self):
+        method = self.routes.get(self.path)
+        if method is None:
+            self._send(404, {"error": f"unknown path {self.path}"})
+            return
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+            payload = json.loads(self.rfile.read(length) or b"{}")
+            start = time.perf_counter()
+            body = getattr(self.service, method)(payload)
+            body["latency_ms"] = (time.perf_counter() - start) * 1000
+            self._send(200, body)
+        except CypherRejected as e:
+            # A subclass of ValueError, but the server generated the query, not the client
+            self.service.count("errors")
+            self._send(422, {"error": "the generated Cypher was rejected", "reason": str(e)})
+        except (ValueError, TypeError) as e:
+            self._send(400, {"error": str(e)})
+        except Exception as e:
+            self.service.count("errors")
+            self._send(500, {"error": f"{type(e).__name__}: {e}"})
+
+    def log_message(self, format, *args):
+        print(f"🌐 {self.address_string()} {format % args}")
+
+
+def make_server(service, host="127.0.0.1", port=8765):
+    handler = type("BoundServiceHandler", (ServiceHandler,), {"service": service})
+    return ThreadingHTTPServer((host, port), handler)
+
+
+def offline_service():
+    """A service over StubLLM/StubGraph with canned answers for the routed templates."""
+    from query_cache import QueryCache
+    from stub_llm import StubGraph, StubLLM
+
+    llm = StubLLM(
+        {"Cypher developer": "MATCH (c:CVE {cveId: $cve_0})-[:HAS_CWE]->(w:CWE) RETURN w.id AS cwe"},
+        default="(offline) This is a canned explanation.",
+        latency=0.05,
+    )
+    graph = StubGraph(
+        results={
+            "kev_exploited": [{"cve": "CVE-2021-44228", "exploited": "true"}],
+            "HAS_CWE": [{"cve": "CVE-2021-44228", "cwe": "CWE-502", "cwes": [{"id": "CWE-502", "name": "Deserialization of Untrusted Data"}]}],
+        }
+    )
+    return QueryService(llm, graph, cache=QueryCache())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve questions and similarity searches from warm state")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--offline", action="store_true", help="Serve local stand-ins instead of OpenAI and Neo4j")
+    parser.add_argument("--no-embeddings", action="store_true", help="Do not load the embedding model")
+    parser.add_argument("--timeout", type=float, default=30.0, help="Seconds any query may run")
+    parser.add_argument("--pool-size", type=int, default=16, help="Neo4j connections kept open")
+    parser.add_argument("--schema-path", default=DEFAULT_SCHEMA_PATH, help="Cached schema snapshot")
+    args = parser.parse_args()
+
+    if args.offline:
+        service = offline_service()
+    else:
+        from cypher_guard import CypherGuard
+        from neo4j_query import build_engine, build_graph, build_llm, build_retriever, get_driver
+        from query_cache import DEFAULT_CACHE_PATH, QueryCache
+
+        driver = get_driver()
+        engine = None if args.no_embeddings else build_engine()
+        service = QueryService(
+            build_llm(),
+            build_graph(pool_size=args.pool_size, timeout=args.timeout),
+            driver=driver,
+            cache=QueryCache(path=DEFAULT_CACHE_PATH),
+            guard=CypherGuard(driver, timeout=args.timeout),
+            engine=engine,
+            retriever=build_retriever(engine=engine) if engine is not None else None,
+            schema_path=args.schema_path,
+        )
+        # Pay the one-off costs before the first request does
+        service.schema
+        if service.engine is not None:
+            service.engine.encode(["warm up"])
+
+    server = make_server(service, args.host, args.port)
+    print(f"🚀 Serving on http://{args.host}:{server.server_address[1]} ({'offline' if args.offline else 'live'})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
@@ -0,0 +1,90 @@
+"""Fit query results into a bounded slice of the explanation prompt.
+
+Broad questions can return thousands of rows, and pasting ``str(results)``
+into the prompt makes it slow, expensive and sometimes too long for the
+model. ``budget_results`` deduplicates the rows and, when they still do not
+fit in *max_rows* rows and *max_tokens* tokens, replaces them with a summary:
+the row counts, per-column distinct counts, top values or numeric ranges, and
+as many sample rows as the budget leaves room for.
+"""
+import json
+from collections import Counter
+
+# Rough size of a token for English text and JSON; good enough for budgeting
+CHARS_PER_TOKEN = 4
+TOP_VALUES = 5
+
+
+def approx_tokens(text):
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def render_row(row):
+    return json.dumps(row, ensure_ascii=False, separators=(", ", ": "), default=str)
+
+
+def dedupe_rows(rows):
+    """Drop repeated rows, keeping the first occurrence of each."""
+    seen, unique = set(), []
+    for row in rows:
+        key = json.dumps(row, sort_keys=True, default=str)
+        if key not in seen:
+            seen.add(key)
+            unique.append(row)
+    return unique
+
+
+def _hashable(value):
+    if isinstance(value, (list, dict)):
+        return json.dumps(value, sort_keys=True, default=str)
+    return value
+
+
+def column_summary(rows, column):
+    """Describe one column: distinct count plus a numeric range or its most common values."""
+    values = [row.get(column) for row in rows if isinstance(row, dict) and row.get(column) is not None]
+    if not values:
+        return f"{column}: always null"
+    numbers = [v for v in values if isinstance(v, (int, float)) and not isinstance(v, bool)]
+    counts = Counter(_hashable(v) for v in values)
+    line = f"{column}: {len(counts)} distinct"
+    if len(numbers) == len(values):
+        line += f", min {min(numbers)}, max {max(numbers)}, mean {sum(numbers) / len(numbers):.2f}"
+    elif len(counts) < len(values):
+        top = ", ".join(f"{value} ({count})" for value, count in counts.most_common(TOP_VALUES))
+        line += f", top: {top}"
+    return line
+
+
+def budget_results(results, max_rows=50, max_tokens=1500):
+    """Return (text for the prompt, stats) for *results*.
+
+    *stats* holds the "rows", "distinct" and "shown" row counts and whether
+    the text is a "summarized" view.
+    """
+    rows = dedupe_rows(results or [])
+    stats = {"rows": len(results or []), "distinct": len(rows), "shown": 0, "summarized": False}
+    lines = [render_row(row) for row in rows[:max_rows]]
+    text = "\n".join(lines)
+    if len(rows) <= max_rows and approx_tokens(text) <= max_tokens:
+        stats["shown"] = len(rows)
+        return text or "(no rows)", stats
+
+    stats["summarized"] = True
+    header = [f"{stats['rows']} rows ({stats['distinct']} distinct)."]
+    columns = list(dict.fromkeys(key for row in rows if isinstance(row, dict) for key in row))
+    if columns:
+        header.append("Columns:")
+        header.extend(f"- {column_summary(rows, column)}" for column in columns)
+
+    budget = max_tokens - approx_tokens("\n".join(header)) - 10
+    sample = []
+    for line in lines:
+        budget -= approx_tokens(line) + 1
+        if budget < 0:
+            break
+        sample.append(line)
+    stats["shown"] = len(sample)
+    if sample:
+        header.append(f"First {len(sample)} rows:")
+    return "\n".join(header + sample), stats
@@ -0,0 +1,181 @@
+"""On-disk snapshot of the graph schema for the LLM prompt.
+
+Introspecting the schema of a large database takes seconds, and it only
+changes when an exporter runs. The snapshot stores the schema together with
+the graph version that exporters bump (see exporters/graph_stamp.py); loading
+it costs one version lookup and is re-introspected only when the version
+moved. ``trim_schema`` then keeps just the part of the schema a question is
+about, which shortens the prompt.
+"""
+import os
+import re
+import sys
+import json
+from collections import deque
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "exporters"))
+from graph_stamp import STAMP_LABEL, graph_version  # noqa: E402,F401
+
+DEFAULT_SCHEMA_PATH = os.path.join(os.path.dirname(__file__), "..", "data", "llm", "schema_snapshot.json")
+
+# Words that point at a label without naming it
+LABEL_HINTS = {
+    "CVE": ("cve", "vulnerab", "exploit", "kev", "cvss", "severity", "score"),
+    "CWE": ("cwe", "weakness"),
+    "CAPEC": ("capec", "attack pattern"),
+    "TTP": ("ttp", "technique", "tactic", "att&ck", "mitre attack"),
+    "Product": ("product", "vendor", "version", "affect"),
+    "CPE": ("cpe",),
+    "Metric": ("cvss", "severity", "score", "metric"),
+    "Description": ("descri",),
+    "Reference": ("reference", "url", "advisory"),
+}
+
+ID_LABELS = [
+    (re.compile(r"\bCVE-\d{4}-\d{4,}\b", re.IGNORECASE), "CVE"),
+    (re.compile(r"\bCWE-\d+\b", re.IGNORECASE), "CWE"),
+    (re.compile(r"\bCAPEC-\d+\b", re.IGNORECASE), "CAPEC"),
+    (re.compile(r"\bT\d{4}(?:\.\d{3})?\b"), "TTP"),
+]
+
+
+def fetch_schema(driver):
+    """Introspect node properties, relationship properties and relationship patterns."""
+    nodes, relationships, patterns = {}, {}, set()
+    with driver.session() as session:
+        for record in session.run(
+            "CALL db.schema.nodeTypeProperties() YIELD nodeLabels, propertyName, propertyTypes "
+            "RETURN nodeLabels, propertyName, propertyTypes"
+        ):
+            for label in record["nodeLabels"]:
+                if label == STAMP_LABEL:
+                    continue
+                props = nodes.setdefault(label, {})
+                if record["propertyName"]:
+                    props[record["propertyName"]] = "|".join(record["propertyTypes"] or [])
+
+        for record in session.run(
+            "CALL db.schema.relTypeProperties() YIELD relType, propertyName, propertyTypes "
+            "RETURN relType, propertyName, propertyTypes"
+        ):
+            rel_type = record["relType"].strip(":`")
+            props = relationships.setdefault(rel_type, {})
+            if record["propertyName"]:
+                props[record["propertyName"]] = "|".join(record["propertyTypes"] or [])
+
+        for record in session.run(
+            """
+            CALL db.schema.visualization() YIELD relationships
+            UNWIND relationships AS r
+            RETURN labels(startNode(r))[0] AS start, type(r) AS type, labels(endNode(r))[0] AS end
+            """
+        ):
+            patterns.add((record["start"], record["type"], record["end"]))
+
+    return {"nodes": nodes, "relationships": relationships, "patterns": sorted(patterns)}
+
+
+def load_schema(driver, path=DEFAULT_SCHEMA_PATH, force=False):
+    """Return the cached schema, re-introspecting only when the graph version moved."""
+    version = graph_version(driver)
+    if not force and os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            snapshot = json.load(f)
+        if snapshot.get("version") == version:
+            return snapshot["schema"]
+
+    print(f"🔍 Introspecting graph schema (version {version})")
+    schema = fetch_schema(driver)
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"version": version, "schema": schema}, f, indent=2)
+    os.replace(tmp_path, path)
+    return schema
+
+
+def question_labels(schema, question):
+    """Return the schema labels *question* names, hints at or quotes an id of."""
+    text = question.lower()
+    found = set()
+    for label in schema["nodes"]:
+        hints = LABEL_HINTS.get(label, ()) + (label.lower(),)
+        if any(hint in text for hint in hints):
+            found.add(label)
+    for pattern, label in ID_LABELS:
+        if label in schema["nodes"] and pattern.search(question):
+            found.add(label)
+    return found
+
+
+def hop_distances(neighbours, source):
+    """Return {label: hops from *source*} over the undirected relationship schema."""
+    distances = {source: 0}
+    queue = deque([source])
+    while queue:
+        label = queue.popleft()
+        for neighbour in neighbours.get(label, ()):
+            if neighbour not in distances:
+                distances[neighbour] = distances[label] + 1
+                queue.append(neighbour)
+    return distances
+
+
+def trim_schema(schema, question):
+    """Keep the labels *question* refers to plus the labels that connect them.
+
+    With one label, its direct neighbours are kept so the model can still
+    walk one hop; with several, every label on a shortest path between two
+    of them is kept (e.g. CWE and CAPEC between CVE and TTP). Unrecognized
+    questions keep the whole schema.
+    """
+    selected = question_labels(schema, question)
+    if not selected:
+        return schema
+
+    neighbours = {}
+    for start, _, end in schema["patterns"]:
+        neighbours.setdefault(start, set()).add(end)
+        neighbours.setdefault(end, set()).add(start)
+
+    keep = set(selected)
+    if len(selected) == 1:
+        keep |= neighbours.get(next(iter(selected)), set())
+    else:
+        distances = {label: hop_distances(neighbours, label) for label in selected}
+        ordered = sorted(selected)
+        for i, source in enumerate(ordered):
+            for target in ordered[i + 1:]:
+                length = distances[source].get(target)
+                if length is None:
+                    continue
+                keep.update(
+                    label
+                    for label, hops in distances[source].items()
+                    if hops + distances[target].get(label, length + 1) == length
+                )
+
+    patterns = [p for p in schema["patterns"] if p[0] in keep and p[2] in keep]
+    rel_types = {p[1] for p in patterns}
+    return {
+        "nodes": {label: props for label, props in schema["nodes"].items() if label in keep},
+        "relationships": {t: props for t, props in schema["relationships"].items() if t in rel_types},
+        "patterns": patterns,
+    }
+
+
+def format_schema(schema):
+    """Render *schema* in the layout Neo4jGraph.get_schema uses."""
+    lines = ["Node properties:"]
+    for label, props in sorted(schema["nodes"].items()):
+        fields = ", ".join(f"{name}: {kind}" for name, kind in sorted(props.items()))
+        lines.append(f"{label} {{{fields}}}")
+    lines.append("Relationship properties:")
+    for rel_type, props in sorted(schema["relationships"].items()):
+        if props:
+            fields = ", ".join(f"{name}: {kind}" for name, kind in sorted(props.items()))
+            lines.append(f"{rel_type} {{{fields}}}")
+    lines.append("The relationships:")
+    for start, rel_type, end in schema["patterns"]:
+        lines.append(f"(:{start})-[:{rel_type}]->(:{end})")
+    return "\n".join(lines)
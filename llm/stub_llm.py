@@ -0,0 +1,68 @@
+"""Offline stand-ins for the chat model and Neo4jGraph used by neo4j_query.
+
+``StubLLM`` answers ``invoke``/``ainvoke``/``astream(prompt)`` with canned text picked by a substring
+of the prompt, and counts its calls. ``StubGraph`` returns canned rows the
+same way. Together they let the query path run without network access or a
+database, e.g. to check that cached questions skip Cypher generation.
+"""
+import time
+import asyncio
+from types import SimpleNamespace
+
+
+class StubLLM:
+    def __init__(self, responses=None, default="", latency=0.0):
+        self.responses = list((responses or {}).items())
+        self.default = default
+        self.latency = latency
+        self.calls = []
+
+    def add_response(self, fragment, content):
+        self.responses.append((fragment, content))
+
+    def _respond(self, prompt):
+        prompt = str(prompt)
+        self.calls.append(prompt)
+        for fragment, content in self.responses:
+            if fragment in prompt:
+                return SimpleNamespace(content=content)
+        return SimpleNamespace(content=self.default)
+
+    def invoke(self, prompt):
+        if self.latency:
+            time.sleep(self.latency)
+        return self._respond(prompt)
+
+    async def ainvoke(self, prompt):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return self._respond(prompt)
+
+    async def astream(self, prompt):
+        """Yield the answer word by word, spreading *latency* over the words."""
+        words = self._respond(prompt).content.split(" ")
+        for i, word in enumerate(words):
+            if self.latency:
+                await asyncio.sleep(self.latency / len(words))
+            yield SimpleNamespace(content=word if i == 0 else " " + word)
+
+
+class StubGraph:
+    def __init__(self, schema="", results=None, latency=0.0):
+        self.schema = schema
+        self.results = list((results or {}).items())
+        self.latency = latency
+        self.queries = []
+
+    @property
+    def get_schema(self):
+        return self.schema
+
+    def query(self, query, params=None):
+        self.queries.append((query, params or {}))
+        if self.latency:
+            time.sleep(self.latency)
+        for fragment, rows in self.results:
+            if fragment in query:
+                return rows
+        return []
@@ -0,0 +1,27 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "exporters"))
+
+from cve_extractor import AffectedRecord  # noqa: E402
+from cve_version_index import VersionIndex  # noqa: E402
+from cve_versions import range_bounds  # noqa: E402
+
+
+def affected(cve_id, version, less_than=None, status="affected"):
+    return AffectedRecord(cve_id, "cna", "v", "p", version, less_than, None, "semver", status, None)
+
+
+def test_inverted_range_is_rejected():
+    assert range_bounds("5.0", "4.0") is None
+
+
+def test_inverted_range_does_not_break_the_index():
+    index = VersionIndex()
+    index.add(affected("CVE-1", "5.0", "4.0"))
+    index.add(affected("CVE-2", "1.0", "2.0"))
+    index.build()
+
+    assert index.skipped == 1
+    assert index.match("v", "p", "1.5") == ["CVE-2"]
+    assert index.match("v", "p", "4.5") == []
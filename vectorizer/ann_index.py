@@ -0,0 +1,391 @@
+"""Offline nearest-neighbour search over exported node embeddings.
+
+``export`` dumps the ``embedding`` property of a label into
+``<label>.f32`` (a float32 matrix, one row per node) and ``<label>.ids.json``.
+``build`` clusters those rows into an IVF (inverted file) index: vectors are
+assigned to their nearest k-means centroid, and a query only scans the
+vectors of its *nprobe* nearest centroids. Everything is memory-mapped, so
+a query process starts in milliseconds and shares pages with other readers.
+
+Usage (from the vectorizer directory):
+
+    python ann_index.py export CVE CAPEC
+    python ann_index.py build CVE CAPEC
+    python ann_index.py similar "heap overflow in image parser" --label CVE
+    python ann_index.py closest CVE-2024-50801 --label CAPEC --quantization int8
+    python ann_index.py evaluate CVE
+"""
+import os
+import json
+import time
+import argparse
+
+import numpy as np
+from tqdm import tqdm
+
+from embedding_storage import bytes_per_vector, dequantize_int8, quantize_binary, quantize_int8
+
+DEFAULT_INDEX_DIR = os.path.join(os.path.dirname(__file__), "..", "data", "embeddings")
+
+# Identifier returned for each node; anything else uses "id"
+LABEL_ID_FIELDS = {"CVE": "cveId", "KEV": "cveId", "TTP": "external_id"}
+
+
+def _paths(directory, label):
+    base = os.path.join(directory, label)
+    return {
+        "vectors": base + ".f32",
+        "ids": base + ".ids.json",
+        "ivf": base + ".ivf.npz",
+        "int8": base + ".int8.npy",
+        "scales": base + ".scales.npy",
+        "binary": base + ".bits.npy",
+    }
+
+
+def normalize_rows(vectors):
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1
+    return vectors / norms
+
+
+# === Export ===
+def export_embeddings(driver, label, directory=DEFAULT_INDEX_DIR, id_field=None, fetch_size=5000):
+    """Write every embedded *label* node to a float32 matrix plus an id list."""
+    id_field = id_field or LABEL_ID_FIELDS.get(label, "id")
+    paths = _paths(directory, label)
+    os.makedirs(directory, exist_ok=True)
+
+    with driver.session(fetch_size=fetch_size) as session:
+        total = session.run(
+            f"""
+            MATCH (n:`{label}`) WHERE n.embedding IS NOT NULL OR n.embedding_int8 IS NOT NULL
+            RETURN count(n) AS count
+            """
+        ).single()["count"]
+        if not total:
+            print(f"⚠️ No embedded {label} nodes to export")
+            return 0
+
+        result = session.run(
+            f"""
+            MATCH (n:`{label}`) WHERE n.embedding IS NOT NULL OR n.embedding_int8 IS NOT NULL
+            RETURN coalesce(n.`{id_field}`, elementId(n)) AS id, n.embedding AS embedding,
+                   n.embedding_int8 AS codes, n.embedding_scale AS scale
+            """
+        )
+        ids, vectors = [], None
+        for row, record in enumerate(tqdm(result, total=total, desc=f"📤 Exporting {label}", unit="node")):
+            embedding = record["embedding"]
+            if embedding is None:
+                # int8 storage: the best we can export is the dequantized vector
+                codes = np.frombuffer(record["codes"], dtype=np.int8)[None, :]
+                embedding = dequantize_int8(codes, [record["scale"]])[0]
+            if vectors is None:
+                vectors = np.memmap(paths["vectors"], dtype=np.float32, mode="w+", shape=(total, len(embedding)))
+            if row >= total:
+                # Nodes embedded after the count was taken; picked up next export
+                break
+            vectors[row] = embedding
+            ids.append(record["id"])
+
+    if vectors is None:
+        # Every counted node lost its embedding before it was read
+        print(f"⚠️ No embedded {label} nodes left to export")
+        return 0
+    vectors.flush()
+    dimension = vectors.shape[1]
+    del vectors
+    if len(ids) < total:
+        # Nodes lost their embedding while exporting; trim the unused rows
+        with open(paths["vectors"], "r+b") as f:
+            f.truncate(len(ids) * dimension * 4)
+    with open(paths["ids"], "w", encoding="utf-8") as f:
+        json.dump({"label": label, "id_field": id_field, "dimension": dimension, "ids": ids}, f)
+    print(f"✅ Exported {len(ids)} {label} embeddings to {paths['vectors']}")
+    return len(ids)
+
+
+def load_vectors(directory, label):
+    """Return (ids, memory-mapped float32 matrix) for an exported label."""
+    paths = _paths(directory, label)
+    with open(paths["ids"], "r", encoding="utf-8") as f:
+        meta = json.load(f)
+    vectors = np.memmap(paths["vectors"], dtype=np.float32, mode="r", shape=(len(meta["ids"]), meta["dimension"]))
+    return meta["ids"], vectors
+
+
+# === IVF index ===
+def kmeans(vectors, clusters, iterations=10, sample=None, seed=0):
+    """Spherical k-means; returns unit-length centroids as a (clusters, dim) array."""
+    rng = np.random.default_rng(seed)
+    sample = sample or clusters * 32
+    rows = rng.choice(len(vectors), size=min(sample, len(vectors)), replace=False)
+    training = normalize_rows(np.asarray(vectors[np.sort(rows)], dtype=np.float32))
+    centroids = training[rng.choice(len(training), size=clusters, replace=False)]
+
+    for _ in range(iterations):
+        assignment = np.argmax(training @ centroids.T, axis=1)
+        counts = np.bincount(assignment, minlength=clusters)
+        order = np.argsort(assignment, kind="stable")
+        starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+        filled = counts > 0
+        sums = np.empty_like(centroids)
+        sums[filled] = np.add.reduceat(training[order], starts[filled], axis=0)
+        # Re-seed empty clusters from random training rows
+        sums[~filled] = training[rng.choice(len(training), size=int((~filled).sum()))]
+        centroids = normalize_rows(sums)
+    return centroids
+
+
+def assign(vectors, centroids, chunk_size=16384):
+    """Return the nearest centroid of every row, scanning *vectors* in chunks."""
+    out = np.empty(len(vectors), dtype=np.int32)
+    for start in range(0, len(vectors), chunk_size):
+        chunk = np.asarray(vectors[start:start + chunk_size], dtype=np.float32)
+        out[start:start + chunk_size] = np.argmax(chunk @ centroids.T, axis=1)
+    return out
+
+
+# Set bits per byte value, for Hamming distances on packed sign bits
+POPCOUNT = np.unpackbits(np.arange(256, dtype=np.uint8)[:, None], axis=1).sum(axis=1).astype(np.uint16)
+
+QUANTIZATIONS = (None, "int8", "binary")
+
+
+def _top(scores, count):
+    """Return the indexes of the *count* highest *scores*, best first."""
+    count = min(count, len(scores))
+    best = np.argpartition(-scores, count - 1)[:count]
+    return best[np.argsort(-scores[best])]
+
+
+class IVFIndex:
+    """Inverted-file index over one label's exported vectors.
+
+    ``order`` lists row numbers grouped by centroid; the rows of list ``c`` are
+    ``order[offsets[c]:offsets[c + 1]]``. *codes* optionally holds compact
+    copies of the vectors ({"int8": (codes, scales), "binary": packed bits})
+    that a search can scan instead of the float32 rows.
+    """
+
+    def __init__(self, ids, vectors, centroids, order, offsets, codes=None):
+        self.ids = ids
+        self.vectors = vectors
+        self.centroids = centroids
+        self.order = order
+        self.offsets = offsets
+        self.codes = codes or {}
+        self._rows = {node_id: row for row, node_id in enumerate(ids)}
+
+    def __len__(self):
+        return len(self.ids)
+
+    @classmethod
+    def build(cls, ids, vectors, clusters=None, iterations=10, seed=0):
+        clusters = clusters or max(1, min(len(vectors), int(4 * np.sqrt(len(vectors)))))
+        centroids = kmeans(vectors, clusters, iterations=iterations, seed=seed)
+        assignment = assign(vectors, centroids)
+        order = np.argsort(assignment, kind="stable").astype(np.int64)
+        offsets = np.zeros(clusters + 1, dtype=np.int64)
+        np.cumsum(np.bincount(assignment, minlength=clusters), out=offsets[1:])
+        return cls(ids, vectors, centroids, order, offsets, codes=quantize_rows(vectors))
+
+    def save(self, directory, label):
+        paths = _paths(directory, label)
+        np.savez(paths["ivf"], centroids=self.centroids, order=self.order, offsets=self.offsets)
+        if "int8" in self.codes:
+            np.save(paths["int8"], self.codes["int8"][0])
+            np.save(paths["scales"], self.codes["int8"][1])
+        if "binary" in self.codes:
+            np.save(paths["binary"], self.codes["binary"])
+
+    @classmethod
+    def load(cls, directory, label):
+        paths = _paths(directory, label)
+        ids, vectors = load_vectors(directory, label)
+        data = np.load(paths["ivf"])
+        codes = {}
+        if os.path.exists(paths["int8"]):
+            codes["int8"] = (np.load(paths["int8"], mmap_mode="r"), np.load(paths["scales"], mmap_mode="r"))
+        if os.path.exists(paths["binary"]):
+            codes["binary"] = np.load(paths["binary"], mmap_mode="r")
+        return cls(ids, vectors, data["centroids"], data["order"], data["offsets"], codes=codes)
+
+    def vector(self, node_id):
+        row = self._rows.get(node_id)
+        return None if row is None else np.asarray(self.vectors[row], dtype=np.float32)
+
+    def search(self, query, k=10, nprobe=8, exclude=(), quantization=None, rerank=4):
+        """Return [(id, cosine similarity)] for the *k* best rows in the *nprobe* nearest lists.
+
+        With *quantization* ("int8" or "binary") the candidates are scored on
+        their compact codes, and only the best ``k * rerank`` are re-scored on
+        the exact float32 vectors.
+        """
+        query = np.asarray(query, dtype=np.float32)
+        query = query / (np.linalg.norm(query) or 1)
+        nprobe = min(nprobe, len(self.centroids))
+        lists = np.argpartition(-(self.centroids @ query), nprobe - 1)[:nprobe]
+        rows = np.concatenate([self.order[self.offsets[c]:self.offsets[c + 1]] for c in lists])
+        if not len(rows):
+            return []
+        rows.sort()  # sequential reads from the memmap
+
+        wanted = k + len(exclude)
+        if quantization == "int8":
+            codes, scales = self.codes["int8"]
+            approx = (np.asarray(codes[rows], dtype=np.float32) @ query) * scales[rows]
+            rows = rows[np.sort(_top(approx, wanted * rerank))]
+        elif quantization == "binary":
+            distance = POPCOUNT[self.codes["binary"][rows] ^ quantize_binary(query[None, :])].sum(axis=1)
+            rows = rows[np.sort(_top(-distance.astype(np.float32), wanted * rerank))]
+        elif quantization is not None:
+            raise ValueError(f"Unknown quantization {quantization!r}; expected one of {QUANTIZATIONS}")
+
+        candidates = np.asarray(self.vectors[rows], dtype=np.float32)
+        norms = np.linalg.norm(candidates, axis=1)
+        norms[norms == 0] = 1
+        scores = candidates @ query / norms
+        hits = [(self.ids[rows[i]], float(scores[i])) for i in _top(scores, wanted) if self.ids[rows[i]] not in exclude]
+        return hits[:k]
+
+
+def quantize_rows(vectors, chunk_size=65536):
+    """Return the int8 and binary codes of every row, built chunk by chunk."""
+    codes = np.empty(vectors.shape, dtype=np.int8)
+    scales = np.empty(len(vectors), dtype=np.float32)
+    bits = np.empty((len(vectors), (vectors.shape[1] + 7) // 8), dtype=np.uint8)
+    for start in range(0, len(vectors), chunk_size):
+        chunk = np.asarray(vectors[start:start + chunk_size], dtype=np.float32)
+        codes[start:start + len(chunk)], scales[start:start + len(chunk)] = quantize_int8(chunk)
+        bits[start:start + len(chunk)] = quantize_binary(chunk)
+    return {"int8": (codes, scales), "binary": bits}
+
+
+def build_index(directory, label, clusters=None, iterations=10):
+    ids, vectors = load_vectors(directory, label)
+    start = time.perf_counter()
+    index = IVFIndex.build(ids, vectors, clusters=clusters, iterations=iterations)
+    index.save(directory, label)
+    print(f"✅ {label}: {len(ids)} vectors in {len(index.centroids)} lists ({time.perf_counter() - start:.1f}s)")
+    return index
+
+
+def evaluate(directory, label, queries=100, k=10, nprobe=8, rerank=4, seed=0):
+    """Print recall@k, latency and footprint of every quantization side by side.
+
+    Queries are stored vectors; ground truth is an exact scan of all rows.
+    """
+    index = IVFIndex.load(directory, label)
+    count, dimension = index.vectors.shape
+    rng = np.random.default_rng(seed)
+    query_rows = rng.choice(count, size=min(queries, count), replace=False)
+
+    norms = np.empty(count, dtype=np.float32)
+    for start in range(0, count, 65536):
+        norms[start:start + 65536] = np.linalg.norm(np.asarray(index.vectors[start:start + 65536]), axis=1)
+    norms[norms == 0] = 1
+    truth = []
+    for row in query_rows:
+        query = np.asarray(index.vectors[row], dtype=np.float32)
+        scores = np.asarray(index.vectors, dtype=np.float32) @ query / norms
+        scores[row] = -np.inf
+        truth.append({index.ids[i] for i in _top(scores, k)})
+
+    print(f"\n{label}: {count} x {dimension}, k={k}, nprobe={nprobe}, rerank={rerank}")
+    print(f"{'scan':<8}{'recall@k':>10}{'ms/query':>10}{'footprint MiB':>15}{'bytes/vector':>14}")
+    for quantization in QUANTIZATIONS:
+        if quantization and quantization not in index.codes:
+            continue
+        found, start = 0, time.perf_counter()
+        for row, expected in zip(query_rows, truth):
+            hits = index.search(
+                index.vectors[row], k=k, nprobe=nprobe, exclude={index.ids[row]}, quantization=quantization, rerank=rerank
+            )
+            found += len(expected & {node_id for node_id, _ in hits})
+        elapsed = (time.perf_counter() - start) / len(query_rows) * 1000
+        size = bytes_per_vector(quantization or "float32", dimension)
+        print(
+            f"{quantization or 'float32':<8}{found / (k * len(query_rows)):>10.3f}{elapsed:>10.2f}"
+            f"{size * count / 2**20:>15.1f}{size:>14}"
+        )
+    print(f"(graph property: double {bytes_per_vector('double', dimension)} bytes/vector)")
+
+
+def print_hits(hits, seconds):
+    for node_id, score in hits:
+        print(f"  {score:.4f}  {node_id}")
+    print(f"⏱️ {seconds * 1000:.1f} ms")
+
+
+# === Entry Point ===
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export embeddings and run offline similarity search")
+    parser.add_argument("--dir", default=DEFAULT_INDEX_DIR, help="Directory of exported embeddings")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    export = sub.add_parser("export", help="Dump embeddings of the given labels from Neo4j")
+    export.add_argument("labels", nargs="+")
+
+    build = sub.add_parser("build", help="Build IVF indexes for exported labels")
+    build.add_argument("labels", nargs="+")
+    build.add_argument("--clusters", type=int, help="Number of inverted lists (default: 4 * sqrt(n))")
+    build.add_argument("--iterations", type=int, default=10)
+
+    similar = sub.add_parser("similar", help="Nodes most similar to a free-text description")
+    similar.add_argument("text")
+    similar.add_argument("--label", default="CVE")
+
+    closest = sub.add_parser("closest", help="Nodes of --label closest to an exported node")
+    closest.add_argument("node_id", help="e.g. CVE-2024-50801")
+    closest.add_argument("--source", default="CVE", help="Label of node_id")
+    closest.add_argument("--label", default="CAPEC")
+
+    report = sub.add_parser("evaluate", help="Compare recall, latency and footprint of each quantization")
+    report.add_argument("label")
+    report.add_argument("--queries", type=int, default=100)
+
+    for command in (similar, closest, report):
+        command.add_argument("-k", type=int, default=10)
+        command.add_argument("--nprobe", type=int, default=8, help="Inverted lists scanned per query")
+        command.add_argument("--rerank", type=int, default=4, help="Shortlist k * rerank candidates for exact scoring")
+    for command in (similar, closest):
+        command.add_argument("--quantization", choices=["int8", "binary"], help="Scan compact codes, then rerank exactly")
+
+    args = parser.parse_args()
+
+    if args.command == "export":
+        from neo4j import GraphDatabase
+        from dotenv import load_dotenv
+
+        load_dotenv()
+        driver = GraphDatabase.driver(
+            "bolt://localhost:7687", auth=(os.getenv("NEO4J_USERNAME"), os.getenv("NEO4J_PASSWORD"))
+        )
+        for label in args.labels:
+            export_embeddings(driver, label, args.dir)
+        driver.close()
+    elif args.command == "build":
+        for label in args.labels:
+            build_index(args.dir, label, clusters=args.clusters, iterations=args.iterations)
+    elif args.command == "evaluate":
+        evaluate(args.dir, args.label, queries=args.queries, k=args.k, nprobe=args.nprobe, rerank=args.rerank)
+    elif args.command == "similar":
+        from embedding_engine import EmbeddingEngine
+
+        query = EmbeddingEngine().encode([args.text])[0]
+        index = IVFIndex.load(args.dir, args.label)
+        start = time.perf_counter()
+        found = index.search(query, k=args.k, nprobe=args.nprobe, quantization=args.quantization, rerank=args.rerank)
+        print_hits(found, time.perf_counter() - start)
+    else:
+        vector = IVFIndex.load(args.dir, args.source).vector(args.node_id)
+        if vector is None:
+            parser.error(f"{args.node_id} is not in the exported {args.source} embeddings")
+        index = IVFIndex.load(args.dir, args.label)
+        start = time.perf_counter()
+        found = index.search(
+            vector, k=args.k, nprobe=args.nprobe, exclude={args.node_id}, quantization=args.quantization, rerank=args.rerank
+        )
+        print_hits(found, time.perf_counter() - start)
@@ -0,0 +1,222 @@
+import os
+import json
+import hashlib
+from collections import OrderedDict
+
+import numpy as np
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(__file__), "..", "data", "embedding_cache")
+
+
+def text_key(model_name, text):
+    """Return the content address of *text* embedded with *model_name*."""
+    return hashlib.sha256(f"{model_name}\0{text}".encode("utf-8")).hexdigest()
+
+
+def key_check(key):
+    """Return the non-zero 64-bit checksum stored next to *key*'s vector."""
+    return int(key[:16], 16) or 1
+
+
+class EmbeddingCache:
+    """On-disk embedding cache keyed by model name and text hash.
+
+    Vectors live in a float32 memmap (``vectors.f32``) with one row per slot;
+    ``index.json`` maps each key to its slot in least-recently-used order.
+    Once the vectors would exceed *max_mb*, the least recently used entries
+    are evicted and their slots reused. Each model gets its own directory, so
+    switching models never serves stale vectors.
+
+    ``checks.u64`` holds a checksum of the key stored in every slot (0 for
+    free). The index is only written on ``flush``, so after a crash it can
+    still map an evicted key to a slot that now holds another vector; lookups
+    compare the checksum and treat a mismatch as a miss. A reused slot's
+    checksum is cleared on disk before its vector is overwritten, so a
+    half-written slot never passes as the old key.
+
+    *max_mb* caps how far the file grows; reopening an existing cache with a
+    smaller limit does not shrink it. The cache is not thread-safe; call it
+    from the encoding thread only.
+    """
+
+    def __init__(self, model_name, directory=DEFAULT_CACHE_DIR, max_mb=2048):
+        self.model_name = model_name
+        self.directory = os.path.join(directory, model_name.replace("/", "__"))
+        self.max_bytes = max_mb * 1024 * 1024
+        self.dimension = None
+        self.hits = 0
+        self.misses = 0
+        self._index = OrderedDict()
+        self._free = []
+        self._vectors = None
+        self._checks = None
+        self._load()
+
+    @property
+    def _vectors_path(self):
+        return os.path.join(self.directory, "vectors.f32")
+
+    @property
+    def _checks_path(self):
+        return os.path.join(self.directory, "checks.u64")
+
+    @property
+    def _index_path(self):
+        return os.path.join(self.directory, "index.json")
+
+    @property
+    def max_entries(self):
+        return max(1, self.max_bytes // (self.dimension * 4))
+
+    def __len__(self):
+        return len(self._index)
+
+    def _load(self):
+        if not os.path.exists(self._index_path):
+            return
+        with open(self._index_path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        self.dimension = data["dimension"]
+        self._index = OrderedDict(data["entries"])
+        capacity = os.path.getsize(self._vectors_path) // (self.dimension * 4)
+        self._vectors = np.memmap(self._vectors_path, dtype=np.float32, mode="r+", shape=(capacity, self.dimension))
+        if not os.path.exists(self._checks_path):
+            # Caches written before checksums existed: trust their index once
+            with open(self._checks_path, "wb") as f:
+                f.truncate(capacity * 8)
+            self._checks = np.memmap(self._checks_path, dtype=np.uint64, mode="r+", shape=(capacity,))
+            for key, slot in self._index.items():
+                self._checks[slot] = key_check(key)
+            self._checks.flush()
+        else:
+            self._checks = np.memmap(self._checks_path, dtype=np.uint64, mode="r+", shape=(capacity,))
+        used = set(self._index.values())
+        self._free = [slot for slot in range(capacity - 1, -1, -1) if slot not in used]
+
+    def _grow(self, needed):
+        """Make room for *needed* more slots, doubling the memmap as required."""
+        capacity = 0 if self._vectors is None else self._vectors.shape[0]
+        used = len(self._index)
+        if used + needed <= capacity:
+            return
+        new_capacity = min(max(used + needed, capacity * 2, 1024), self.max_entries)
+        if new_capacity <= capacity:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        if self._vectors is not None:
+            self._vectors.flush()
+            self._checks.flush()
+            del self._vectors, self._checks
+        with open(self._vectors_path, "ab") as f:
+            f.truncate(new_capacity * self.dimension * 4)
+        with open(self._checks_path, "ab") as f:
+            f.truncate(new_capacity * 8)
+        self._vectors = np.memmap(self._vectors_path, dtype=np.float32, mode="r+", shape=(new_capacity, self.dimension))
+        self._checks = np.memmap(self._checks_path, dtype=np.uint64, mode="r+", shape=(new_capacity,))
+        self._free.extend(range(new_capacity - 1, capacity - 1, -1))
+
+    def _slot(self):
+        if self._free:
+            return self._free.pop()
+        _, slot = self._index.popitem(last=False)
+        return slot
+
+    def put(self, keys, vectors):
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if not len(keys):
+            return
+        if self.dimension is None:
+            self.dimension = vectors.shape[1]
+        # Never store more than fits; the tail of the batch is the most recent
+        keys, vectors = keys[-self.max_entries:], vectors[-self.max_entries:]
+        self._grow(len(keys))
+        slots = []
+        for key in keys:
+            slot = self._index.pop(key, None)
+            if slot is None:
+                slot = self._slot()
+            self._index[key] = slot
+            slots.append(slot)
+        checks = np.array([key_check(key) for key in keys], dtype=np.uint64)
+        stale = self._checks[slots] != checks
+        if stale.any():
+            # Forget the previous owners on disk before their vectors are overwritten
+            self._checks[np.asarray(slots)[stale]] = 0
+            self._checks.flush()
+        self._vectors[slots] = vectors
+        self._checks[slots] = checks
+
+    def encode(self, texts, encoder):
+        """Return embeddings for *texts*, calling *encoder* only for unseen ones.
+
+        Identical texts are encoded once, both within *texts* and across runs.
+        """
+        texts = list(texts)
+        keys = [text_key(self.model_name, text) for text in texts]
+
+        hit_rows, hit_slots, missing = [], [], {}
+        for row, (key, text) in enumerate(zip(keys, texts)):
+            slot = self._index.get(key)
+            if slot is not None:
+                hit_rows.append(row)
+                hit_slots.append(slot)
+            else:
+                missing.setdefault(key, []).append(row)
+
+        if hit_rows:
+            expected = np.array([key_check(keys[row]) for row in hit_rows], dtype=np.uint64)
+            valid = self._checks[hit_slots] == expected
+            for row, slot, ok in zip(hit_rows, hit_slots, valid.tolist()):
+                key = keys[row]
+                if ok:
+                    self._index.move_to_end(key)
+                elif self._index.get(key) == slot:
+                    # The slot was reused for another key before a crash
+                    del self._index[key]
+                    self._free.append(slot)
+                    missing.setdefault(key, []).append(row)
+                else:
+                    missing.setdefault(key, []).append(row)
+            hit_rows = [row for row, ok in zip(hit_rows, valid.tolist()) if ok]
+            hit_slots = [slot for slot, ok in zip(hit_slots, valid.tolist()) if ok]
+        self.hits += len(hit_rows)
+        self.misses += len(missing)
+
+        if not missing:
+            if not texts:
+                return np.zeros((0, self.dimension or 0), dtype=np.float32)
+            return self._vectors[hit_slots]
+
+        new_keys = list(missing)
+        new_vectors = np.asarray(encoder([texts[missing[key][0]] for key in new_keys]), dtype=np.float32)
+        out = np.empty((len(texts), new_vectors.shape[1]), dtype=np.float32)
+        if hit_rows:
+            # Copy hits out before put() can evict and reuse their slots
+            out[hit_rows] = self._vectors[hit_slots]
+        for key, vector in zip(new_keys, new_vectors):
+            out[missing[key]] = vector
+        self.put(new_keys, new_vectors)
+        return out
+
+    def flush(self):
+        """Persist the vectors, checksums and index; the index is replaced atomically."""
+        if self._vectors is None:
+            return
+        self._vectors.flush()
+        self._checks.flush()
+        tmp_path = self._index_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "model": self.model_name,
+                    "dimension": self.dimension,
+                    "entries": list(self._index.items()),
+                },
+                f,
+            )
+        os.replace(tmp_path, self._index_path)
+
+    def close(self):
+        self.flush()
+        self._vectors = None
+        self._checks = None
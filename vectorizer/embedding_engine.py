@@ -0,0 +1,148 @@
+import time
+import numpy as np
+
+MODEL_NAME = "BAAI/bge-base-en-v1.5"
+
+BACKENDS = ("torch", "int8", "onnx")
+
+
+def select_device(preferred="auto"):
+    """Return *preferred*, or the best available device when it is "auto"."""
+    if preferred and preferred != "auto":
+        return preferred
+    import torch
+
+    if torch.cuda.is_available():
+        return "cuda"
+    mps = getattr(torch.backends, "mps", None)
+    if mps is not None and mps.is_available():
+        return "mps"
+    return "cpu"
+
+
+def length_buckets(texts, batch_size):
+    """Yield lists of indexes into *texts*, grouped by similar length.
+
+    Sorting by length before batching keeps padding, and therefore wasted
+    transformer work, to a minimum.
+    """
+    order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+    for start in range(0, len(order), batch_size):
+        yield order[start:start + batch_size]
+
+
+class EmbeddingEngine:
+    """Lazily loaded sentence-transformers model with batched CPU-friendly encoding.
+
+    backend:
+        "torch" - the regular model on the selected device.
+        "int8"  - dynamic int8 quantization of the Linear layers (CPU only).
+        "onnx"  - sentence-transformers' ONNX Runtime backend (CPU only);
+                  *onnx_file* selects a pre-quantized export such as
+                  "onnx/model_qint8_avx512_vnni.onnx".
+    workers:
+        Number of CPU worker processes. 0 or 1 encodes in-process.
+    """
+
+    def __init__(
+        self,
+        model_name=MODEL_NAME,
+        device="auto",
+        backend="torch",
+        batch_size=64,
+        workers=0,
+        onnx_file=None,
+        normalize=True,
+    ):
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown embedding backend {backend!r}; expected one of {BACKENDS}")
+        self.model_name = model_name
+        self.requested_device = device
+        self.backend = backend
+        self.batch_size = batch_size
+        self.workers = workers
+        self.onnx_file = onnx_file
+        self.normalize = normalize
+        self._model = None
+        self._pool = None
+        self.encoded = 0
+        self.seconds = 0.0
+
+    @property
+    def device(self):
+        if self.backend in ("int8", "onnx"):
+            return "cpu"
+        return select_device(self.requested_device)
+
+    @property
+    def model(self):
+        if self._model is None:
+            self._model = self._load_model()
+        return self._model
+
+    def _load_model(self):
+        from sentence_transformers import SentenceTransformer
+
+        device = self.device
+        print(f"🧠 Loading {self.model_name} ({self.backend}) on {device}")
+        if self.backend == "onnx":
+            model_kwargs = {"file_name": self.onnx_file} if self.onnx_file else None
+            return SentenceTransformer(self.model_name, device=device, backend="onnx", model_kwargs=model_kwargs)
+
+        model = SentenceTransformer(self.model_name, device=device)
+        if self.backend == "int8":
+            import torch
+
+            model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        return model
+
+    @property
+    def dimension(self):
+        return self.model.get_sentence_embedding_dimension()
+
+    def _encode_batch(self, batch):
+        return self.model.encode(
+            batch,
+            batch_size=len(batch),
+            convert_to_numpy=True,
+            normalize_embeddings=self.normalize,
+            show_progress_bar=False,
+        )
+
+    def _encode_pool(self, texts):
+        if self._pool is None:
+            self._pool = self.model.start_multi_process_pool(target_devices=["cpu"] * self.workers)
+        vectors = self.model.encode_multi_process(
+            texts,
+            self._pool,
+            batch_size=self.batch_size,
+            normalize_embeddings=self.normalize,
+        )
+        return np.asarray(vectors, dtype=np.float32)
+
+    def encode(self, texts):
+        """Return a float32 matrix with one embedding row per text, in input order."""
+        texts = list(texts)
+        if not texts:
+            return np.zeros((0, self.dimension), dtype=np.float32)
+
+        start = time.perf_counter()
+        if self.workers and self.workers > 1 and self.device == "cpu":
+            vectors = self._encode_pool(texts)
+        else:
+            vectors = np.empty((len(texts), self.dimension), dtype=np.float32)
+            for bucket in length_buckets(texts, self.batch_size):
+                vectors[bucket] = self._encode_batch([texts[i] for i in bucket])
+
+        self.seconds += time.perf_counter() - start
+        self.encoded += len(texts)
+        return vectors
+
+    def throughput(self):
+        """Return the nodes/second rate over everything encoded so far."""
+        return self.encoded / self.seconds if self.seconds else 0.0
+
+    def close(self):
+        if self._pool is not None:
+            self.model.stop_multi_process_pool(self._pool)
+            self._pool = None
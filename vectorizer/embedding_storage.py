@@ -0,0 +1,75 @@
+"""How embeddings are stored on nodes, and the quantizers behind the compact modes.
+
+Storage modes:
+    "double"  - ``n.embedding`` as a DoubleArray (8 bytes per dimension).
+    "float32" - ``n.embedding`` as a FloatArray through
+                ``db.create.setNodeVectorProperty`` (4 bytes per dimension).
+                Vector indexes work on it; this is the default.
+    "int8"    - ``n.embedding_int8`` as a ByteArray plus ``n.embedding_scale``
+                (1 byte per dimension). Not usable by vector indexes; search it
+                offline with ann_index, which reranks on exact vectors.
+"""
+import numpy as np
+
+STORAGE_MODES = ("double", "float32", "int8")
+
+# Modes whose ``embedding`` property a native vector index can use
+INDEXABLE_MODES = ("double", "float32")
+
+
+def quantize_int8(vectors):
+    """Return (int8 codes, float32 scales) with ``vectors ~= codes * scales[:, None]``."""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    scales = np.abs(vectors).max(axis=1) / 127
+    scales[scales == 0] = 1
+    codes = np.rint(vectors / scales[:, None]).astype(np.int8)
+    return codes, scales.astype(np.float32)
+
+
+def dequantize_int8(codes, scales):
+    return np.asarray(codes, dtype=np.float32) * np.asarray(scales, dtype=np.float32)[:, None]
+
+
+def quantize_binary(vectors):
+    """Return one sign bit per dimension, packed into uint8 rows."""
+    return np.packbits(np.asarray(vectors) > 0, axis=1)
+
+
+def bytes_per_vector(mode, dimension):
+    """Approximate property payload of one embedding stored in *mode*."""
+    return {
+        "double": 8 * dimension,
+        "float32": 4 * dimension,
+        "int8": dimension + 8,
+        "binary": (dimension + 7) // 8,
+    }[mode]
+
+
+def storage_rows(keys, vectors, mode="float32"):
+    """Return the UNWIND rows that ``storage_clause(mode)`` expects."""
+    if mode not in STORAGE_MODES:
+        raise ValueError(f"Unknown embedding storage {mode!r}; expected one of {STORAGE_MODES}")
+    if mode == "int8":
+        codes, scales = quantize_int8(vectors)
+        return [
+            {"key": key, "codes": code.tobytes(), "scale": float(scale)}
+            for key, code, scale in zip(keys, codes, scales)
+        ]
+    return [
+        {"key": key, "embedding": vector.tolist() if hasattr(vector, "tolist") else list(vector)}
+        for key, vector in zip(keys, vectors)
+    ]
+
+
+def storage_clause(mode="float32"):
+    """Return the Cypher that stores ``row`` on ``n`` and drops other representations."""
+    if mode == "double":
+        return "SET n.embedding = row.embedding REMOVE n.embedding_int8, n.embedding_scale"
+    if mode == "float32":
+        return (
+            "REMOVE n.embedding_int8, n.embedding_scale "
+            "WITH n, row CALL db.create.setNodeVectorProperty(n, 'embedding', row.embedding)"
+        )
+    if mode == "int8":
+        return "SET n.embedding_int8 = row.codes, n.embedding_scale = row.scale REMOVE n.embedding"
+    raise ValueError(f"Unknown embedding storage {mode!r}; expected one of {STORAGE_MODES}")
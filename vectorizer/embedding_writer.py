@@ -0,0 +1,100 @@
+import queue
+import threading
+
+from embedding_storage import storage_clause, storage_rows
+
+
+def unique_id_fields(driver):
+    """Return the (label, property) pairs backed by a single-property uniqueness constraint."""
+    with driver.session() as session:
+        result = session.run(
+            """
+            SHOW CONSTRAINTS YIELD entityType, type, labelsOrTypes, properties
+            WHERE entityType = 'NODE' AND (type CONTAINS 'UNIQUE' OR type CONTAINS 'KEY')
+            RETURN labelsOrTypes, properties
+            """
+        )
+        return {
+            (record["labelsOrTypes"][0], record["properties"][0])
+            for record in result
+            if len(record["properties"]) == 1
+        }
+
+
+def write_query(label, id_field=None, storage="float32"):
+    """Return the UNWIND query that stores embedding rows in *storage* mode.
+
+    Rows are matched on *id_field* when it is unique, otherwise on elementId so
+    that a shared property value never rewrites every node that carries it.
+    """
+    if id_field:
+        match = f"MATCH (n:`{label}` {{`{id_field}`: row.key}})"
+    else:
+        match = f"MATCH (n:`{label}`) WHERE elementId(n) = row.key"
+    return f"""
+    UNWIND $rows AS row
+    {match}
+    {storage_clause(storage)}
+    """
+
+
+class EmbeddingWriter:
+    """Write embeddings back in UNWIND batches on a background thread.
+
+    ``put`` hands batches to a bounded queue and returns immediately, so the
+    caller can encode the next chunk while the previous one is being written.
+    When the queue is full, ``put`` blocks, which keeps memory bounded if
+    writes fall behind. The first write error is raised from ``put`` or
+    ``close``.
+    """
+
+    def __init__(self, driver, label, id_field=None, batch_size=500, max_pending=4, storage="float32"):
+        self.driver = driver
+        self.storage = storage
+        self.query = write_query(label, id_field, storage)
+        self.batch_size = batch_size
+        self.written = 0
+        self._error = None
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._thread = threading.Thread(target=self._run, name=f"embedding-writer-{label}", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        with self.driver.session() as session:
+            while True:
+                rows = self._queue.get()
+                if rows is None:
+                    return
+                if self._error is not None:
+                    # Keep draining so producers never block on a dead writer
+                    continue
+                try:
+                    session.execute_write(lambda tx: tx.run(self.query, rows=rows).consume())
+                    self.written += len(rows)
+                except Exception as e:
+                    self._error = e
+
+    def put(self, keys, vectors):
+        """Queue embeddings for *keys*; *vectors* is a matrix or list of vectors."""
+        if self._error is not None:
+            raise self._error
+        rows = storage_rows(keys, vectors, self.storage)
+        for start in range(0, len(rows), self.batch_size):
+            self._queue.put(rows[start:start + self.batch_size])
+
+    def close(self):
+        self._queue.put(None)
+        self._thread.join()
+        if self._error is not None:
+            raise self._error
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self._queue.put(None)
+            self._thread.join()
+        return False
@@ -0,0 +1,95 @@
+import queue
+import threading
+
+
+def page_query(label, fields, id_field, keyset=True, first=False):
+    """Return the query that reads one page of *label* nodes.
+
+    With *keyset*, pages are ``n.<id_field> > $after ORDER BY n.<id_field>``
+    so every page is an index seek on the uniqueness constraint; the *first*
+    page has no lower bound. Without *keyset* the whole label is read by one
+    query whose records are streamed. CVE descriptions come from a pattern
+    comprehension in the same query.
+    """
+    match = f"MATCH (n:`{label}`)"
+    if keyset:
+        if not first:
+            match += f" WHERE n.`{id_field}` > $after"
+        match += f"\n        WITH n ORDER BY n.`{id_field}` LIMIT $page_size"
+
+    columns = [f"n.`{id_field}` AS id", "elementId(n) AS element_id"]
+    if label == "CVE":
+        columns.append(
+            "[(n)-[:HAS_CONTAINER]->(:Container)-[:HAS_DESCRIPTION]->(d:Description) | d.value] AS descriptions"
+        )
+    else:
+        columns.extend(f"n.`{f}` AS `{f}`" for f in fields)
+    return f"{match}\n        RETURN {', '.join(columns)}"
+
+
+def iter_node_pages(driver, label, fields, id_field, keyset=True, page_size=2000):
+    """Yield lists of node dicts for *label*, at most *page_size* per list."""
+    query = page_query(label, fields, id_field, keyset)
+    with driver.session(fetch_size=page_size) as session:
+        if not keyset:
+            page = []
+            for record in session.run(query):
+                page.append(record.data())
+                if len(page) == page_size:
+                    yield page
+                    page = []
+            if page:
+                yield page
+            return
+
+        first_query = page_query(label, fields, id_field, first=True)
+        page = [record.data() for record in session.run(first_query, page_size=page_size)]
+        while page:
+            yield page
+            if len(page) < page_size:
+                return
+            page = [record.data() for record in session.run(query, after=page[-1]["id"], page_size=page_size)]
+
+
+def count_nodes(driver, label):
+    with driver.session() as session:
+        return session.run(f"MATCH (n:`{label}`) RETURN count(n) AS count").single()["count"]
+
+
+def prefetch(iterable, max_pending=2):
+    """Iterate *iterable* on a background thread, keeping up to *max_pending* items ready.
+
+    Errors raised by the producer are re-raised in the consumer.
+    """
+    items = queue.Queue(maxsize=max_pending)
+    done = object()
+    stop = threading.Event()
+
+    def produce():
+        try:
+            for item in iterable:
+                if stop.is_set():
+                    return
+                items.put(item)
+            items.put(done)
+        except Exception as e:
+            items.put(e)
+
+    thread = threading.Thread(target=produce, name="node-reader", daemon=True)
+    thread.start()
+    try:
+        while True:
+            item = items.get()
+            if item is done:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        stop.set()
+        # Unblock a producer waiting on a full queue
+        while thread.is_alive():
+            try:
+                items.get_nowait()
+            except queue.Empty:
+                thread.join(0.05)
@@ -0,0 +1,14 @@
+def build_node_text(node, fields):
+    """Concatenate the non-empty *fields* of a node record into one text."""
+    parts = []
+    for f in fields:
+        value = node.get(f)
+        if not value:
+            continue
+        if isinstance(value, (list, tuple, set)):
+            parts.extend(str(v) for v in value if v)
+        elif isinstance(value, dict):
+            parts.extend(str(v) for v in value.values() if v)
+        else:
+            parts.append(str(value))
+    return " ".join(parts)
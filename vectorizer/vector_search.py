@@ -0,0 +1,134 @@
+"""Native Neo4j vector indexes over node embeddings, and top-k search on them.
+
+Usage (from the vectorizer directory):
+
+    python vector_search.py "deserialization of untrusted data" --label CVE --label CAPEC -k 5
+"""
+import os
+import time
+import argparse
+
+SIMILARITY_FUNCTION = "cosine"
+
+
+def vector_index_name(label, property_name="embedding"):
+    return f"{label.lower()}_{property_name}_vector"
+
+
+def vector_indexes(driver, property_name="embedding"):
+    """Return {label: (index name, dimensions, similarity)} for vector indexes on *property_name*."""
+    with driver.session() as session:
+        result = session.run(
+            """
+            SHOW VECTOR INDEXES YIELD name, labelsOrTypes, properties, options
+            RETURN name, labelsOrTypes, properties, options
+            """
+        )
+        indexes = {}
+        for record in result:
+            if record["properties"] != [property_name]:
+                continue
+            config = (record["options"] or {}).get("indexConfig", {})
+            indexes[record["labelsOrTypes"][0]] = (
+                record["name"],
+                config.get("vector.dimensions"),
+                config.get("vector.similarity_function", "").lower(),
+            )
+        return indexes
+
+
+def ensure_vector_index(driver, label, dimension, similarity=SIMILARITY_FUNCTION, property_name="embedding"):
+    """Create the vector index for *label*, replacing one built for another model shape."""
+    name = vector_index_name(label, property_name)
+    existing = vector_indexes(driver, property_name).get(label)
+    with driver.session() as session:
+        if existing and (existing[1], existing[2]) != (dimension, similarity):
+            print(f"♻️ Rebuilding vector index {existing[0]} ({existing[1]}d {existing[2]} -> {dimension}d {similarity})")
+            session.run(f"DROP INDEX `{existing[0]}` IF EXISTS").consume()
+        elif existing:
+            return existing[0]
+        session.run(
+            f"""
+            CREATE VECTOR INDEX `{name}` IF NOT EXISTS
+            FOR (n:`{label}`) ON (n.`{property_name}`)
+            OPTIONS {{indexConfig: {{
+                `vector.dimensions`: $dimension,
+                `vector.similarity_function`: $similarity
+            }}}}
+            """,
+            dimension=dimension,
+            similarity=similarity,
+        ).consume()
+    print(f"📐 Vector index {name} on :{label}({property_name}) [{dimension}d {similarity}]")
+    return name
+
+
+def search(driver, query, k=10, labels=None, engine=None, property_name="embedding"):
+    """Return (hits, timings) for the *k* nodes nearest to *query*.
+
+    *query* is a text, encoded with *engine*, or a vector. *labels* restricts
+    the search to those labels; by default every label with a vector index on
+    *property_name* is searched. Each hit is a dict with label, element_id,
+    score and the node's properties (without the embedding). *timings* maps
+    "encode" and each searched label to milliseconds.
+    """
+    timings = {}
+    if isinstance(query, str):
+        start = time.perf_counter()
+        vector = engine.encode([query])[0].tolist()
+        timings["encode"] = (time.perf_counter() - start) * 1000
+    else:
+        vector = [float(x) for x in query]
+
+    indexes = vector_indexes(driver, property_name)
+    hits = []
+    with driver.session() as session:
+        for label in labels or sorted(indexes):
+            if label not in indexes:
+                print(f"⚠️ No vector index on :{label}({property_name})")
+                continue
+            start = time.perf_counter()
+            result = session.run(
+                f"""
+                CALL db.index.vector.queryNodes($index, $k, $vector) YIELD node, score
+                RETURN elementId(node) AS element_id, score, node {{.*, `{property_name}`: null}} AS properties
+                """,
+                index=indexes[label][0],
+                k=k,
+                vector=vector,
+            )
+            for record in result:
+                properties = {key: value for key, value in record["properties"].items() if value is not None}
+                hits.append(
+                    {"label": label, "element_id": record["element_id"], "score": record["score"], "properties": properties}
+                )
+            timings[label] = (time.perf_counter() - start) * 1000
+
+    hits.sort(key=lambda hit: hit["score"], reverse=True)
+    return hits[:k], timings
+
+
+# === Entry Point ===
+if __name__ == "__main__":
+    from neo4j import GraphDatabase
+    from dotenv import load_dotenv
+
+    from embedding_engine import EmbeddingEngine
+
+    parser = argparse.ArgumentParser(description="Top-k vector search over embedded nodes")
+    parser.add_argument("text")
+    parser.add_argument("--label", action="append", help="Label to search (repeatable; default: all indexed)")
+    parser.add_argument("-k", type=int, default=10)
+    args = parser.parse_args()
+
+    load_dotenv()
+    driver = GraphDatabase.driver(
+        "bolt://localhost:7687", auth=(os.getenv("NEO4J_USERNAME"), os.getenv("NEO4J_PASSWORD"))
+    )
+    found, spent = search(driver, args.text, k=args.k, labels=args.label, engine=EmbeddingEngine())
+    for hit in found:
+        props = hit["properties"]
+        name = props.get("cveId") or props.get("id") or props.get("name") or props.get("Name") or hit["element_id"]
+        print(f"  {hit['score']:.4f}  {hit['label']:<8} {name}")
+    print("⏱️ " + ", ".join(f"{stage} {ms:.1f} ms" for stage, ms in spent.items()))
+    driver.close()
@@ -1,23 +1,46 @@
 import os
 import json
+import argparse
 from collections import defaultdict
 from tqdm import tqdm
-from sentence_transformers import SentenceTransformer
 from neo4j import GraphDatabase
 from dotenv import load_dotenv
 
+from embedding_cache import DEFAULT_CACHE_DIR, EmbeddingCache
+from embedding_engine import EmbeddingEngine
+from embedding_storage import INDEXABLE_MODES, STORAGE_MODES, bytes_per_vector
+from embedding_writer import EmbeddingWriter, unique_id_fields
+from node_reader import count_nodes, iter_node_pages, prefetch
+from node_text import build_node_text
+from vector_search import ensure_vector_index
+
 # === Load environment variables ===
 load_dotenv()
 NEO4J_USERNAME = os.getenv("NEO4J_USERNAME")
 NEO4J_PASSWORD = os.getenv("NEO4J_PASSWORD")
 
-# === Neo4j connection ===
-driver = GraphDatabase.driver(
-    "bolt://localhost:7687", auth=(NEO4J_USERNAME, NEO4J_PASSWORD)
+# === Neo4j connection (opened on first use, not on import) ===
+driver = None
+
+
+def get_driver():
+    global driver
+    if driver is None:
+        driver = GraphDatabase.driver("bolt://localhost:7687", auth=(NEO4J_USERNAME, NEO4J_PASSWORD))
+    return driver
+
+
+# === Local embedding engine (model loads on first use, device picked automatically) ===
+engine = EmbeddingEngine(
+    device=os.getenv("EMBEDDING_DEVICE", "auto"),
+    backend=os.getenv("EMBEDDING_BACKEND", "torch"),
 )
 
-# === Load local embedding model (GPU) ===
-model = SentenceTransformer("BAAI/bge-base-en-v1.5", device="cuda")
+# === How embeddings are stored on nodes (see embedding_storage) ===
+storage = os.getenv("EMBEDDING_STORAGE", "float32")
+
+# === On-disk embedding cache (set up in __main__; None encodes everything) ===
+cache = None
 
 # === Load database schema ===
 SCHEMA_PATH = os.path.join(os.path.dirname(__file__), "..", "data", "database_schema.json")
@@ -51,69 +74,90 @@ def guess_id_field(label, props):
         return ID_FIELD_OVERRIDES[label]
     return "id" if "id" in props else props[0]
 
-# === Query node data ===
-def fetch_nodes(label, fields, id_field="id"):
-    with driver.session() as session:
-        if label == "CVE":
-            result = session.run(
-                f"""
-                MATCH (n:CVE)-[:HAS_CONTAINER]->(:Container)-[:HAS_DESCRIPTION]->(d:Description)
-                WITH n.{id_field} AS id, collect(d.value) AS descriptions
-                RETURN id, descriptions
-                """
-            )
-            return [record.data() for record in result]
-
-        field_clause = ", ".join([f"n.{f} AS {f}" for f in fields])
-        query = f"MATCH (n:{label}) RETURN n.{id_field} AS id"
-        if field_clause:
-            query += ", " + field_clause
-        result = session.run(query)
-        return [record.data() for record in result]
-
-# === Store embedding ===
-def store_embedding(label, node_id, embedding, id_field="id"):
-    with driver.session() as session:
-        session.run(
-            f"""
-            MATCH (n:{label} {{{id_field}: $node_id}})
-            SET n.embedding = $embedding
-            """,
-            node_id=node_id,
-            embedding=embedding
-        )
-
 # === Generate vector for node content ===
 def embed_text(text):
-    return model.encode(text, convert_to_numpy=True).tolist()
+    return engine.encode([text])[0].tolist()
 
 # === Run vectorization for a label ===
-def vectorize_label(label, fields, id_field="id"):
+def vectorize_label(label, fields, id_field="id", unique_fields=frozenset(), page_size=2048, batch_size=500, index=True):
     print(f"🚀 Vectorizing {label} nodes...")
-    nodes = fetch_nodes(label, fields, id_field=id_field)
-    for node in tqdm(nodes, desc=f"🔢 Embedding {label}", unit="node"):
-        parts = []
-        for f in fields:
-            value = node.get(f)
-            if not value:
-                continue
-            if isinstance(value, (list, tuple, set)):
-                parts.extend(str(v) for v in value if v)
-            elif isinstance(value, dict):
-                parts.extend(str(v) for v in value.values() if v)
-            else:
-                parts.append(str(value))
-        text = " ".join(parts)
-        if text.strip():
-            try:
-                embedding = embed_text(text)
-                store_embedding(label, node["id"], embedding, id_field=id_field)
-            except Exception as e:
-                print(f"[❌] Failed to embed {label} {node['id']}: {e}")
+    driver = get_driver()
+    # Unique id fields are paged by keyset and written back by id; anything
+    # else (e.g. Product.product) is streamed and written back by element id
+    keyset = (label, id_field) in unique_fields
+    key_field = id_field if keyset else None
+    key_column = "id" if keyset else "element_id"
+
+    pages = prefetch(iter_node_pages(driver, label, fields, id_field, keyset=keyset, page_size=page_size))
+    encoded, seconds, embedded, dimension = engine.encoded, engine.seconds, 0, None
+    with EmbeddingWriter(driver, label, id_field=key_field, batch_size=batch_size, storage=storage) as writer, tqdm(
+        total=count_nodes(driver, label), desc=f"🔢 Embedding {label}", unit="node"
+    ) as progress:
+        # While page N is encoded, the reader fetches page N+1 and the writer stores page N-1
+        for page in pages:
+            keys, texts = [], []
+            for node in page:
+                text = build_node_text(node, fields)
+                if text.strip():
+                    keys.append(node[key_column])
+                    texts.append(text)
+            if texts:
+                vectors = cache.encode(texts, engine.encode) if cache is not None else engine.encode(texts)
+                writer.put(keys, vectors)
+                embedded += len(texts)
+                dimension = vectors.shape[1]
+            progress.update(len(page))
+
+    count, elapsed = engine.encoded - encoded, engine.seconds - seconds
+    if count:
+        print(f"⚡ {label}: encoded {count} nodes at {count / elapsed:.1f} nodes/s")
+    if cache is not None:
+        cache.flush()
+        print(f"💾 {label}: {embedded - count} of {embedded} embeddings served from cache")
+    if dimension:
+        footprint = embedded * bytes_per_vector(storage, dimension) / 2**20
+        print(f"📦 {label}: ~{footprint:.1f} MiB of {storage} embeddings")
+    if dimension and index and storage in INDEXABLE_MODES:
+        ensure_vector_index(driver, label, dimension)
 
 # === Entry Point ===
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Embed node text for every label in the schema")
+    parser.add_argument("--device", default=engine.requested_device, help="auto, cpu, cuda or mps")
+    parser.add_argument("--backend", default=engine.backend, choices=["torch", "int8", "onnx"])
+    parser.add_argument("--onnx-file", help="ONNX model file inside the model repo, e.g. onnx/model_qint8_avx512_vnni.onnx")
+    parser.add_argument("--batch-size", type=int, default=engine.batch_size)
+    parser.add_argument("--workers", type=int, default=0, help="CPU worker processes for encoding")
+    parser.add_argument("--page-size", type=int, default=2048, help="Nodes read and encoded per page")
+    parser.add_argument("--write-batch-size", type=int, default=500, help="Embeddings per UNWIND write")
+    parser.add_argument(
+        "--storage",
+        default=storage,
+        choices=STORAGE_MODES,
+        help="Node property format: double, float32 (indexable, default) or int8 with a per-vector scale",
+    )
+    parser.add_argument("--no-vector-index", action="store_true", help="Do not create or update vector indexes")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR, help="Directory of the embedding cache")
+    parser.add_argument("--cache-size-mb", type=int, default=2048, help="Evict least recently used embeddings beyond this size")
+    parser.add_argument("--no-cache", action="store_true", help="Encode every node even if its text is cached")
+    args = parser.parse_args()
+    storage = args.storage
+
+    engine = EmbeddingEngine(
+        device=args.device,
+        backend=args.backend,
+        batch_size=args.batch_size,
+        workers=args.workers,
+        onnx_file=args.onnx_file,
+    )
+    if not args.no_cache:
+        # Quantized backends produce slightly different vectors, so they get their own cache
+        cache_name = engine.model_name if engine.backend == "torch" else f"{engine.model_name}@{engine.backend}"
+        cache = EmbeddingCache(cache_name, directory=args.cache_dir, max_mb=args.cache_size_mb)
+
     schema = load_schema()
+    driver = get_driver()
+    unique_fields = unique_id_fields(driver)
 
     # CVE descriptions are stored on related Description nodes
     if "CVE" in schema:
@@ -125,8 +169,21 @@ if __name__ == "__main__":
         if label != "CVE":
             fields = [f for f in fields if f != id_field] or [id_field]
         try:
-            vectorize_label(label, fields, id_field=id_field)
+            vectorize_label(
+                label,
+                fields,
+                id_field=id_field,
+                unique_fields=unique_fields,
+                page_size=args.page_size,
+                batch_size=args.write_batch_size,
+                index=not args.no_vector_index,
+            )
         except Exception as e:
             print(f"[❌] Error processing {label}: {e}")
 
+    engine.close()
+    if cache is not None:
+        cache.close()
+        print(f"💾 Cache: {cache.hits} hits, {cache.misses} misses, {len(cache)} entries")
+    print(f"⚡ Overall throughput: {engine.throughput():.1f} nodes/s")
     print("✅ Embedding complete for all node types defined in schema.")